@@ -1,6 +1,13 @@
 from .alpaca_client import AlpacaClient
-from .fmp_client import FmpClient
+from .fmp_client import AsyncFmpClient, FmpClient
 from .cache_client import CacheClient
+from .bar_cache import BarCache, BarCacheKey, get_bar_cache
+from .bar_store import BarStore, get_bar_store
+from .bar_stream import BarStream
+from .interday_panel import InterdayPanel
+from .intraday_buffer import IntradayBuffer
+from .replay_client import ReplayDataClient, SimulatedClock
+from .parquet_store import ParquetStore, export_to_parquet, get_parquet_store, import_from_parquet
 from .base import (
     TimeInterval,
     DataError,
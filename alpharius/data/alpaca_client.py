@@ -6,6 +6,7 @@ import pandas as pd
 import retrying
 from alpaca.data import (
     Adjustment,
+    Bar,
     StockBarsRequest,
     StockHistoricalDataClient,
     StockLatestTradeRequest,
@@ -17,6 +18,8 @@ from alpharius.utils import ALPACA_API_KEY_ENV, ALPACA_SECRET_KEY_ENV, TIME_ZONE
 
 from .base import DATA_COLUMNS, DataClient, TimeInterval
 
+_BATCH_SIZE = 100
+
 
 class AlpacaClient(DataClient):
     def __init__(self, api_key: Optional[str] = None, secret_key: Optional[str] = None) -> None:
@@ -31,13 +34,9 @@ class AlpacaClient(DataClient):
         self._client = StockHistoricalDataClient(api_key=api_key, secret_key=secret_key)
 
     @retrying.retry(stop_max_attempt_number=3, wait_exponential_multiplier=500)
-    def get_data(
-        self, symbol: str, start_time: pd.Timestamp, end_time: pd.Timestamp, time_interval: TimeInterval
-    ) -> pd.DataFrame:
-        """Loads data with specified start and end time.
-
-        start_time and end_time are inclusive.
-        """
+    def _get_bars(
+        self, symbols: List[str], start_time: pd.Timestamp, end_time: pd.Timestamp, time_interval: TimeInterval
+    ) -> Dict[str, List[Bar]]:
         if not start_time.tzinfo:
             start_time = start_time.tz_localize(TIME_ZONE)
         if not end_time.tzinfo:
@@ -51,23 +50,41 @@ class AlpacaClient(DataClient):
         else:
             raise ValueError(f'time_interval {time_interval} not supported')
         request = StockBarsRequest(
-            symbol_or_symbols=symbol,
+            symbol_or_symbols=symbols,
             start=start_time.to_pydatetime(),
             end=end_time.to_pydatetime(),
             timeframe=timeframe,
             adjustment=Adjustment.SPLIT,
         )
         try:
-            bars = self._client.get_stock_bars(request).data[symbol]
-            bars.sort(key=lambda b: b.timestamp)
+            return self._client.get_stock_bars(request).data
         except AttributeError:
-            bars = []
-        index = pd.DatetimeIndex([pd.Timestamp(b.timestamp).tz_convert(TIME_ZONE) for b in bars])
-        data = [
-            [np.float32(b.open), np.float32(b.high), np.float32(b.low), np.float32(b.close), np.uint32(b.volume)]
-            for b in bars
-        ]
-        return pd.DataFrame(data, index=index, columns=DATA_COLUMNS)
+            return {}
+
+    def get_data(
+        self, symbol: str, start_time: pd.Timestamp, end_time: pd.Timestamp, time_interval: TimeInterval
+    ) -> pd.DataFrame:
+        """Loads data with specified start and end time.
+
+        start_time and end_time are inclusive.
+        """
+        bars = self._get_bars([symbol], start_time, end_time, time_interval)
+        return _to_frame(bars.get(symbol, []))
+
+    def get_data_batch(
+        self, symbols: List[str], start_time: pd.Timestamp, end_time: pd.Timestamp, time_interval: TimeInterval
+    ) -> Dict[str, pd.DataFrame]:
+        """Loads data of multiple symbols with specified start and end time.
+
+        start_time and end_time are inclusive. Symbols are requested together in chunks.
+        """
+        res = {}
+        for i in range(0, len(symbols), _BATCH_SIZE):
+            chunk = symbols[i : i + _BATCH_SIZE]
+            bars = self._get_bars(chunk, start_time, end_time, time_interval)
+            for symbol in chunk:
+                res[symbol] = _to_frame(bars.get(symbol, []))
+        return res
 
     @retrying.retry(stop_max_attempt_number=3, wait_exponential_multiplier=500)
     def get_last_trades(self, symbols: List[str]) -> Dict[str, float]:
@@ -75,3 +92,18 @@ class AlpacaClient(DataClient):
         request = StockLatestTradeRequest(symbol_or_symbols=symbols)
         trades = self._client.get_stock_latest_trade(request)
         return {symbol: t.price for symbol, t in trades.items()}
+
+
+def _to_frame(bars: List[Bar]) -> pd.DataFrame:
+    count = len(bars)
+    times = pd.to_datetime([b.timestamp for b in bars], utc=True)
+    order = np.argsort(times.asi8, kind='stable')
+    data = {
+        'Open': np.fromiter((b.open for b in bars), dtype=np.float32, count=count)[order],
+        'High': np.fromiter((b.high for b in bars), dtype=np.float32, count=count)[order],
+        'Low': np.fromiter((b.low for b in bars), dtype=np.float32, count=count)[order],
+        'Close': np.fromiter((b.close for b in bars), dtype=np.float32, count=count)[order],
+        'Volume': np.fromiter((b.volume for b in bars), dtype=np.uint32, count=count)[order],
+    }
+    index = times[order].tz_convert(TIME_ZONE)
+    return pd.DataFrame(data, index=index, columns=DATA_COLUMNS, copy=False)
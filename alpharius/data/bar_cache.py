@@ -0,0 +1,84 @@
+import collections
+import datetime
+import functools
+import os
+import threading
+from typing import Dict, Hashable, NamedTuple, Optional
+
+import pandas as pd
+
+from .base import TimeInterval
+
+_BAR_CACHE_MAX_BYTES_ENV = 'BAR_CACHE_MAX_BYTES'
+_DEFAULT_MAX_BYTES = 2 << 30
+
+
+class BarCacheKey(NamedTuple):
+    symbol: str
+    time_interval: TimeInterval
+    start_date: datetime.date
+    end_date: datetime.date
+
+
+class BarCache:
+    """Thread-safe LRU cache of bars with a memory budget in bytes.
+
+    Entries are evicted in least recently used order once the total size of cached
+    DataFrames exceeds the budget. A DataFrame larger than the whole budget is not cached.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: collections.OrderedDict[Hashable, pd.DataFrame] = collections.OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self.num_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[pd.DataFrame]:
+        with self._lock:
+            df = self._entries.get(key)
+            if df is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return df
+
+    def put(self, key: Hashable, df: pd.DataFrame) -> None:
+        size = int(df.memory_usage(index=True).sum())
+        with self._lock:
+            self._remove(key)
+            if size > self._max_bytes:
+                return
+            self._entries[key] = df
+            self._sizes[key] = size
+            self.num_bytes += size
+            while self.num_bytes > self._max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        if key in self._entries:
+            del self._entries[key]
+            self.num_bytes -= self._sizes.pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.num_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@functools.lru_cache(maxsize=None)
+def get_bar_cache() -> BarCache:
+    """Gets the process-wide bar cache.
+
+    Its budget is read from environment variable BAR_CACHE_MAX_BYTES, 2 GiB by default.
+    """
+    return BarCache(int(os.environ.get(_BAR_CACHE_MAX_BYTES_ENV, _DEFAULT_MAX_BYTES)))
@@ -0,0 +1,233 @@
+import contextlib
+import datetime
+import fcntl
+import functools
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from alpharius.utils import TIME_ZONE
+
+from .base import CACHE_DIR, DATA_COLUMNS, TimeInterval
+
+_COLUMN_DTYPES = {'Open': np.float32, 'High': np.float32, 'Low': np.float32, 'Close': np.float32, 'Volume': np.uint64}
+_TIME_COLUMN = 'Time'
+_CURRENT_FILE = 'CURRENT'
+_INDEX_FILE = 'index.json'
+_LOCK_FILE = 'LOCK'
+# Chunks the current version may reference before a write merges them into one
+_MAX_CHUNKS = 8
+# Seconds that replaced versions and chunks are kept for readers still loading them
+_RETENTION_SECONDS = 600
+
+
+class BarStore:
+    """Columnar on-disk storage of bars of one time interval.
+
+    Bars are kept in chunks with one contiguous array per column. Bars of a symbol occupy a
+    consecutive segment of a chunk sorted by time, located by a symbol to chunk and offset
+    index. Arrays are memory-mapped on load, so only the pages touched are read from disk and
+    the returned DataFrame columns are zero-copy views.
+
+    Every write stores the symbols written in a new chunk, along with a new version of the index
+    that still refers to the chunks of other symbols, and then atomically switches the CURRENT
+    pointer to it. Readers never observe a partially written store. Writes of all processes are
+    serialized by a file lock. Replaced versions and chunks are removed by a later write, once
+    they have not been current for a while.
+    """
+
+    def __init__(self, root_dir: str) -> None:
+        self._root_dir = root_dir
+        self._lock = threading.RLock()
+        self._version = None
+        self._arrays: Dict[str, Dict[str, np.ndarray]] = {}
+        self._index: Dict[str, Tuple[str, int, int, datetime.date, datetime.date]] = {}
+
+    def _read_current_version(self) -> Optional[str]:
+        current_file = os.path.join(self._root_dir, _CURRENT_FILE)
+        if not os.path.isfile(current_file):
+            return None
+        with open(current_file, 'r') as f:
+            return f.read().strip() or None
+
+    def _load(self) -> None:
+        version = self._read_current_version()
+        if version == self._version:
+            return
+        arrays, index = {}, {}
+        if version:
+            with open(os.path.join(self._root_dir, version, _INDEX_FILE), 'r') as f:
+                raw_index = json.load(f)
+            for symbol, entry in raw_index.items():
+                if len(entry) == 4:
+                    # Versions written before chunks were shared keep all bars in themselves
+                    entry = [version] + entry
+                chunk, offset, length, start, end = entry
+                if chunk not in arrays:
+                    arrays[chunk] = self._arrays.get(chunk) or self._map_chunk(chunk)
+                index[symbol] = (
+                    chunk,
+                    offset,
+                    length,
+                    datetime.date.fromisoformat(start),
+                    datetime.date.fromisoformat(end),
+                )
+        self._arrays = arrays
+        self._index = index
+        self._version = version
+
+    def _map_chunk(self, chunk: str) -> Dict[str, np.ndarray]:
+        chunk_dir = os.path.join(self._root_dir, chunk)
+        return {
+            column: np.load(os.path.join(chunk_dir, f'{column}.npy'), mmap_mode='r')
+            for column in [_TIME_COLUMN] + DATA_COLUMNS
+        }
+
+    def get_coverage(self, symbol: str) -> Optional[Tuple[datetime.date, datetime.date]]:
+        """Gets the inclusive date range that bars of the symbol are stored for."""
+        with self._lock:
+            self._load()
+            if symbol not in self._index:
+                return None
+            _, _, _, start, end = self._index[symbol]
+            return start, end
+
+    def symbols(self) -> List[str]:
+        """Gets all stored symbols."""
+        with self._lock:
+            self._load()
+            return list(self._index)
+
+    def read(
+        self,
+        symbol: str,
+        start_time: Optional[pd.Timestamp] = None,
+        end_time: Optional[pd.Timestamp] = None,
+    ) -> Optional[pd.DataFrame]:
+        """Reads bars of a symbol between start_time and end_time, both inclusive.
+
+        Returns None if the symbol is not stored.
+        """
+        with self._lock:
+            self._load()
+            if symbol not in self._index:
+                return None
+            chunk, offset, length, _, _ = self._index[symbol]
+            arrays = self._arrays[chunk]
+        times = arrays[_TIME_COLUMN][offset : offset + length]
+        left, right = 0, length
+        if start_time is not None:
+            left = int(np.searchsorted(times, _to_nanoseconds(start_time), side='left'))
+        if end_time is not None:
+            right = int(np.searchsorted(times, _to_nanoseconds(end_time), side='right'))
+        right = max(left, right)
+        index = pd.DatetimeIndex(times[left:right].view('M8[ns]')).tz_localize('UTC').tz_convert(TIME_ZONE)
+        data = {column: arrays[column][offset + left : offset + right] for column in DATA_COLUMNS}
+        return pd.DataFrame(data, index=index, columns=DATA_COLUMNS, copy=False)
+
+    @contextlib.contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        os.makedirs(self._root_dir, exist_ok=True)
+        with open(os.path.join(self._root_dir, _LOCK_FILE), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def write(self, frames: Dict[str, pd.DataFrame], coverage: Dict[str, Tuple[datetime.date, datetime.date]]) -> None:
+        """Stores bars of symbols, replacing previously stored bars of the same symbols.
+
+        Parameters:
+            frames: Bars of each symbol.
+            coverage: Inclusive date range each symbol's bars are complete for.
+        """
+        if not frames:
+            return
+        with self._lock, self._file_lock():
+            # Picks up writes of other processes
+            self._load()
+            segments = {symbol: (df.sort_index(), *coverage[symbol]) for symbol, df in frames.items()}
+            kept = {symbol: entry for symbol, entry in self._index.items() if symbol not in frames}
+            if len({entry[0] for entry in kept.values()}) >= _MAX_CHUNKS:
+                for symbol, (_, _, _, start, end) in kept.items():
+                    segments[symbol] = (self.read(symbol), start, end)
+                kept = {}
+
+            total = sum(len(df) for df, _, _ in segments.values())
+            columns = {_TIME_COLUMN: np.empty(total, dtype=np.int64)}
+            for column, dtype in _COLUMN_DTYPES.items():
+                columns[column] = np.empty(total, dtype=dtype)
+            version = uuid.uuid4().hex
+            raw_index = {
+                symbol: [chunk, offset, length, start.isoformat(), end.isoformat()]
+                for symbol, (chunk, offset, length, start, end) in kept.items()
+            }
+            position = 0
+            for symbol, (df, start, end) in segments.items():
+                target = slice(position, position + len(df))
+                columns[_TIME_COLUMN][target] = df.index.as_unit('ns').asi8
+                for column in DATA_COLUMNS:
+                    columns[column][target] = df[column].to_numpy()
+                raw_index[symbol] = [version, position, len(df), start.isoformat(), end.isoformat()]
+                position += len(df)
+
+            version_dir = os.path.join(self._root_dir, version)
+            os.makedirs(version_dir, exist_ok=True)
+            for column, values in columns.items():
+                np.save(os.path.join(version_dir, f'{column}.npy'), values)
+            with open(os.path.join(version_dir, _INDEX_FILE), 'w') as f:
+                json.dump(raw_index, f)
+            current_file = os.path.join(self._root_dir, _CURRENT_FILE)
+            tmp_file = f'{current_file}.{version}'
+            with open(tmp_file, 'w') as f:
+                f.write(version)
+            os.replace(tmp_file, current_file)
+            replaced = {entry[0] for entry in self._index.values()}
+            if self._version:
+                replaced.add(self._version)
+            self._load()
+            self._sweep(replaced)
+
+    def _sweep(self, replaced: Set[str]) -> None:
+        """Removes versions and chunks that have not been current for the retention period.
+
+        Modification times of versions and chunks just replaced are set to now, to mark when they
+        stopped being current.
+        """
+        current = {entry[0] for entry in self._index.values()}
+        current.add(self._version)
+        for name in replaced - current:
+            try:
+                os.utime(os.path.join(self._root_dir, name))
+            except FileNotFoundError:
+                pass
+        now = time.time()
+        for name in os.listdir(self._root_dir):
+            path = os.path.join(self._root_dir, name)
+            if name in current or not os.path.isdir(path):
+                continue
+            try:
+                if now - os.path.getmtime(path) > _RETENTION_SECONDS:
+                    shutil.rmtree(path, ignore_errors=True)
+            except FileNotFoundError:
+                pass
+
+
+def _to_nanoseconds(t: pd.Timestamp) -> int:
+    if not t.tzinfo:
+        t = t.tz_localize(TIME_ZONE)
+    return t.as_unit('ns').value
+
+
+@functools.lru_cache(maxsize=None)
+def get_bar_store(time_interval: TimeInterval) -> BarStore:
+    """Gets the process-wide bar store of a time interval."""
+    return BarStore(os.path.join(CACHE_DIR, str(time_interval), 'bars'))
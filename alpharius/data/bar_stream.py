@@ -0,0 +1,167 @@
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from alpaca.data import Bar, DataFeed, Trade
+from alpaca.data.live import StockDataStream
+
+from alpharius.utils import ALPACA_API_KEY_ENV, ALPACA_SECRET_KEY_ENV, TIME_ZONE
+
+from .base import DATA_COLUMNS
+
+_BAR_SECONDS = 300
+_MINUTE_SECONDS = 60
+
+# Trade conditions that do not update the high, low and last price of consolidated bars
+_EXCLUDED_CONDITIONS = frozenset(
+    ['B', 'C', 'G', 'H', 'I', 'M', 'N', 'P', 'Q', 'R', 'T', 'U', 'V', 'W', 'Z', '4', '7', '9']
+)
+
+# Indices of the fields of a bar in progress
+_OPEN, _HIGH, _LOW, _CLOSE, _VOLUME, _CLOSE_TIME = range(6)
+
+
+class BarStream:
+    """5-minute bars of the day maintained from streamed minute bars and trades.
+
+    Minute bars are aggregated into the 5-minute bar they fall in. Trades update the high, low
+    and close of their 5-minute bar as they arrive, so the bar in progress is current between
+    minute bars. Trades with conditions not eligible for bars, e.g. odd lots and out of sequence
+    trades, are skipped. Volume is only counted from minute bars. Bars from before the subscription
+    are filled in by seed().
+    """
+
+    def __init__(
+        self, api_key: Optional[str] = None, secret_key: Optional[str] = None, feed: DataFeed = DataFeed.SIP
+    ) -> None:
+        """Instantiates a bar stream.
+
+        Parameters:
+            api_key: Alpaca API key.
+            secret_key: Alpaca API secret key.
+            feed: Market data feed to subscribe to.
+        """
+        self._api_key = api_key or os.environ[ALPACA_API_KEY_ENV]
+        self._secret_key = secret_key or os.environ[ALPACA_SECRET_KEY_ENV]
+        self._feed = feed
+        self._bars: Dict[str, Dict[int, List[float]]] = {}
+        self._lock = threading.Lock()
+        self._lag = 0.0
+        self._stream = None
+        self._thread = None
+
+    def start(self, symbols: Iterable[str]) -> None:
+        """Subscribes to minute bars and trades of symbols in a background thread."""
+        symbols = list(symbols)
+        self._stream = StockDataStream(self._api_key, self._secret_key, feed=self._feed)
+        self._stream.subscribe_bars(self.on_bar, *symbols)
+        self._stream.subscribe_trades(self.on_trade, *symbols)
+        self._thread = threading.Thread(target=self._stream.run, name='bar-stream', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream = None
+
+    async def on_bar(self, bar: Bar) -> None:
+        timestamp = int(bar.timestamp.timestamp())
+        self._update(
+            bar.symbol, timestamp, timestamp + _MINUTE_SECONDS, bar.open, bar.high, bar.low, bar.close, bar.volume
+        )
+
+    async def on_trade(self, trade: Trade) -> None:
+        if trade.conditions and not _EXCLUDED_CONDITIONS.isdisjoint(trade.conditions):
+            return
+        timestamp = trade.timestamp.timestamp()
+        price = trade.price
+        self._update(trade.symbol, int(timestamp), timestamp, price, price, price, price, 0)
+
+    def _update(
+        self,
+        symbol: str,
+        timestamp: int,
+        close_time: float,
+        open_price: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float,
+    ) -> None:
+        bucket = timestamp - timestamp % _BAR_SECONDS
+        with self._lock:
+            self._lag = max(self._lag, time.time() - close_time)
+            symbol_bars = self._bars.setdefault(symbol, {})
+            bar = symbol_bars.get(bucket)
+            if bar is None:
+                symbol_bars[bucket] = [open_price, high, low, close, volume, close_time]
+                return
+            bar[_HIGH] = max(bar[_HIGH], high)
+            bar[_LOW] = min(bar[_LOW], low)
+            bar[_VOLUME] += volume
+            # Minute bars arrive after trades of the next minute, which carry the later close
+            if close_time >= bar[_CLOSE_TIME]:
+                bar[_CLOSE] = close
+                bar[_CLOSE_TIME] = close_time
+
+    def get_lag(self) -> float:
+        """Gets the largest delay in seconds of processing streamed updates since the last call."""
+        with self._lock:
+            lag, self._lag = self._lag, 0.0
+        return lag
+
+    def seed(self, frames: Dict[str, pd.DataFrame], seed_time: pd.Timestamp) -> None:
+        """Fills in 5-minute bars loaded by a data client at seed_time.
+
+        Bars already streamed take the open of the seeded bar, as the stream may have missed
+        the start of the bar, and the higher volume of both.
+        """
+        seed_timestamp = seed_time.timestamp()
+        with self._lock:
+            for symbol, df in frames.items():
+                if not len(df):
+                    continue
+                symbol_bars = self._bars.setdefault(symbol, {})
+                timestamps = df.index.as_unit('s').asi8
+                values = {column: df[column].to_numpy() for column in DATA_COLUMNS}
+                for i, bucket in enumerate(timestamps.tolist()):
+                    seeded = [float(values[column][i]) for column in DATA_COLUMNS]
+                    seeded.append(min(seed_timestamp, bucket + _BAR_SECONDS))
+                    bar = symbol_bars.get(bucket)
+                    if bar is None:
+                        symbol_bars[bucket] = seeded
+                        continue
+                    bar[_OPEN] = seeded[_OPEN]
+                    bar[_HIGH] = max(bar[_HIGH], seeded[_HIGH])
+                    bar[_LOW] = min(bar[_LOW], seeded[_LOW])
+                    bar[_VOLUME] = max(bar[_VOLUME], seeded[_VOLUME])
+                    if seeded[_CLOSE_TIME] > bar[_CLOSE_TIME]:
+                        bar[_CLOSE] = seeded[_CLOSE]
+                        bar[_CLOSE_TIME] = seeded[_CLOSE_TIME]
+
+    def get_bars(self, symbols: Iterable[str]) -> Dict[str, pd.DataFrame]:
+        """Gets 5-minute bars of symbols, including the bar in progress."""
+        res = {}
+        with self._lock:
+            for symbol in symbols:
+                symbol_bars = self._bars.get(symbol, {})
+                buckets = sorted(symbol_bars)
+                values = np.array([symbol_bars[bucket][:_CLOSE_TIME] for bucket in buckets], dtype=np.float64)
+                values = values.reshape(len(buckets), len(DATA_COLUMNS))
+                index = pd.to_datetime(buckets, unit='s', utc=True).tz_convert(TIME_ZONE)
+                res[symbol] = pd.DataFrame(
+                    {
+                        'Open': values[:, _OPEN].astype(np.float32),
+                        'High': values[:, _HIGH].astype(np.float32),
+                        'Low': values[:, _LOW].astype(np.float32),
+                        'Close': values[:, _CLOSE].astype(np.float32),
+                        'Volume': values[:, _VOLUME].astype(np.uint32),
+                    },
+                    index=index,
+                    columns=DATA_COLUMNS,
+                    copy=False,
+                )
+        return res
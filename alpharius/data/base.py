@@ -1,7 +1,8 @@
 import abc
 import os
+from concurrent import futures
 from enum import Enum
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 import pandas as pd
 
@@ -12,6 +13,8 @@ CACHE_DIR = os.path.join(BASE_DIR, 'cache')
 
 DATA_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
 
+_MAX_WORKERS = 10
+
 
 class TimeInterval(Enum):
     FIVE_MIN = 1
@@ -29,13 +32,28 @@ class DataError(Exception):
 class DataClient(abc.ABC):
     def get_daily(self, symbol: str, day: pd.Timestamp, time_interval: TimeInterval) -> pd.DataFrame:
         """Loads data of a given day."""
-        start_time = pd.Timestamp(year=day.year, month=day.month, day=day.day, hour=0, minute=0).tz_localize(
-            tz=TIME_ZONE
-        )
-        end_time = pd.Timestamp(year=day.year, month=day.month, day=day.day, hour=23, minute=59).tz_localize(
-            tz=TIME_ZONE
-        )
-        return self.get_data(symbol, start_time, end_time, time_interval)
+        return self.get_data(symbol, *get_day_range(day), time_interval)
+
+    def get_daily_batch(
+        self, symbols: List[str], day: pd.Timestamp, time_interval: TimeInterval
+    ) -> Dict[str, pd.DataFrame]:
+        """Loads data of a given day for multiple symbols."""
+        return self.get_data_batch(symbols, *get_day_range(day), time_interval)
+
+    def get_data_batch(
+        self, symbols: List[str], start_time: pd.Timestamp, end_time: pd.Timestamp, time_interval: TimeInterval
+    ) -> Dict[str, pd.DataFrame]:
+        """Loads data of multiple symbols with specified start and end time.
+
+        start_time and end_time are inclusive. The default implementation calls get_data
+        for each symbol concurrently. Clients able to fetch multiple symbols in one
+        request should override it.
+        """
+        with futures.ThreadPoolExecutor(max_workers=_MAX_WORKERS) as pool:
+            tasks = {
+                symbol: pool.submit(self.get_data, symbol, start_time, end_time, time_interval) for symbol in symbols
+            }
+            return {symbol: t.result() for symbol, t in tasks.items()}
 
     @abc.abstractmethod
     def get_data(
@@ -54,3 +72,9 @@ class DataClient(abc.ABC):
 
     def __to_hash__(self) -> str:
         return self.__class__.__name__
+
+
+def get_day_range(day: pd.Timestamp) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    start_time = pd.Timestamp(year=day.year, month=day.month, day=day.day, hour=0, minute=0).tz_localize(tz=TIME_ZONE)
+    end_time = pd.Timestamp(year=day.year, month=day.month, day=day.day, hour=23, minute=59).tz_localize(tz=TIME_ZONE)
+    return start_time, end_time
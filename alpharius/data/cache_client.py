@@ -1,24 +1,70 @@
+import collections
 import datetime
+import itertools
 import os
 import sqlite3
-from typing import Dict, List, Tuple
+import threading
+from typing import Dict, List, Tuple, Union
 
 import pandas as pd
 
+from alpharius.utils import TIME_ZONE, get_today
+
 from .base import CACHE_DIR, DATA_COLUMNS, DataClient, TimeInterval
 
 
 class CacheClient(DataClient):
     """A cache layer on top of DataClient with real data access.
 
-    It utilizes a local SQL Lite database as cache storage layer.
+    It utilizes a local SQL Lite database as cache storage layer. Each thread uses
+    its own database connections, so the client can be shared by thread pools.
     """
 
     def __init__(self, data_client: DataClient):
         self._data_client = data_client
-        self._db = init_db()
+        self._local = threading.local()
         self.cache_hit = 0
 
+    def _get_db(self, time_interval: TimeInterval) -> sqlite3.Connection:
+        if getattr(self._local, 'pid', None) != os.getpid():
+            self._local.db = init_db()
+            self._local.pid = os.getpid()
+        return self._local.db[time_interval]
+
+    def _get_time_range(self, symbol: str, time_interval: TimeInterval) -> 'TimeRange':
+        rows = self._get_db(time_interval).execute(
+            'SELECT start_day, end_day FROM coverage WHERE symbol = ? ORDER BY start_day', (symbol,)
+        )
+        return TimeRange(
+            [(datetime.date.fromordinal(start), datetime.date.fromordinal(end)) for start, end in rows.fetchall()]
+        )
+
+    def _read_bars(
+        self, symbol: str, start_time: pd.Timestamp, end_time: pd.Timestamp, time_interval: TimeInterval
+    ) -> pd.DataFrame:
+        columns = ','.join([c.lower() for c in DATA_COLUMNS])
+        df = pd.read_sql_query(
+            f'SELECT time, {columns} FROM bars WHERE symbol = ? AND time >= ? AND time <= ? ORDER BY time',
+            self._get_db(time_interval),
+            params=(symbol, _to_epoch(start_time), _to_epoch(end_time)),
+        )
+        index = pd.to_datetime(df['time'].to_numpy(), unit='s', utc=True).tz_convert(TIME_ZONE)
+        data = {column: df[column.lower()].to_numpy() for column in DATA_COLUMNS}
+        return pd.DataFrame(data, index=index, columns=DATA_COLUMNS, copy=False)
+
+    def _write_bars(self, symbol: str, df: pd.DataFrame, time_range: 'TimeRange', time_interval: TimeInterval) -> None:
+        db = self._get_db(time_interval)
+        times = df.index.as_unit('s').asi8.tolist()
+        values = zip(itertools.repeat(symbol), times, *[df[column].to_numpy().tolist() for column in DATA_COLUMNS])
+        columns = ','.join([c.lower() for c in DATA_COLUMNS])
+        marks = ','.join(['?' for _ in DATA_COLUMNS])
+        db.executemany(f'INSERT OR REPLACE INTO bars (symbol, time, {columns}) VALUES (?, ?, {marks})', values)
+        db.execute('DELETE FROM coverage WHERE symbol = ?', (symbol,))
+        db.executemany(
+            'INSERT INTO coverage (symbol, start_day, end_day) VALUES (?, ?, ?)',
+            [(symbol, start.toordinal(), end.toordinal()) for start, end in time_range.intervals],
+        )
+
     def get_data(
         self, symbol: str, start_time: pd.Timestamp, end_time: pd.Timestamp, time_interval: TimeInterval
     ) -> pd.DataFrame:
@@ -26,94 +72,97 @@ class CacheClient(DataClient):
 
         start_time and end_time are inclusive.
         """
-        db = self._db[time_interval]
-        time_range = db.execute('SELECT time_range from time_range WHERE symbol = ?', (symbol,)).fetchone()
-        time_range = TimeRange.from_string(time_range[0] if time_range else '')
-        if time_range.include(start_time, end_time):
-            columns = ','.join([c.lower() for c in DATA_COLUMNS])
-            bars = db.execute(
-                f'SELECT time, {columns} FROM chart WHERE date >= ? AND date <= ?',
-                [str(start_time.date()), str(end_time.date())],
-            ).fetchall()
-            index = pd.DatetimeIndex([pd.Timestamp(bar[0]) for bar in bars])
-            data = [bar[1:] for bar in bars]
-            self.cache_hit += 1
-            return pd.DataFrame(data, index=index, columns=DATA_COLUMNS)
-        else:
-            df = self._data_client.get_data(symbol, start_time, end_time, time_interval)
-            values = []
-            for ind, row in df.iterrows():
-                values.append([symbol, str(ind.date()), str(ind)] + [row[col] for col in DATA_COLUMNS])
-            columns = ','.join(DATA_COLUMNS)
-            marks = ','.join(['?' for _ in DATA_COLUMNS])
-            db.executemany(
-                (
-                    f'INSERT INTO chart (symbol, date, time, {columns})'
-                    f'VALUES (?, ?, ?, {marks}) ON CONFLICT (symbol, time) DO NOTHING'
-                ),
-                values,
-            )
-            time_range.merge(start_time, end_time)
-            db.execute(
-                (
-                    'INSERT INTO time_range (symbol, time_range) VALUES (?, ?)'
-                    'ON CONFLICT (symbol) DO UPDATE SET time_range = ?'
-                ),
-                [symbol, time_range.to_string(), time_range.to_string()],
-            )
-            db.commit()
-            return df
+        return self.get_data_batch([symbol], start_time, end_time, time_interval)[symbol]
+
+    def get_data_batch(
+        self, symbols: List[str], start_time: pd.Timestamp, end_time: pd.Timestamp, time_interval: TimeInterval
+    ) -> Dict[str, pd.DataFrame]:
+        """Loads data of multiple symbols with specified start and end time.
+
+        start_time and end_time are inclusive. Only the days not covered by the cache are
+        loaded from the underlying data client, with one batch call per missing date range.
+        Days of today are never marked as covered since their bars may still change.
+        """
+        time_ranges = {}
+        gap_symbols = collections.defaultdict(list)
+        for symbol in symbols:
+            time_range = self._get_time_range(symbol, time_interval)
+            gaps = time_range.gaps(start_time, end_time)
+            if gaps:
+                time_ranges[symbol] = time_range
+                for gap in gaps:
+                    gap_symbols[gap].append(symbol)
+            else:
+                self.cache_hit += 1
+        today = get_today().date()
+        for (gap_start, gap_end), group in gap_symbols.items():
+            fetch_start = pd.Timestamp(gap_start).tz_localize(TIME_ZONE)
+            fetch_end = pd.Timestamp(gap_end).tz_localize(TIME_ZONE) + datetime.timedelta(days=1, seconds=-1)
+            fetched = self._data_client.get_data_batch(group, fetch_start, fetch_end, time_interval)
+            covered_end = min(gap_end, today - datetime.timedelta(days=1))
+            for symbol, df in fetched.items():
+                time_range = time_ranges[symbol]
+                if gap_start <= covered_end:
+                    time_range.merge(gap_start, covered_end)
+                self._write_bars(symbol, df, time_range, time_interval)
+        if gap_symbols:
+            self._get_db(time_interval).commit()
+        return {symbol: self._read_bars(symbol, start_time, end_time, time_interval) for symbol in symbols}
 
     def get_last_trades(self, symbols: List[str]) -> Dict[str, float]:
         return self._data_client.get_last_trades(symbols)
 
 
+def _to_epoch(t: pd.Timestamp) -> int:
+    if not t.tzinfo:
+        t = t.tz_localize(TIME_ZONE)
+    return int(t.timestamp())
+
+
+def _to_date(t: Union[pd.Timestamp, datetime.date]) -> datetime.date:
+    return t.date() if isinstance(t, datetime.datetime) else t
+
+
 class TimeRange:
+    """Sorted and disjoint date intervals, both ends inclusive."""
+
     def __init__(self, intervals: List[Tuple[datetime.date, datetime.date]]):
-        self.intervals = intervals
+        self.intervals = sorted(intervals)
 
-    @classmethod
-    def from_string(cls, s: str):
-        s = s.strip()
-        if not s:
-            return cls([])
-        interval_strs = s.split(';')
-        intervals = []
-        for interval_str in interval_strs:
-            s, e = interval_str.split(',')
-            interval = (pd.Timestamp(s).date(), pd.Timestamp(e).date())
-            intervals.append(interval)
-        return cls(intervals)
-
-    def to_string(self):
-        interval_strs = []
-        for interval in self.intervals:
-            interval_str = f'{interval[0]},{interval[1]}'
-            interval_strs.append(interval_str)
-        return ';'.join(interval_strs)
+    def include(self, start_time: pd.Timestamp, end_time: pd.Timestamp) -> bool:
+        return not self.gaps(start_time, end_time)
 
-    def include(self, start_time: pd.Timestamp, end_time: pd.Timestamp):
-        start_date = start_time.date()
-        end_date = end_time.date()
+    def gaps(self, start_time: pd.Timestamp, end_time: pd.Timestamp) -> List[Tuple[datetime.date, datetime.date]]:
+        """Gets the date intervals between start_time and end_time that are not covered."""
+        one_day = datetime.timedelta(days=1)
+        cursor, end_date = _to_date(start_time), _to_date(end_time)
+        gaps = []
         for interval_start, interval_end in self.intervals:
-            if start_date >= interval_start and end_date <= interval_end:
-                return True
-        return False
-
-    def merge(self, start_time: pd.Timestamp, end_time: pd.Timestamp):
-        self.intervals.append((start_time.date(), end_time.date()))
+            if interval_start > end_date:
+                break
+            if interval_end < cursor:
+                continue
+            if interval_start > cursor:
+                gaps.append((cursor, interval_start - one_day))
+            cursor = interval_end + one_day
+        if cursor <= end_date:
+            gaps.append((cursor, end_date))
+        return gaps
+
+    def merge(self, start_time: Union[pd.Timestamp, datetime.date], end_time: Union[pd.Timestamp, datetime.date]):
+        self.intervals.append((_to_date(start_time), _to_date(end_time)))
         self.intervals.sort()
         intervals = []
         for interval in self.intervals:
-            if intervals and intervals[-1][1] >= interval[0]:
-                intervals[-1] = (intervals[-1][0], interval[1])
+            if intervals and intervals[-1][1] + datetime.timedelta(days=1) >= interval[0]:
+                intervals[-1] = (intervals[-1][0], max(intervals[-1][1], interval[1]))
             else:
                 intervals.append(interval)
         self.intervals = intervals
 
 
 def get_db_file(time_interval: TimeInterval):
-    db_file = os.path.join(CACHE_DIR, str(time_interval), 'data.db')
+    db_file = os.path.join(CACHE_DIR, str(time_interval), 'bars.db')
     os.makedirs(os.path.dirname(db_file), exist_ok=True)
     return db_file
 
@@ -125,7 +174,8 @@ def init_db() -> Dict[TimeInterval, sqlite3.Connection]:
     db = {}
     for time_interval in TimeInterval:
         db_file = get_db_file(time_interval)
-        conn = sqlite3.connect(db_file)
+        conn = sqlite3.connect(db_file, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
         conn.executescript(init_script)
         db[time_interval] = conn
     return db
@@ -1,20 +1,20 @@
-CREATE TABLE IF NOT EXISTS time_range (
-    symbol TEXT PRIMARY KEY,
-    time_range TEXT
-);
+-- Date intervals each symbol has complete bars for, as date ordinals, both ends inclusive.
+CREATE TABLE IF NOT EXISTS coverage (
+    symbol TEXT NOT NULL,
+    start_day INTEGER NOT NULL,
+    end_day INTEGER NOT NULL,
+    PRIMARY KEY (symbol, start_day)
+) WITHOUT ROWID;
 
-CREATE TABLE IF NOT EXISTS chart (
-    symbol TEXT,
-    date TEXT,
-    time TEXT,
+-- Bars are clustered by (symbol, time), so a symbol and time range query
+-- is a single range scan of the primary key without table lookups.
+CREATE TABLE IF NOT EXISTS bars (
+    symbol TEXT NOT NULL,
+    time INTEGER NOT NULL,
     open REAL,
     high REAL,
     low REAL,
     close REAL,
     volume INTEGER,
-    UNIQUE (symbol, time)
-);
-
-CREATE INDEX IF NOT EXISTS idx_chart_symbol ON chart (symbol);
-CREATE INDEX IF NOT EXISTS idx_chart_date ON chart (date);
-CREATE INDEX IF NOT EXISTS idx_chart_symbol_date ON chart (symbol, date);
+    PRIMARY KEY (symbol, time)
+) WITHOUT ROWID;
@@ -1,15 +1,15 @@
-import collections
-import contextlib
+import asyncio
+import multiprocessing
 import os
 import threading
 import time
 from datetime import timedelta
-from typing import Dict, List, Optional
+from operator import itemgetter
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple, TypeVar
 
+import aiohttp
 import numpy as np
 import pandas as pd
-import requests
-import retrying
 
 from alpharius.utils import TIME_ZONE
 
@@ -17,43 +17,259 @@ from .base import DATA_COLUMNS, DataClient, TimeInterval
 
 _FMP_API_KEY_ENV = 'FMP_API_KEY'
 _BASE_URL = 'https://financialmodelingprep.com/'
+_MAX_CALLS = 700
+_PERIOD = 60
+_BURST = 50
+_MAX_CONCURRENCY = 16
+_MAX_ATTEMPTS = 3
+_TIMEOUT_SECONDS = 30
 
+T = TypeVar('T')
+
+
+class AsyncTokenBucket:
+    """Token bucket rate limiter for coroutines.
+
+    Tokens are refilled continuously at rate per second, up to capacity. A caller finding no
+    token left reserves the next one and sleeps until it is refilled, so no lock is held while
+    waiting and callers are served in arrival order. Any window of T seconds admits at most
+    capacity + rate * T calls.
+
+    Tokens are kept in shared memory, so processes forked after the bucket is created share
+    one budget.
+    """
+
+    def __init__(self, rate: float, capacity: int, clock: Callable[[], float] = time.monotonic) -> None:
+        self._rate = rate
+        self._capacity = capacity
+        self._clock = clock
+        self._lock = multiprocessing.Lock()
+        # Tokens left and the time they were updated
+        self._state = multiprocessing.RawArray('d', [float(capacity), clock()])
+
+    async def acquire(self) -> None:
+        with self._lock:
+            now = self._clock()
+            tokens = min(self._capacity, self._state[0] + (now - self._state[1]) * self._rate) - 1
+            self._state[0] = tokens
+            self._state[1] = now
+        if tokens < 0:
+            await asyncio.sleep(-tokens / self._rate)
+
+
+def _get_request(
+    symbol: str, start_time: pd.Timestamp, end_time: pd.Timestamp, time_interval: TimeInterval, now: pd.Timestamp
+) -> Tuple[str, Dict[str, str]]:
+    url = _BASE_URL
+    if time_interval == TimeInterval.FIVE_MIN:
+        if now - start_time > timedelta(days=60):
+            url += f'api/v3/historical-chart/5min/{symbol}'
+        else:
+            url += 'stable/historical-chart/5min'
+    elif time_interval == TimeInterval.HOUR:
+        url += 'stable/historical-chart/1hour'
+    elif time_interval == TimeInterval.DAY:
+        url += 'stable/historical-price-eod/full'
+    else:
+        raise ValueError(f'time_interval {time_interval} not supported')
+    params = {'symbol': symbol, 'from': start_time.strftime('%F'), 'to': end_time.strftime('%F'), 'extended': 'true'}
+    return url, params
+
+
+def _parse_bars(
+    response_json: Any, start_time: pd.Timestamp, end_time: pd.Timestamp, time_interval: TimeInterval
+) -> pd.DataFrame:
+    if isinstance(response_json, dict):
+        raw_bars = response_json.get('historical', [])
+    else:
+        raw_bars = response_json
+    count = len(raw_bars)
+    times = pd.to_datetime([b['date'] for b in raw_bars], format='ISO8601').tz_localize(TIME_ZONE)
+    if time_interval == TimeInterval.DAY:
+        selected = np.arange(count)
+    else:
+        selected = np.flatnonzero((times >= start_time) & (times <= end_time))
+    order = selected[np.argsort(times.asi8[selected], kind='stable')]
+    data = {
+        'Open': np.fromiter(map(itemgetter('open'), raw_bars), dtype=np.float32, count=count)[order],
+        'High': np.fromiter(map(itemgetter('high'), raw_bars), dtype=np.float32, count=count)[order],
+        'Low': np.fromiter(map(itemgetter('low'), raw_bars), dtype=np.float32, count=count)[order],
+        'Close': np.fromiter(map(itemgetter('close'), raw_bars), dtype=np.float32, count=count)[order],
+        'Volume': np.fromiter((b['volume'] or 0 for b in raw_bars), dtype=np.uint64, count=count)[order],
+    }
+    return pd.DataFrame(data, index=times[order], columns=DATA_COLUMNS, copy=False)
+
+
+def _localize(t: pd.Timestamp) -> pd.Timestamp:
+    return t if t.tzinfo else t.tz_localize(TIME_ZONE)
+
+
+# Shared by the clients of all processes forked from this one, which draw from the same API budget
+_rate_limiter = AsyncTokenBucket((_MAX_CALLS - _BURST) / _PERIOD, _BURST)
 
-class FmpClient(DataClient):
-    def __init__(self, api_key: Optional[str] = None) -> None:
-        """Instantiates an FMP Data Client.
+
+class AsyncFmpClient:
+    """FMP Data Client on asyncio.
+
+    Requests share a pool of keep-alive connections and are rate limited by a token bucket
+    within the 700 calls per minute budget of the API. The bucket is shared by all clients
+    of this process and of processes forked from it.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, max_concurrency: int = _MAX_CONCURRENCY) -> None:
+        """Instantiates an async FMP Data Client.
 
         Parameters:
             api_key: FMP API key.
+            max_concurrency: Maximum number of concurrent connections.
         """
         self._api_key = api_key or os.environ[_FMP_API_KEY_ENV]
-        self._call_history = collections.deque()
-        self._max_calls = 700
-        self._period = 60
-        self._lock = threading.RLock()
+        self._max_concurrency = max_concurrency
+        self._session = None
         self._now = pd.Timestamp.now().tz_localize(TIME_ZONE)
 
-    @contextlib.contextmanager
-    def rate_limit(self):
-        def remove_queue():
-            while self._call_history and self._call_history[0] < time.time() - self._period:
-                self._call_history.popleft()
+    async def _get_json(self, url: str, params: Dict[str, str]) -> Any:
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self._max_concurrency)
+            timeout = aiohttp.ClientTimeout(total=_TIMEOUT_SECONDS)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        params = dict(params, apikey=self._api_key)
+        for attempt in range(_MAX_ATTEMPTS):
+            await _rate_limiter.acquire()
+            try:
+                async with self._session.get(url, params=params) as response:
+                    response.raise_for_status()
+                    return await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == _MAX_ATTEMPTS - 1:
+                    raise
+                await asyncio.sleep(0.5 * 2**attempt)
 
+    async def get_data(
+        self, symbol: str, start_time: pd.Timestamp, end_time: pd.Timestamp, time_interval: TimeInterval
+    ) -> pd.DataFrame:
+        """Loads data with specified start and end time.
+
+        start_time and end_time are inclusive.
+        """
+        start_time, end_time = _localize(start_time), _localize(end_time)
+        url, params = _get_request(symbol, start_time, end_time, time_interval, self._now)
+        return _parse_bars(await self._get_json(url, params), start_time, end_time, time_interval)
+
+    async def get_data_batch(
+        self, symbols: List[str], start_time: pd.Timestamp, end_time: pd.Timestamp, time_interval: TimeInterval
+    ) -> Dict[str, pd.DataFrame]:
+        """Loads data of multiple symbols with specified start and end time.
+
+        start_time and end_time are inclusive.
+        """
+        results = await asyncio.gather(
+            *[self.get_data(symbol, start_time, end_time, time_interval) for symbol in symbols]
+        )
+        return dict(zip(symbols, results))
+
+    async def get_last_trades(self, symbols: List[str]) -> Dict[str, float]:
+        """Gets the last trade prices of a list of symbols."""
+        url = _BASE_URL + 'stable/batch-quote-short'
+        response_json = await self._get_json(url, {'symbols': ','.join(symbols)})
+        return {item['symbol']: item['price'] for item in response_json}
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_loop_lock = threading.Lock()
+# Event loop inherited from the parent process. Its selector is shared with the parent, so the
+# loop is never closed, which would unregister the wakeups of the parent's loop.
+_inherited_loop: Optional[asyncio.AbstractEventLoop] = None
+# Clients inherited from the parent process. Their connections share sockets and the selector
+# with the parent, so they are never finalized, which would close the parent's connections.
+_inherited_clients: List[AsyncFmpClient] = []
+
+
+def _start_loop_thread() -> None:
+    global _loop_thread
+    _loop_thread = threading.Thread(target=_loop.run_forever, name='fmp-event-loop', daemon=True)
+    _loop_thread.start()
+
+
+def _pause_event_loop() -> None:
+    """Stops the thread of the event loop before forking, as forking a multi-threaded process may deadlock.
+
+    Pending requests are kept in the loop and resume after forking.
+    """
+    _loop_lock.acquire()
+    if _loop_thread is not None and _loop_thread is not threading.current_thread():
+        _loop.call_soon_threadsafe(_loop.stop)
+        _loop_thread.join()
+
+
+def _resume_event_loop() -> None:
+    if _loop_thread is not None and not _loop_thread.is_alive():
+        _start_loop_thread()
+    _loop_lock.release()
+
+
+def _reset_event_loop() -> None:
+    global _loop, _loop_thread, _loop_lock, _inherited_loop
+    _inherited_loop = _loop
+    _loop = None
+    _loop_thread = None
+    _loop_lock = threading.Lock()
+
+
+os.register_at_fork(before=_pause_event_loop, after_in_parent=_resume_event_loop, after_in_child=_reset_event_loop)
+
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    """Gets the event loop running in a background thread of this process."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _start_loop_thread()
+        return _loop
+
+
+class FmpClient(DataClient):
+    """Synchronous facade of AsyncFmpClient.
+
+    Requests run on an event loop in a background thread, so concurrent callers share one
+    connection pool and rate limiter.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, max_concurrency: int = _MAX_CONCURRENCY) -> None:
+        """Instantiates an FMP Data Client.
+
+        Parameters:
+            api_key: FMP API key.
+            max_concurrency: Maximum number of concurrent connections.
+        """
+        self._api_key = api_key or os.environ[_FMP_API_KEY_ENV]
+        self._max_concurrency = max_concurrency
+        self._lock = threading.Lock()
+        self._pid = None
+        self._async_client = None
+
+    @property
+    def async_client(self) -> AsyncFmpClient:
         with self._lock:
-            remove_queue()
-            while len(self._call_history) >= self._max_calls:
-                wait_time = max(self._call_history[0] + 60 - time.time(), 0)
-                time.sleep(wait_time)
-                remove_queue()
-        yield
-        with self._lock:
-            self._call_history.append(time.time())
+            # The client is bound to the event loop of the process that created it
+            if self._pid != os.getpid():
+                if self._async_client is not None:
+                    _inherited_clients.append(self._async_client)
+                self._async_client = AsyncFmpClient(self._api_key, self._max_concurrency)
+                self._pid = os.getpid()
+            return self._async_client
+
+    def run(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        """Runs a coroutine on the background event loop and waits for its result."""
+        return asyncio.run_coroutine_threadsafe(coroutine, _get_event_loop()).result()
 
-    @retrying.retry(
-        stop_max_attempt_number=3,
-        wait_exponential_multiplier=500,
-        retry_on_exception=lambda e: isinstance(e, requests.HTTPError),
-    )
     def get_data(
         self, symbol: str, start_time: pd.Timestamp, end_time: pd.Timestamp, time_interval: TimeInterval
     ) -> pd.DataFrame:
@@ -61,65 +277,22 @@ class FmpClient(DataClient):
 
         start_time and end_time are inclusive.
         """
-        if not start_time.tzinfo:
-            start_time = start_time.tz_localize(TIME_ZONE)
-        if not end_time.tzinfo:
-            end_time = end_time.tz_localize(TIME_ZONE)
-        url = _BASE_URL
-        if time_interval == TimeInterval.FIVE_MIN:
-            if self._now - start_time > timedelta(days=60):
-                url += f'api/v3/historical-chart/5min/{symbol}'
-            else:
-                url += 'stable/historical-chart/5min'
-        elif time_interval == TimeInterval.HOUR:
-            url += 'stable/historical-chart/1hour'
-        elif time_interval == TimeInterval.DAY:
-            url += 'stable/historical-price-eod/full'
-        else:
-            raise ValueError(f'time_interval {time_interval} not supported')
-        start = start_time.strftime('%F')
-        end = end_time.strftime('%F')
-        params = {'symbol': symbol, 'from': start, 'to': end, 'apikey': self._api_key, 'extended': 'true'}
-        with self.rate_limit():
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-        response_json = response.json()
-        if isinstance(response_json, dict):
-            raw_bars = response_json.get('historical', [])
-        else:
-            raw_bars = response_json
-        bars = []
-        for bar in raw_bars:
-            t = pd.Timestamp(bar['date']).tz_localize(TIME_ZONE)
-            if time_interval == time_interval.DAY or start_time <= t <= end_time:
-                bars.append(bar)
-        bars.sort(key=lambda b: b['date'])
-        index = pd.DatetimeIndex([pd.Timestamp(b['date']).tz_localize(TIME_ZONE) for b in bars])
-        data = [
-            [
-                np.float32(b['open']),
-                np.float32(b['high']),
-                np.float32(b['low']),
-                np.float32(b['close']),
-                np.uint64(b['volume'] or 0),
-            ]
-            for b in bars
-        ]
-        return pd.DataFrame(data, index=index, columns=DATA_COLUMNS)
-
-    @retrying.retry(
-        stop_max_attempt_number=3,
-        wait_exponential_multiplier=500,
-        retry_on_exception=lambda e: isinstance(e, requests.HTTPError),
-    )
+        return self.run(self.async_client.get_data(symbol, start_time, end_time, time_interval))
+
+    def get_data_batch(
+        self, symbols: List[str], start_time: pd.Timestamp, end_time: pd.Timestamp, time_interval: TimeInterval
+    ) -> Dict[str, pd.DataFrame]:
+        """Loads data of multiple symbols with specified start and end time.
+
+        start_time and end_time are inclusive. All requests are in flight together on the
+        event loop, bounded only by the connection pool and the rate limiter.
+        """
+        return self.run(self.async_client.get_data_batch(symbols, start_time, end_time, time_interval))
+
     def get_last_trades(self, symbols: List[str]) -> Dict[str, float]:
         """Gets the last trade prices of a list of symbols."""
-        url = _BASE_URL + 'stable/batch-quote-short'
-        params = {'symbols': ','.join(symbols), 'apikey': self._api_key}
-        with self.rate_limit():
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-        res = {}
-        for item in response.json():
-            res[item['symbol']] = item['price']
-        return res
+        return self.run(self.async_client.get_last_trades(symbols))
+
+    def close(self) -> None:
+        if self._async_client is not None and self._pid == os.getpid():
+            self.run(self._async_client.close())
@@ -0,0 +1,140 @@
+import threading
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from alpharius.utils import TIME_ZONE
+
+
+class InterdayPanel:
+    """Interday bars of many symbols as arrays shaped dates × symbols.
+
+    Dates are all dates any symbol has a bar on, i.e. the market calendar. Cells of symbols
+    without a bar on a date are NaN. Besides values, the panel knows the position of each bar
+    in its symbol's own frame, so windows over a symbol's latest bars can be expressed on the
+    panel as well.
+
+    Arrays are built on first use and cached. Derived features are cached by name, so universes
+    sharing a panel compute each of them once.
+    """
+
+    def __init__(self, frames: Dict[str, pd.DataFrame]) -> None:
+        self._frames = frames
+        self.symbols: List[str] = [symbol for symbol, df in frames.items() if len(df)]
+        lengths = np.array([len(frames[symbol]) for symbol in self.symbols], dtype=np.int64)
+        times = (
+            np.concatenate([frames[symbol].index.as_unit('ns').asi8 for symbol in self.symbols])
+            if self.symbols
+            else np.empty(0, dtype=np.int64)
+        )
+        date_values, self._date_codes = np.unique(times, return_inverse=True)
+        self.dates = pd.DatetimeIndex(date_values.view('M8[ns]')).tz_localize('UTC').tz_convert(TIME_ZONE)
+        self._symbol_codes = np.repeat(np.arange(len(self.symbols)), lengths)
+        # Start of each symbol's bars in arrays of all bars
+        self._starts = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+        self._lengths = lengths
+        self._symbol_indices = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._cache: Dict[str, np.ndarray] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def frames(self) -> Dict[str, pd.DataFrame]:
+        return self._frames
+
+    @property
+    def shape(self) -> tuple:
+        return len(self.dates), len(self.symbols)
+
+    def get_date_index(self, t: pd.Timestamp) -> Optional[int]:
+        i = self.dates.searchsorted(t)
+        if i < len(self.dates) and self.dates[i] == t:
+            return int(i)
+        return None
+
+    def get_symbol_index(self, symbol: str) -> Optional[int]:
+        return self._symbol_indices.get(symbol)
+
+    def _cached(self, key: str, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = compute()
+            return self._cache[key]
+
+    def values(self, column: str) -> np.ndarray:
+        """Gets values of a column of all bars, ordered by symbol and then time."""
+        return self._cached(
+            'values:' + column,
+            lambda: (
+                np.concatenate([self._frames[symbol][column].to_numpy(np.float64) for symbol in self.symbols])
+                if self.symbols
+                else np.empty(0)
+            ),
+        )
+
+    def positions(self) -> np.ndarray:
+        """Gets the position of all bars in their symbol's own frame."""
+        return self._cached(
+            'positions', lambda: np.arange(len(self._symbol_codes)) - np.repeat(self._starts, self._lengths)
+        )
+
+    def _rolling(
+        self,
+        values: np.ndarray,
+        window: int,
+        first_row: int,
+        combine: Callable[[np.ndarray, np.ndarray], np.ndarray],
+        initial: float,
+    ) -> np.ndarray:
+        positions = self.positions()
+        res = np.where(positions >= first_row, values, initial)
+        shifted = np.empty_like(values)
+        for offset in range(1, window):
+            shifted[:offset] = initial
+            shifted[offset:] = values[:-offset]
+            res = combine(res, np.where(positions - offset >= first_row, shifted, initial))
+        return res
+
+    def rolling_mean(self, values: np.ndarray, window: int, first_row: int = 0) -> np.ndarray:
+        """Averages values of all bars over the latest window bars of each symbol.
+
+        Bars before position first_row of their symbol's frame are left out. Bars without any
+        bar to average over get 0.
+        """
+        sums = self._rolling(values, window, first_row, np.add, 0.0)
+        counts = np.clip(self.positions() - first_row + 1, 0, window)
+        return np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+
+    def rolling_max(self, values: np.ndarray, window: int) -> np.ndarray:
+        """Takes the maximum of values of all bars over the latest window bars of each symbol."""
+        return self._rolling(values, window, 0, np.fmax, np.nan)
+
+    def to_panel(self, values: np.ndarray, fill_value: float = np.nan) -> np.ndarray:
+        """Places values of all bars, ordered by symbol and then time, into a dates × symbols array."""
+        panel = np.full(self.shape, fill_value, dtype=values.dtype)
+        panel[self._date_codes, self._symbol_codes] = values
+        return panel
+
+    def field(self, column: str) -> np.ndarray:
+        """Gets a column as a dates × symbols array, NaN where a symbol has no bar."""
+        return self._cached('field:' + column, lambda: self.to_panel(self.values(column)))
+
+    def rows(self) -> np.ndarray:
+        """Gets the position of bars in their symbol's own frame as a dates × symbols array, -1 where no bar."""
+        return self._cached('rows', lambda: self.to_panel(self.positions(), fill_value=-1))
+
+    def previous(self, column: str) -> np.ndarray:
+        """Gets a column of the previous bar of each symbol as a dates × symbols array."""
+
+        def compute() -> np.ndarray:
+            values = self.values(column)
+            previous = np.empty_like(values)
+            previous[1:] = values[:-1]
+            previous[self._starts] = np.nan
+            return self.to_panel(previous)
+
+        return self._cached('previous:' + column, compute)
+
+    def feature(self, name: str, compute: Callable[['InterdayPanel'], np.ndarray]) -> np.ndarray:
+        """Gets a dates × symbols feature, computed by compute on first use."""
+        return self._cached('feature:' + name, lambda: compute(self))
@@ -0,0 +1,77 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from alpharius.utils import TIME_ZONE
+
+from .base import DATA_COLUMNS
+
+# 5-minute bars from pre-market open at 4:00 to after-hours close at 20:00
+INTRADAY_CAPACITY = 192
+
+_DTYPES = {'Open': np.float32, 'High': np.float32, 'Low': np.float32, 'Close': np.float32, 'Volume': np.uint64}
+
+
+class IntradayBuffer:
+    """5-minute bars of one symbol for a day, kept in arrays allocated once.
+
+    Only the latest capacity bars are kept. frame() gives a DataFrame viewing the arrays without
+    copying them. The view reflects later changes to the close of the last bar. It is not to be
+    kept once bars are updated or appended, as their arrays are then overwritten.
+    """
+
+    def __init__(self, capacity: int = INTRADAY_CAPACITY) -> None:
+        self._capacity = capacity
+        self._times = np.empty(capacity, dtype=np.int64)
+        self._columns = {column: np.empty(capacity, dtype=_DTYPES[column]) for column in DATA_COLUMNS}
+        self._size = 0
+        self._frame = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def update(self, df: pd.DataFrame) -> None:
+        """Replaces the bars with the latest capacity bars of df."""
+        size = min(len(df), self._capacity)
+        if size:
+            self._times[:size] = df.index.as_unit('ns').asi8[-size:]
+            for column, values in self._columns.items():
+                values[:size] = df[column].to_numpy()[-size:]
+        self._size = size
+        self._frame = None
+
+    def append(self, t: pd.Timestamp, open_price: float, high: float, low: float, close: float, volume: int) -> None:
+        if self._size == self._capacity:
+            # Drop the oldest bar, so the bars stay contiguous for views
+            self._times[:-1] = self._times[1:]
+            for values in self._columns.values():
+                values[:-1] = values[1:]
+            self._size -= 1
+        i = self._size
+        self._times[i] = t.as_unit('ns').value
+        for column, value in zip(DATA_COLUMNS, [open_price, high, low, close, volume]):
+            self._columns[column][i] = value
+        self._size += 1
+        self._frame = None
+
+    def set_close(self, price: float) -> None:
+        """Sets the close of the last bar."""
+        self._columns['Close'][self._size - 1] = price
+
+    def last_time(self) -> Optional[pd.Timestamp]:
+        if not self._size:
+            return None
+        return pd.Timestamp(int(self._times[self._size - 1]), unit='ns', tz='UTC').tz_convert(TIME_ZONE)
+
+    def frame(self) -> pd.DataFrame:
+        if self._frame is None:
+            size = self._size
+            index = pd.DatetimeIndex(self._times[:size].view('M8[ns]')).tz_localize('UTC').tz_convert(TIME_ZONE)
+            self._frame = pd.DataFrame(
+                {column: values[:size] for column, values in self._columns.items()},
+                index=index,
+                columns=DATA_COLUMNS,
+                copy=False,
+            )
+        return self._frame
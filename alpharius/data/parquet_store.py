@@ -0,0 +1,278 @@
+import collections
+import datetime
+import functools
+import glob
+import itertools
+import json
+import os
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+    ds = None
+
+from alpharius.utils import TIME_ZONE
+
+from .bar_store import BarStore, get_bar_store
+from .base import CACHE_DIR, DATA_COLUMNS, TimeInterval
+
+PARQUET_DATASET_DIR_ENV = 'PARQUET_DATASET_DIR'
+_COVERAGE_FILE = '_coverage.json'
+_PARTITION_FORMATS = {TimeInterval.FIVE_MIN: '%Y-%m-%d', TimeInterval.HOUR: '%Y-%m-%d', TimeInterval.DAY: '%Y'}
+
+
+class ParquetStore:
+    """Bars stored as a zstd-compressed Parquet dataset.
+
+    The dataset is hive-partitioned by interval and date, e.g. interval=FIVE_MIN/date=2024-03-04.
+    Daily bars are partitioned by year instead, e.g. interval=DAY/date=2024. Reads prune partitions
+    by date and push filters on symbol and time down to the Parquet row groups, so only the rows
+    needed are decoded.
+
+    The coverage of symbols, i.e. the date range their bars are complete for, is kept in
+    _coverage.json next to the partitions.
+    """
+
+    def __init__(self, root_dir: str) -> None:
+        if pa is None:
+            raise ImportError('pyarrow is required for ParquetStore')
+        self._root_dir = root_dir
+        self._lock = threading.Lock()
+        self._coverage = None
+        self._dataset = None
+        self._partitioning = ds.partitioning(
+            pa.schema([('interval', pa.string()), ('date', pa.string())]), flavor='hive'
+        )
+        self._schema = pa.schema(
+            [
+                ('symbol', pa.string()),
+                ('time', pa.timestamp('ns', tz='UTC')),
+                ('Open', pa.float32()),
+                ('High', pa.float32()),
+                ('Low', pa.float32()),
+                ('Close', pa.float32()),
+                ('Volume', pa.uint64()),
+                ('interval', pa.string()),
+                ('date', pa.string()),
+            ]
+        )
+
+    def _load_coverage(self) -> Dict[str, Dict[str, Tuple[datetime.date, datetime.date]]]:
+        if self._coverage is None:
+            coverage = {}
+            coverage_file = os.path.join(self._root_dir, _COVERAGE_FILE)
+            if os.path.isfile(coverage_file):
+                with open(coverage_file, 'r') as f:
+                    for interval, symbols in json.load(f).items():
+                        coverage[interval] = {
+                            symbol: (datetime.date.fromisoformat(start), datetime.date.fromisoformat(end))
+                            for symbol, (start, end) in symbols.items()
+                        }
+            self._coverage = coverage
+        return self._coverage
+
+    def get_coverage(self, time_interval: TimeInterval) -> Dict[str, Tuple[datetime.date, datetime.date]]:
+        """Gets the inclusive date range that bars of each symbol are complete for."""
+        with self._lock:
+            return dict(self._load_coverage().get(str(time_interval), {}))
+
+    def write(
+        self,
+        frames: Dict[str, pd.DataFrame],
+        time_interval: TimeInterval,
+        coverage: Optional[Dict[str, Tuple[datetime.date, datetime.date]]] = None,
+    ) -> None:
+        """Stores bars of symbols.
+
+        Partitions touched by the bars are rewritten as a whole. Bars of the same symbols in them
+        are replaced, while rows of other symbols are carried over.
+
+        Parameters:
+            frames: Bars of each symbol.
+            time_interval: Time interval of the bars.
+            coverage: Inclusive date range each symbol's bars are complete for.
+        """
+        frames = {symbol: df for symbol, df in frames.items() if len(df)}
+        with self._lock:
+            if frames:
+                self._write_frames(frames, time_interval)
+            if coverage:
+                all_coverage = self._load_coverage()
+                all_coverage.setdefault(str(time_interval), {}).update(coverage)
+                os.makedirs(self._root_dir, exist_ok=True)
+                coverage_file = os.path.join(self._root_dir, _COVERAGE_FILE)
+                # Replaced atomically, so readers never see a partial file
+                tmp_file = f'{coverage_file}.{os.getpid()}.{threading.get_ident()}'
+                with open(tmp_file, 'w') as f:
+                    json.dump(
+                        {
+                            interval: {
+                                symbol: [start.isoformat(), end.isoformat()] for symbol, (start, end) in s.items()
+                            }
+                            for interval, s in all_coverage.items()
+                        },
+                        f,
+                    )
+                os.replace(tmp_file, coverage_file)
+
+    def _write_frames(self, frames: Dict[str, pd.DataFrame], time_interval: TimeInterval) -> None:
+        nanoseconds = np.concatenate([df.index.as_unit('ns').asi8 for df in frames.values()])
+        times = pd.DatetimeIndex(nanoseconds.view('M8[ns]')).tz_localize('UTC')
+        day_codes, days = pd.factorize(times.tz_convert(TIME_ZONE).normalize())
+        partitions = np.asarray(days.strftime(_PARTITION_FORMATS[time_interval]))
+        columns = {
+            'symbol': np.repeat(list(frames.keys()), [len(df) for df in frames.values()]),
+            'time': times,
+            'interval': np.full(len(times), str(time_interval)),
+            'date': partitions[day_codes],
+        }
+        for column in DATA_COLUMNS:
+            columns[column] = np.concatenate([df[column].to_numpy() for df in frames.values()])
+        table = pa.Table.from_pandas(pd.DataFrame(columns), schema=self._schema, preserve_index=False)
+        if os.path.isdir(self._root_dir):
+            dataset = ds.dataset(self._root_dir, schema=self._schema, format='parquet', partitioning=self._partitioning)
+            existing = dataset.to_table(
+                columns=self._schema.names,
+                filter=(
+                    (ds.field('interval') == str(time_interval))
+                    & ds.field('date').isin(sorted(set(partitions)))
+                    & ~ds.field('symbol').isin(list(frames))
+                ),
+            )
+            table = pa.concat_tables([existing, table])
+        ds.write_dataset(
+            table,
+            self._root_dir,
+            format='parquet',
+            partitioning=self._partitioning,
+            file_options=ds.ParquetFileFormat().make_write_options(compression='zstd'),
+            existing_data_behavior='delete_matching',
+        )
+        self._dataset = None
+
+    def read(
+        self,
+        symbols: Iterable[str],
+        start_time: pd.Timestamp,
+        end_time: pd.Timestamp,
+        time_interval: TimeInterval,
+    ) -> Dict[str, pd.DataFrame]:
+        """Reads bars of symbols between start_time and end_time, both inclusive.
+
+        Symbols without bars in the range are absent in the result.
+        """
+        if not os.path.isdir(self._root_dir):
+            return {}
+        if not start_time.tzinfo:
+            start_time = start_time.tz_localize(TIME_ZONE)
+        if not end_time.tzinfo:
+            end_time = end_time.tz_localize(TIME_ZONE)
+        partition_format = _PARTITION_FORMATS[time_interval]
+        time_type = pa.timestamp('ns', tz='UTC')
+        with self._lock:
+            if self._dataset is None:
+                # Discovering files is costly for datasets with many partitions, so it is done once
+                self._dataset = ds.dataset(self._root_dir, format='parquet', partitioning=self._partitioning)
+            dataset = self._dataset
+        table = dataset.to_table(
+            columns=['symbol', 'time'] + DATA_COLUMNS,
+            filter=(
+                (ds.field('interval') == str(time_interval))
+                & (ds.field('date') >= start_time.strftime(partition_format))
+                & (ds.field('date') <= end_time.strftime(partition_format))
+                & ds.field('symbol').isin(list(symbols))
+                & (ds.field('time') >= pa.scalar(start_time.tz_convert('UTC'), type=time_type))
+                & (ds.field('time') <= pa.scalar(end_time.tz_convert('UTC'), type=time_type))
+            ),
+        )
+        table = table.sort_by([('symbol', 'ascending'), ('time', 'ascending')])
+        table_symbols = table.column('symbol').to_numpy(zero_copy_only=False)
+        times = pd.DatetimeIndex(table.column('time').to_numpy()).tz_localize('UTC').tz_convert(TIME_ZONE)
+        values = {column: table.column(column).to_numpy() for column in DATA_COLUMNS}
+        res = {}
+        unique_symbols, starts = np.unique(table_symbols, return_index=True)
+        bounds = list(starts) + [len(table_symbols)]
+        for i, symbol in enumerate(unique_symbols):
+            rows = slice(bounds[i], bounds[i + 1])
+            res[symbol] = pd.DataFrame(
+                {column: values[column][rows] for column in DATA_COLUMNS},
+                index=times[rows],
+                columns=DATA_COLUMNS,
+            )
+        return res
+
+
+@functools.lru_cache(maxsize=None)
+def _get_parquet_store(root_dir: str) -> ParquetStore:
+    return ParquetStore(root_dir)
+
+
+def get_parquet_store() -> Optional[ParquetStore]:
+    """Gets the Parquet dataset configured by environment variable PARQUET_DATASET_DIR.
+
+    Returns None if it is not configured or pyarrow is not installed.
+    """
+    root_dir = os.environ.get(PARQUET_DATASET_DIR_ENV)
+    if not root_dir or pa is None:
+        return None
+    return _get_parquet_store(root_dir)
+
+
+def export_to_parquet(parquet_store: ParquetStore, bar_store: Optional[BarStore] = None) -> None:
+    """Exports daily bars in the bar store and cached 5-minute bars to a Parquet dataset.
+
+    5-minute bars are written a month at a time, so partitions of a month are written together.
+    """
+    bar_store = bar_store or get_bar_store(TimeInterval.DAY)
+    frames, coverage = {}, {}
+    for symbol in bar_store.symbols():
+        frames[symbol] = bar_store.read(symbol)
+        coverage[symbol] = bar_store.get_coverage(symbol)
+    parquet_store.write(frames, TimeInterval.DAY, coverage)
+    day_dirs = sorted(glob.glob(os.path.join(CACHE_DIR, str(TimeInterval.FIVE_MIN), '????-??-??')))
+    for _, month_dirs in itertools.groupby(day_dirs, key=lambda day_dir: os.path.basename(day_dir)[:7]):
+        symbol_frames = collections.defaultdict(list)
+        for day_dir in month_dirs:
+            for cache_file in glob.glob(os.path.join(day_dir, 'history_*.pickle')):
+                symbol = os.path.basename(cache_file)[len('history_') : -len('.pickle')]
+                symbol_frames[symbol].append(pd.read_pickle(cache_file))
+        parquet_store.write({symbol: pd.concat(dfs) for symbol, dfs in symbol_frames.items()}, TimeInterval.FIVE_MIN)
+
+
+def import_from_parquet(
+    parquet_store: ParquetStore,
+    bar_store: Optional[BarStore] = None,
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
+) -> None:
+    """Imports daily bars with known coverage from a Parquet dataset into the bar store.
+
+    Parameters:
+        parquet_store: Parquet dataset to import from.
+        bar_store: Bar store to import into. The bar store of daily bars by default.
+        start_date: First date to import. Coverages are imported from their start by default.
+        end_date: Last date to import, inclusive. Coverages are imported to their end by default.
+    """
+    bar_store = bar_store or get_bar_store(TimeInterval.DAY)
+    coverage = {}
+    for symbol, (start, end) in parquet_store.get_coverage(TimeInterval.DAY).items():
+        start, end = max(start, start_date or start), min(end, end_date or end)
+        if start <= end:
+            coverage[symbol] = (start, end)
+    if not coverage:
+        return
+    start = pd.Timestamp(min(start for start, _ in coverage.values()))
+    end = pd.Timestamp(max(end for _, end in coverage.values())) + datetime.timedelta(days=1, seconds=-1)
+    frames = parquet_store.read(coverage.keys(), start, end, TimeInterval.DAY)
+    for symbol, df in frames.items():
+        # Bars outside the coverage of a symbol are read along with other symbols
+        symbol_start, symbol_end = coverage[symbol]
+        frames[symbol] = df[(df.index.date >= symbol_start) & (df.index.date <= symbol_end)]
+    bar_store.write(frames, {symbol: coverage[symbol] for symbol in frames})
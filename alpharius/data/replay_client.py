@@ -0,0 +1,146 @@
+import datetime
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from alpharius.utils import TIME_ZONE
+
+from .base import DATA_COLUMNS, DataClient, TimeInterval, get_day_range
+
+
+class SimulatedClock:
+    """Clock for replaying a historical day, a drop-in for the time module.
+
+    Time elapses in real time from start, while waiting in sleep() is accelerated by speed.
+    With speed None, sleep() returns immediately and only moves the clock forward, so time
+    spent on actual work is still accounted for. Only sleeps in the thread that created the
+    clock move it forward; sleeps in other threads wait the accelerated duration.
+    """
+
+    def __init__(self, start: pd.Timestamp, speed: Optional[float] = None) -> None:
+        """Instantiates a simulated clock.
+
+        Parameters:
+            start: Simulated time at creation.
+            speed: Acceleration of waits. None to skip waits entirely.
+        """
+        if not start.tzinfo:
+            start = start.tz_localize(TIME_ZONE)
+        self._start = start.timestamp()
+        self._speed = speed
+        self._real_start = time.perf_counter()
+        self._skipped = 0.0
+        self._lock = threading.Lock()
+        self._thread_id = threading.get_ident()
+
+    def time(self) -> float:
+        """Gets the simulated time in seconds since the epoch."""
+        return self._start + self._skipped + time.perf_counter() - self._real_start
+
+    def now(self) -> pd.Timestamp:
+        return pd.to_datetime(self.time(), utc=True, unit='s').tz_convert(TIME_ZONE)
+
+    def sleep(self, seconds: float) -> None:
+        real_seconds = seconds / self._speed if self._speed else 0
+        if real_seconds > 0:
+            time.sleep(real_seconds)
+        if threading.get_ident() == self._thread_id:
+            with self._lock:
+                self._skipped += seconds - real_seconds
+
+
+class ReplayDataClient(DataClient):
+    """Data client serving recorded bars of a historical day as if it were today.
+
+    5-minute bars of the replay day are fetched from the source client once per symbol and
+    served up to the time of the clock, i.e. a bar is visible once it has started. A bar in
+    progress carries its final values, as recordings have no finer resolution. The last trade
+    price is the close of the latest visible bar. Bars before the replay day are passed through
+    from the source client; other intervals never include the replay day.
+    """
+
+    def __init__(self, source: DataClient, day: pd.Timestamp, clock: SimulatedClock) -> None:
+        """Instantiates a replay data client.
+
+        Parameters:
+            source: Data client to load recorded bars from.
+            day: The day to replay.
+            clock: Clock of the replay.
+        """
+        self._source = source
+        self._day_start, self._day_end = get_day_range(day)
+        self._clock = clock
+        self._recorded: Dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def day_start(self) -> pd.Timestamp:
+        """Start of the replay day, from which on only recorded 5-minute bars are served."""
+        return self._day_start
+
+    def load(self, symbols: Iterable[str]) -> None:
+        """Loads the recorded 5-minute bars of symbols, so serving them incurs no fetch."""
+        with self._lock:
+            missing = [symbol for symbol in set(symbols) if symbol not in self._recorded]
+            if missing:
+                fetched = self._source.get_data_batch(missing, self._day_start, self._day_end, TimeInterval.FIVE_MIN)
+                for symbol in missing:
+                    self._recorded[symbol] = fetched.get(symbol, pd.DataFrame(columns=DATA_COLUMNS))
+
+    def get_data(
+        self, symbol: str, start_time: pd.Timestamp, end_time: pd.Timestamp, time_interval: TimeInterval
+    ) -> pd.DataFrame:
+        """Loads data with specified start and end time.
+
+        start_time and end_time are inclusive.
+        """
+        return self.get_data_batch([symbol], start_time, end_time, time_interval)[symbol]
+
+    def get_data_batch(
+        self, symbols: List[str], start_time: pd.Timestamp, end_time: pd.Timestamp, time_interval: TimeInterval
+    ) -> Dict[str, pd.DataFrame]:
+        """Loads data of multiple symbols with specified start and end time.
+
+        start_time and end_time are inclusive.
+        """
+        if not start_time.tzinfo:
+            start_time = start_time.tz_localize(TIME_ZONE)
+        if not end_time.tzinfo:
+            end_time = end_time.tz_localize(TIME_ZONE)
+        end_time = min(end_time, self._clock.now())
+        res = {symbol: [] for symbol in symbols}
+        if start_time < self._day_start:
+            history_end = min(end_time, self._day_start - datetime.timedelta(seconds=1))
+            history = self._source.get_data_batch(symbols, start_time, history_end, time_interval)
+            for symbol in symbols:
+                res[symbol].append(history[symbol])
+        if time_interval == TimeInterval.FIVE_MIN and end_time >= self._day_start:
+            self.load(symbols)
+            for symbol in symbols:
+                bars = self._recorded[symbol]
+                res[symbol].append(bars[(bars.index >= start_time) & (bars.index <= end_time)])
+        return {
+            symbol: pd.concat(frames)
+            if len(frames) > 1
+            else frames[0]
+            if frames
+            else pd.DataFrame(columns=DATA_COLUMNS)
+            for symbol, frames in res.items()
+        }
+
+    def get_last_trades(self, symbols: List[str]) -> Dict[str, float]:
+        """Gets the last trade prices of a list of symbols.
+
+        Symbols without any visible bar on the replay day are absent in the result.
+        """
+        self.load(symbols)
+        now = self._clock.now()
+        res = {}
+        for symbol in symbols:
+            closes = self._recorded[symbol]['Close']
+            visible = closes[closes.index <= now]
+            if len(visible):
+                res[symbol] = float(visible.iloc[-1])
+        return res
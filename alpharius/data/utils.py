@@ -1,23 +1,32 @@
+import collections
 import datetime
-import functools
 import os
 import sys
-from collections.abc import Callable, Iterable
+import threading
+from collections.abc import Iterable
 from concurrent import futures
+from typing import Dict, List, Optional, Tuple
 
-import cachetools
+import numpy as np
 import pandas as pd
 import retrying
 from alpaca import trading
 from tqdm import tqdm
 
-from alpharius.utils import TIME_ZONE, Transaction, get_trading_client, hash_str
+from alpharius.utils import TIME_ZONE, Transaction, get_today, get_trading_client
 
-from .base import CACHE_DIR, DataClient, TimeInterval
+from .bar_cache import BarCacheKey, get_bar_cache
+from .bar_store import BarStore, get_bar_store
+from .base import CACHE_DIR, DATA_COLUMNS, DataClient, TimeInterval, get_day_range
 from .fmp_client import FmpClient
+from .parquet_store import get_parquet_store
+from .replay_client import ReplayDataClient
 
 _MAX_WORKERS = 10
-_interday_dataset_cache = cachetools.LRUCache(maxsize=2)
+_SPLIT_CHECK_DAYS = 7
+_INTRADAY_WINDOW_DAYS = 31
+# Symbols fetched per batch call while progress is shown
+_PROGRESS_BATCH_SIZE = 100
 
 
 @retrying.retry(
@@ -25,69 +34,268 @@ _interday_dataset_cache = cachetools.LRUCache(maxsize=2)
     wait_exponential_multiplier=500,
     retry_on_exception=lambda e: isinstance(e, (IOError, EOFError)),
 )
-def _load_cached_symbol(symbol: str, cache_dir: str, load_func: Callable[[str], pd.DataFrame]) -> pd.DataFrame:
-    cache_file = os.path.join(cache_dir, f'history_{symbol}.pickle')
-    if os.path.isfile(cache_file):
-        hist: pd.DataFrame = pd.read_pickle(cache_file)
-    else:
-        hist = load_func(symbol)
-        hist.to_pickle(cache_file)
-    return hist
+def _read_cached_symbol(cache_file: str) -> pd.DataFrame:
+    return pd.read_pickle(cache_file)
+
+
+def _write_cached_symbol(hist: pd.DataFrame, cache_file: str) -> None:
+    # Written to a temporary file first, so concurrent readers never see a partial file. Forked
+    # processes keep the thread ident of their parent, so the name also has the process id.
+    tmp_file = f'{cache_file}.{os.getpid()}.{threading.get_ident()}'
+    hist.to_pickle(tmp_file)
+    os.replace(tmp_file, cache_file)
+
+
+def _empty_bars() -> pd.DataFrame:
+    return pd.DataFrame(columns=DATA_COLUMNS, index=pd.DatetimeIndex([], tz=TIME_ZONE))
 
 
 def get_default_data_client():
     return FmpClient()
 
 
+def _get_daily_batch(
+    symbols: List[str],
+    start_time: pd.Timestamp,
+    end_time: pd.Timestamp,
+    data_client: DataClient,
+    progress: Optional[tqdm],
+) -> Dict[str, pd.DataFrame]:
+    """Fetches daily bars of symbols in one batch, or in smaller batches if progress is shown.
+
+    Symbols the data client has no bars for, e.g. delisted ones, get empty bars.
+    """
+    if progress is None:
+        res = data_client.get_data_batch(symbols, start_time, end_time, TimeInterval.DAY)
+    else:
+        res = {}
+        for i in range(0, len(symbols), _PROGRESS_BATCH_SIZE):
+            batch = symbols[i : i + _PROGRESS_BATCH_SIZE]
+            res.update(data_client.get_data_batch(batch, start_time, end_time, TimeInterval.DAY))
+            progress.update(len(batch))
+    return {symbol: res[symbol] if symbol in res else _empty_bars() for symbol in symbols}
+
+
+def _fetch_interday_dataset(
+    symbols: List[str],
+    start_time: pd.Timestamp,
+    end_time: pd.Timestamp,
+    bar_store: BarStore,
+    data_client: DataClient,
+) -> Dict[str, Tuple[pd.DataFrame, datetime.date]]:
+    """Fetches daily bars of symbols that are not in the bar store.
+
+    If the stored bars of a symbol start early enough, only the tail after them is fetched. The
+    tail overlaps with the stored bars for a few days. If prices in the overlap disagree, e.g. a
+    split happened since the bars were stored, all bars of the symbol are fetched again. Symbols
+    sharing the same fetch range are fetched in one batch. Progress is shown in interactive runs.
+
+    Returns the bars of each symbol and the date they start from.
+    """
+    res = {}
+    full_symbols = []
+    tail_symbols = collections.defaultdict(list)
+    for symbol in symbols:
+        coverage = bar_store.get_coverage(symbol)
+        if coverage and coverage[0] <= start_time.date():
+            tail_symbols[coverage[1]].append(symbol)
+        else:
+            full_symbols.append(symbol)
+    progress = tqdm(total=len(symbols), ncols=80) if sys.stdout.isatty() and symbols else None
+    for coverage_end, group in tail_symbols.items():
+        tail_start = pd.Timestamp(coverage_end - datetime.timedelta(days=_SPLIT_CHECK_DAYS)).tz_localize(TIME_ZONE)
+        tails = _get_daily_batch(group, tail_start, end_time, data_client, progress)
+        for symbol, tail in tails.items():
+            stored = bar_store.read(symbol)
+            overlap = stored.index.intersection(tail.index)
+            if np.allclose(stored.loc[overlap, 'Close'], tail.loc[overlap, 'Close'], rtol=1e-4):
+                if len(tail):
+                    stored = pd.concat([stored[stored.index < tail.index[0]], tail])
+                res[symbol] = (stored, bar_store.get_coverage(symbol)[0])
+            else:
+                full_symbols.append(symbol)
+    if full_symbols:
+        if progress is not None:
+            # Symbols whose stored bars disagree with their tail are fetched again
+            progress.total = progress.n + len(full_symbols)
+        for symbol, hist in _get_daily_batch(full_symbols, start_time, end_time, data_client, progress).items():
+            res[symbol] = (hist, start_time.date())
+    if progress is not None:
+        progress.close()
+    return res
+
+
 def load_interday_dataset(
     symbols: Iterable[str], start_time: pd.Timestamp, end_time: pd.Timestamp, data_client: DataClient
 ) -> dict[str, pd.DataFrame]:
     if end_time.isoweekday() == 7:  # Improve cache hit
         end_time = end_time - datetime.timedelta(days=1)
-    cache_key = hash_str(','.join(sorted(symbols)) + start_time.strftime('%F') + end_time.strftime('%F'))
-    if cache_key in _interday_dataset_cache:
-        return _interday_dataset_cache[cache_key]
-    cache_dir = os.path.join(CACHE_DIR, str(TimeInterval.DAY), start_time.strftime('%F'), end_time.strftime('%F'))
-    os.makedirs(cache_dir, exist_ok=True)
+    if not start_time.tzinfo:
+        start_time = start_time.tz_localize(TIME_ZONE)
+    if not end_time.tzinfo:
+        end_time = end_time.tz_localize(TIME_ZONE)
+    if isinstance(data_client, ReplayDataClient):
+        # Replays have no daily bars from the replay day on, which must not be stored as complete
+        end_time = min(end_time, data_client.day_start - datetime.timedelta(seconds=1))
+    symbols = list(symbols)
+    # Bars of today may still change, so they are neither persisted nor cached
+    complete_end = min(end_time.date(), get_today().date() - datetime.timedelta(days=1))
+    cacheable = end_time.date() <= complete_end
+    bar_cache = get_bar_cache()
+    bar_store = get_bar_store(TimeInterval.DAY)
     res = {}
-    tasks = {}
-    load_func = functools.partial(
-        data_client.get_data, start_time=start_time, end_time=end_time, time_interval=TimeInterval.DAY
+    missing = []
+    for symbol in symbols:
+        hist = bar_cache.get(BarCacheKey(symbol, TimeInterval.DAY, start_time.date(), end_time.date()))
+        if hist is not None:
+            res[symbol] = hist
+            continue
+        coverage = bar_store.get_coverage(symbol)
+        if coverage and coverage[0] <= start_time.date() and end_time.date() <= coverage[1]:
+            res[symbol] = bar_store.read(symbol, start_time, end_time)
+        else:
+            missing.append(symbol)
+    parquet_store = get_parquet_store()
+    if missing and parquet_store:
+        parquet_coverage = parquet_store.get_coverage(TimeInterval.DAY)
+        covered = [
+            symbol
+            for symbol in missing
+            if symbol in parquet_coverage
+            and parquet_coverage[symbol][0] <= start_time.date()
+            and end_time.date() <= parquet_coverage[symbol][1]
+        ]
+        if covered:
+            # All bars of the coverage are read, so they can go to the bar store and later loads
+            # do not read Parquet again
+            coverage_start = pd.Timestamp(min(parquet_coverage[symbol][0] for symbol in covered))
+            coverage_end = pd.Timestamp(max(parquet_coverage[symbol][1] for symbol in covered))
+            stored = parquet_store.read(
+                covered,
+                coverage_start.tz_localize(TIME_ZONE),
+                (coverage_end + datetime.timedelta(days=1, seconds=-1)).tz_localize(TIME_ZONE),
+                TimeInterval.DAY,
+            )
+            frames = {symbol: stored[symbol] if symbol in stored else _empty_bars() for symbol in covered}
+            bar_store.write(frames, {symbol: parquet_coverage[symbol] for symbol in covered})
+            for symbol, hist in frames.items():
+                res[symbol] = hist[(hist.index >= start_time) & (hist.index <= end_time)]
+            missing = [symbol for symbol in missing if symbol not in res]
+    fetched = _fetch_interday_dataset(missing, start_time, end_time, bar_store, data_client)
+    complete_end_time = pd.Timestamp(complete_end + datetime.timedelta(days=1)).tz_localize(TIME_ZONE)
+    bar_store.write(
+        {symbol: hist[hist.index < complete_end_time] for symbol, (hist, _) in fetched.items()},
+        {symbol: (start, complete_end) for symbol, (_, start) in fetched.items()},
     )
-    with futures.ThreadPoolExecutor(max_workers=_MAX_WORKERS) as pool:
+    for symbol, (hist, _) in fetched.items():
+        res[symbol] = hist[(hist.index >= start_time) & (hist.index <= end_time)]
+    if cacheable:
         for symbol in symbols:
-            t = pool.submit(_load_cached_symbol, symbol, cache_dir, load_func)
-            tasks[symbol] = t
-        iterator = tqdm(tasks.items(), ncols=80) if sys.stdout.isatty() else tasks.items()
-        for symbol, t in iterator:
-            res[symbol] = t.result()
-    _interday_dataset_cache[cache_key] = res
+            bar_cache.put(BarCacheKey(symbol, TimeInterval.DAY, start_time.date(), end_time.date()), res[symbol])
+    return {symbol: res[symbol] for symbol in symbols}
+
+
+def _fetch_intraday_window(
+    symbols: List[str], first_day: datetime.date, last_day: datetime.date, data_client: DataClient
+) -> Dict[str, pd.DataFrame]:
+    """Fetches 5-minute bars of symbols over a window of days with one batch call.
+
+    Bars are split by day and cached per day, including the days without bars, so
+    later days of the window are served from the cache. Symbols the data client has no
+    bars for get empty bars.
+
+    Returns the bars of the first day.
+    """
+    num_days = (last_day - first_day).days + 1
+    days = [first_day + datetime.timedelta(days=i) for i in range(num_days)]
+    day_starts = pd.DatetimeIndex([pd.Timestamp(d) for d in days]).tz_localize(TIME_ZONE)
+    end_time = pd.Timestamp.combine(last_day, datetime.time(23, 59)).tz_localize(TIME_ZONE)
+    fetched = data_client.get_data_batch(symbols, day_starts[0], end_time, TimeInterval.FIVE_MIN)
+    today = get_today().date()
+    bar_cache = get_bar_cache()
+    res = {}
+    for symbol in symbols:
+        hist = fetched[symbol] if symbol in fetched else _empty_bars()
+        bounds = list(hist.index.searchsorted(day_starts)) + [len(hist)]
+        for i, d in enumerate(days):
+            day_hist = hist.iloc[bounds[i] : bounds[i + 1]].copy()
+            cache_dir = os.path.join(CACHE_DIR, str(TimeInterval.FIVE_MIN), d.strftime('%F'))
+            os.makedirs(cache_dir, exist_ok=True)
+            _write_cached_symbol(day_hist, os.path.join(cache_dir, f'history_{symbol}.pickle'))
+            if i == 0:
+                res[symbol] = day_hist
+            elif d < today:
+                bar_cache.put(BarCacheKey(symbol, TimeInterval.FIVE_MIN, d, d), day_hist)
     return res
 
 
 def load_intraday_dataset(
-    symbols: Iterable[str], day: pd.Timestamp, data_client: DataClient
+    symbols: Iterable[str],
+    day: pd.Timestamp,
+    data_client: DataClient,
+    window_end: Optional[pd.Timestamp] = None,
 ) -> dict[str, pd.DataFrame]:
+    """Loads 5-minute bars of symbols on a day.
+
+    params:
+      window_end: If provided, bars missing in the cache are fetched for up to a month
+        from the day but not after window_end, and cached per day. Inclusive.
+    """
     cache_dir = os.path.join(CACHE_DIR, str(TimeInterval.FIVE_MIN), day.strftime('%F'))
     os.makedirs(cache_dir, exist_ok=True)
+    today = get_today().date()
+    cacheable = day.date() < today
+    bar_cache = get_bar_cache()
     res = {}
     tasks = {}
-    load_func = functools.partial(data_client.get_daily, day=day, time_interval=TimeInterval.FIVE_MIN)
+    missing = []
+    uncached = []
+    for symbol in symbols:
+        hist = bar_cache.get(BarCacheKey(symbol, TimeInterval.FIVE_MIN, day.date(), day.date()))
+        if hist is not None:
+            res[symbol] = hist
+        else:
+            uncached.append(symbol)
+    to_cache = list(uncached)
+    parquet_store = get_parquet_store()
+    if uncached and parquet_store:
+        res.update(parquet_store.read(uncached, *get_day_range(day), TimeInterval.FIVE_MIN))
+        uncached = [symbol for symbol in uncached if symbol not in res]
     with futures.ThreadPoolExecutor(max_workers=_MAX_WORKERS) as pool:
-        for symbol in symbols:
-            t = pool.submit(_load_cached_symbol, symbol, cache_dir, load_func)
-            tasks[symbol] = t
+        for symbol in uncached:
+            cache_file = os.path.join(cache_dir, f'history_{symbol}.pickle')
+            if os.path.isfile(cache_file):
+                tasks[symbol] = pool.submit(_read_cached_symbol, cache_file)
+            else:
+                missing.append(symbol)
+        if missing:
+            last_day = day.date()
+            if window_end is not None and cacheable:
+                # Bars of today may still change, so the window stops before today
+                last_day = min(
+                    window_end.date(),
+                    day.date() + datetime.timedelta(days=_INTRADAY_WINDOW_DAYS - 1),
+                    today - datetime.timedelta(days=1),
+                )
+                last_day = max(last_day, day.date())
+            res.update(_fetch_intraday_window(missing, day.date(), last_day, data_client))
         for symbol, t in tasks.items():
             res[symbol] = t.result()
-    return res
+    if cacheable:
+        for symbol in to_cache:
+            bar_cache.put(BarCacheKey(symbol, TimeInterval.FIVE_MIN, day.date(), day.date()), res[symbol])
+    return {symbol: res[symbol] for symbol in symbols}
 
 
 @retrying.retry(stop_max_attempt_number=3, wait_exponential_multiplier=5000)
-def get_transactions(start_date: str, data_client: DataClient) -> list[Transaction]:
+def get_transactions(
+    start_date: str, data_client: DataClient, trading_client: Optional[trading.TradingClient] = None
+) -> list[Transaction]:
     """Gets transactions from start date until today.
 
     params:
       start_date: The transactions after this date are fetched. Inclusive.
+      trading_client: The client to query orders. The Alpaca trading client by default.
     """
 
     def round_time(t: pd.Timestamp) -> pd.Timestamp:
@@ -101,7 +309,7 @@ def get_transactions(start_date: str, data_client: DataClient) -> list[Transacti
             return None
         return df['Close'].iloc[0]
 
-    trading_client = get_trading_client()
+    trading_client = trading_client or get_trading_client()
 
     chunk_size = 500
     orders = []
@@ -1,7 +1,10 @@
-from .backtest import Backtest
+from .backtest import Backtest, Performance, compute_performance
 from .constants import get_nasdaq100, get_sp500
 from .enums import ActionType, PositionStatus, TradingFrequency
 from .live import Live
 from .processors.processor import Processor
+from .replay import ReplayTradingClient, run_replay
 from .structs import Action, Context, ProcessorAction
+from .sweep import run_sweep
 from .trade import PROCESSORS
+from .walk_forward import WalkForwardResult, WalkForwardWindow, run_walk_forward
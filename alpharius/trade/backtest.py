@@ -1,13 +1,14 @@
 import collections
 import datetime
 import difflib
-import functools
 import math
+import multiprocessing
 import os
 import signal
 import threading
 import time
-from typing import Dict, List, Optional, Set, Tuple, Type, Union
+from concurrent import futures
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple, Type, Union
 
 import alpaca.trading as trading
 import matplotlib.dates as mdates
@@ -23,7 +24,7 @@ except ImportError:
 
 from alpharius.data import (
     DataClient,
-    load_interday_dataset,
+    get_bar_cache,
     load_intraday_dataset,
 )
 from alpharius.utils import (
@@ -32,7 +33,6 @@ from alpharius.utils import (
     compute_bernoulli_ci95,
     compute_drawdown,
     compute_risks,
-    get_all_symbols,
     get_trading_client,
     highlight_diff_table,
 )
@@ -45,6 +45,7 @@ from .common import (
     MARKET_OPEN,
     OUTPUT_DIR,
     SHORT_RESERVE_RATIO,
+    close_logger,
     get_header,
     get_unique_actions,
     logging_config,
@@ -52,10 +53,83 @@ from .common import (
 )
 from .enums import ActionType, Mode, TradingFrequency
 from .processors.processor import Processor, instantiate_processor
-from .structs import Action, Context, Position
+from .stock_universe import get_interday_panel
+from .structs import Action, Context, ContextBuilder, Position
 
 _MAX_WORKERS = 20
 
+# Backtest being run, inherited by forked worker processes
+_forked_backtest = None
+
+
+class _LogBuffer:
+    """Collects messages of a shard, so that they are logged in date order after merging."""
+
+    def __init__(self) -> None:
+        self.messages = []
+
+    def info(self, message: str) -> None:
+        self.messages.append(message)
+
+
+class _ShardResult(NamedTuple):
+    transactions: List[Transaction]
+    daily_equity: List[float]
+    num_win: int
+    num_lose: int
+    processor_stats: Dict[str, Dict[str, float]]
+    details: List[str]
+    intraday_load_time: float
+    stock_universe_load_time: float
+    context_prep_time: float
+    processor_time: Dict[str, float]
+
+
+class Performance(NamedTuple):
+    gain_loss: float
+    sharpe_ratio: float
+    drawdown: float
+    win_rate: float
+    num_trades: int
+    num_win: int
+    num_lose: int
+
+
+def compute_performance(daily_equity: List[float], num_win: int, num_lose: int) -> Performance:
+    """Computes performance of a backtest from its daily equity and numbers of winning and losing trades."""
+    num_trades = num_win + num_lose
+    # Market values are only needed for alpha and beta
+    _, _, sharpe_ratio = compute_risks(daily_equity, []) if len(daily_equity) > 2 else (None, None, math.nan)
+    drawdown, _, _ = compute_drawdown(daily_equity)
+    return Performance(
+        gain_loss=daily_equity[-1] / daily_equity[0] - 1,
+        sharpe_ratio=sharpe_ratio,
+        drawdown=drawdown,
+        win_rate=num_win / num_trades if num_trades else math.nan,
+        num_trades=num_trades,
+        num_win=num_win,
+        num_lose=num_lose,
+    )
+
+
+def get_market_dates(start_date: pd.Timestamp, end_date: pd.Timestamp) -> List[datetime.date]:
+    """Gets market days from start_date, inclusive, to end_date, exclusive."""
+    calendar = get_trading_client().get_calendar(
+        filters=trading.GetCalendarRequest(
+            start=start_date.date(),
+            end=(end_date - datetime.timedelta(days=1)).date(),
+        )
+    )
+    return [market_day.date for market_day in calendar if market_day.date < end_date.date()]
+
+
+def _run_shard(market_dates: List[datetime.date]) -> _ShardResult:
+    return _forked_backtest._run_shard(market_dates)
+
+
+def _run_processor(processor_index: int) -> Optional[_ShardResult]:
+    return _forked_backtest._run_processor(processor_index)
+
 
 class Backtest:
     def __init__(
@@ -65,13 +139,42 @@ class Backtest:
         processors: List[Union[Type[Processor], Processor]],
         data_client: DataClient,
         ack_all: Optional[bool] = False,
+        prefetch_days: int = 2,
+        num_shards: int = 1,
+        attribution: bool = False,
+        lookback_start_date: Optional[pd.Timestamp] = None,
+        lookback_end_date: Optional[pd.Timestamp] = None,
+        market_dates: Optional[List[datetime.date]] = None,
     ) -> None:
+        """Instantiates a backtest.
+
+        Parameters:
+            start_date: First day of the backtest. Inclusive.
+            end_date: Last day of the backtest. Exclusive.
+            processors: Processors to trade with.
+            data_client: Data client to load bars from.
+            ack_all: Whether all trade actions are acked, even those without cash to trade.
+            prefetch_days: Number of days to load intraday data of in background.
+            num_shards: Number of processes to split days of the backtest among. Days are only
+                split if all processors trade within the day, as shards start without positions.
+            attribution: Whether each processor is also backtested on its own, to report how each
+                performs by itself. Processors start from the same state as the combined portfolio,
+                and run after it, reading intraday data from the cache it fills.
+            lookback_start_date: Start of interday data loaded for the backtest. Some time before
+                start_date by default. Backtests with the same lookback range share interday data
+                and stock universes.
+            lookback_end_date: End of interday data loaded for the backtest. end_date by default.
+            market_dates: Market days of the backtest, if already known. Loaded from the trading
+                calendar by default.
+        """
         if isinstance(start_date, str):
             start_date = pd.to_datetime(start_date)
         if isinstance(end_date, str):
             end_date = pd.to_datetime(end_date)
         self._start_date = start_date
         self._end_date = end_date
+        self._lookback_start_date = lookback_start_date or start_date - datetime.timedelta(days=INTERDAY_LOOKBACK_LOAD)
+        self._lookback_end_date = lookback_end_date or end_date
         self._processor_classes = processors
         self._processors: List[Processor] = []
         self._positions = []
@@ -81,8 +184,16 @@ class Backtest:
         self._cash_portion = 1
         self._processor_stats = dict()
         self._interday_dataset = None
+        self._interday_lookbacks = dict()
         self._ack_all = ack_all
         self._data_client = data_client
+        self._prefetch_days = prefetch_days
+        self._num_shards = num_shards
+        self._attribution = attribution
+        self._prefetch_pool = None
+        self._prefetches: Dict[datetime.date, futures.Future] = dict()
+        self._combined_run_done = None
+        self._combined_run_failed = None
 
         backtesting_output_dir = os.path.join(OUTPUT_DIR, 'backtest')
         self._output_num = 1
@@ -96,19 +207,18 @@ class Backtest:
                 break
             self._output_num += 1
 
-        self._details_log = logging_config(os.path.join(self._output_dir, 'details.txt'), detail=False, name='details')
-        self._summary_log = logging_config(os.path.join(self._output_dir, 'summary.txt'), detail=False, name='summary')
+        # Loggers are named after the output directory, as backtests of a sweep are built in one process
+        self._details_log = logging_config(
+            os.path.join(self._output_dir, 'details.txt'), detail=False, name=f'details:{self._output_dir}'
+        )
+        self._summary_log = logging_config(
+            os.path.join(self._output_dir, 'summary.txt'), detail=False, name=f'summary:{self._output_dir}'
+        )
+        self._loggers = [self._details_log, self._summary_log]
 
-        trading_client = get_trading_client()
-        calendar = trading_client.get_calendar(
-            filters=trading.GetCalendarRequest(
-                start=self._start_date.date(),
-                end=(self._end_date - datetime.timedelta(days=1)).date(),
-            )
+        self._market_dates = (
+            market_dates if market_dates is not None else get_market_dates(self._start_date, self._end_date)
         )
-        self._market_dates = [market_day.date for market_day in calendar if market_day.date < self._end_date.date()]
-        if threading.current_thread() is threading.main_thread():
-            signal.signal(signal.SIGINT, self._safe_exit)
 
         self._run_start_time = None
         self._interday_load_time = 0
@@ -118,24 +228,42 @@ class Backtest:
         self._transactions = []
         self._processor_time = collections.defaultdict(int)
 
+    @property
+    def market_dates(self) -> List[datetime.date]:
+        return self._market_dates
+
+    @property
+    def daily_equity(self) -> List[float]:
+        return self._daily_equity
+
+    @property
+    def performance(self) -> Performance:
+        return compute_performance(self._daily_equity, self._num_win, self._num_lose)
+
     def _safe_exit(self, signum, frame) -> None:
         self._close()
         exit(1)
 
     def _close(self):
+        if self._prefetch_pool is not None:
+            self._prefetch_pool.shutdown(wait=False, cancel_futures=True)
+            self._prefetch_pool = None
+        self._prefetches = dict()
         self._print_profile()
         self._print_summary()
         self._plot_summary()
         for processor in self._processors:
             processor.teardown()
+        for logger in self._loggers:
+            close_logger(logger)
 
-    def _init_processors(self, history_start) -> None:
+    def _init_processors(self) -> None:
         self._processors = []
         for processor_class in self._processor_classes:
             processor = instantiate_processor(
                 processor_class,
-                lookback_start_date=history_start,
-                lookback_end_date=self._end_date,
+                lookback_start_date=self._lookback_start_date,
+                lookback_end_date=self._lookback_end_date,
                 data_client=self._data_client,
                 output_dir=self._output_dir,
             )
@@ -181,25 +309,204 @@ class Backtest:
 
     def run(self) -> List[Transaction]:
         self._run_start_time = time.time()
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, self._safe_exit)
         if git is not None:
             try:
                 self._record_diff()
             except (ValueError, git.GitError) as e:
                 # Git doesn't work in some circumstances
                 self._summary_log.warning(f'Diff can not be generated: {e}')
-        history_start = self._start_date - datetime.timedelta(days=INTERDAY_LOOKBACK_LOAD)
-        self._interday_dataset = load_interday_dataset(
-            get_all_symbols(), history_start, self._end_date, self._data_client
-        )
+        self._interday_panel = get_interday_panel(self._lookback_start_date, self._lookback_end_date, self._data_client)
+        self._interday_dataset = self._interday_panel.frames
         self._interday_load_time += time.time() - self._run_start_time
-        self._init_processors(history_start)
+        self._init_processors()
+        self._precompute_stock_universes()
+        num_shards = min(self._num_shards, len(self._market_dates)) if self._should_shard() else 0
+        num_attributions = len(self._processors) if self._should_attribute() else 0
+        global _forked_backtest
+        _forked_backtest = self
+        pool = None
+        try:
+            if num_shards + num_attributions:
+                # All workers fork at the first submission, before the run starts any thread
+                context = multiprocessing.get_context('fork')
+                self._combined_run_done = context.Event()
+                self._combined_run_failed = context.Event()
+                pool = futures.ProcessPoolExecutor(max_workers=num_shards + num_attributions, mp_context=context)
+            shards = (
+                [pool.submit(_run_shard, market_dates) for market_dates in self._get_shard_dates(num_shards)]
+                if num_shards
+                else []
+            )
+            attributions = [pool.submit(_run_processor, i) for i in range(num_attributions)]
+            transactions = self._merge_shards([shard.result() for shard in shards]) if shards else self._run_days()
+            if pool is not None:
+                self._combined_run_done.set()
+            if attributions:
+                self._log_attribution([attribution.result() for attribution in attributions])
+        finally:
+            _forked_backtest = None
+            if pool is not None:
+                if not self._combined_run_done.is_set():
+                    # Sub-simulations waiting for the combined run exit without running
+                    self._combined_run_failed.set()
+                    self._combined_run_done.set()
+                pool.shutdown(cancel_futures=True)
+        self._close()
+        return transactions
+
+    def _run_days(self) -> List[Transaction]:
+        self._prefetch_pool = futures.ThreadPoolExecutor(max_workers=1)
         transactions = []
         for day in self._market_dates:
             executed_closes = self._process(day)
             transactions.extend(executed_closes)
-        self._close()
         return transactions
 
+    def _should_shard(self) -> bool:
+        if self._num_shards <= 1 or len(self._market_dates) <= 1:
+            return False
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            self._summary_log.warning('Backtest runs sequentially, as processes can not be forked')
+            return False
+        overnight_processors = [
+            processor.name
+            for processor in self._processors
+            if processor.get_trading_frequency() != TradingFrequency.FIVE_MIN
+        ]
+        if overnight_processors:
+            self._summary_log.warning(
+                'Backtest runs sequentially, as processors hold positions overnight: ' + ', '.join(overnight_processors)
+            )
+            return False
+        return True
+
+    def _get_shard_dates(self, num_shards: int) -> List[List[datetime.date]]:
+        """Splits days of the backtest into consecutive ranges, one for each shard.
+
+        Each shard starts from the state after loading data and stock universes, with its own
+        copy of processors, so shards are independent of each other and of scheduling.
+        """
+        bounds = [len(self._market_dates) * i // num_shards for i in range(num_shards + 1)]
+        return [self._market_dates[bounds[i] : bounds[i + 1]] for i in range(num_shards)]
+
+    def _merge_shards(self, results: List[_ShardResult]) -> List[Transaction]:
+        """Merges results of shards in date order."""
+        transactions = []
+        for result in results:
+            self._merge_shard(result, len(results))
+            transactions.extend(result.transactions)
+        return transactions
+
+    def _run_shard(self, market_dates: List[datetime.date]) -> _ShardResult:
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        self._market_dates = market_dates
+        self._details_log = _LogBuffer()
+        # Only time spent in the shard is reported back
+        self._stock_universe_load_time = 0
+        transactions = self._run_days()
+        self._prefetch_pool.shutdown(cancel_futures=True)
+        return _ShardResult(
+            transactions=transactions,
+            daily_equity=self._daily_equity,
+            num_win=self._num_win,
+            num_lose=self._num_lose,
+            processor_stats=self._processor_stats,
+            details=self._details_log.messages,
+            intraday_load_time=self._intraday_load_time,
+            stock_universe_load_time=self._stock_universe_load_time,
+            context_prep_time=self._context_prep_time,
+            processor_time=dict(self._processor_time),
+        )
+
+    def _run_processor(self, processor_index: int) -> Optional[_ShardResult]:
+        # Intraday data is read from the cache filled by the combined run
+        self._combined_run_done.wait()
+        if self._combined_run_failed.is_set():
+            return None
+        self._processors = [self._processors[processor_index]]
+        return self._run_shard(self._market_dates)
+
+    def _should_attribute(self) -> bool:
+        if not self._attribution:
+            return False
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            self._summary_log.warning('Processor attribution is skipped, as processes can not be forked')
+            return False
+        return True
+
+    def _log_attribution(self, results: List[_ShardResult]) -> None:
+        """Logs performance of each processor backtested on its own, next to the combined portfolio.
+
+        Trades of each processor are also logged to a details file of its own.
+        """
+
+        def get_row(name: str, performance: Performance) -> List[str]:
+            return [
+                name,
+                (
+                    f'{performance.gain_loss * 100:+.2f}%'
+                    if performance.gain_loss < 10
+                    else f'{performance.gain_loss:+.4g}'
+                ),
+                f'{performance.sharpe_ratio:.2f}' if not math.isnan(performance.sharpe_ratio) else 'N/A',
+                f'{performance.drawdown * 100:+.2f}%',
+                f'{performance.win_rate * 100:.2f}%' if not math.isnan(performance.win_rate) else 'N/A',
+                str(performance.num_trades),
+            ]
+
+        attribution = [['Processor', 'Gain/Loss', 'Sharpe Ratio', 'Drawdown', 'Win Rate', 'Num of Trades']]
+        for processor, result in zip(self._processors, results):
+            performance = compute_performance(result.daily_equity, result.num_win, result.num_lose)
+            attribution.append(get_row(processor.name, performance))
+            with open(os.path.join(self._output_dir, f'details_{processor.name.lower()}.txt'), 'w') as f:
+                f.write('\n'.join(result.details) + '\n')
+        attribution.append(get_row('Combined', self.performance))
+        outputs = [get_header('Processor Attribution'), tabulate.tabulate(attribution, tablefmt='grid')]
+        self._summary_log.info('\n'.join(outputs))
+
+    def _merge_shard(self, result: _ShardResult, num_shards: int) -> None:
+        """Appends results of a shard, chaining its daily returns to the equity so far.
+
+        Stage times are averaged over shards, as shards run side by side.
+        """
+        for prev_equity, equity in zip(result.daily_equity[:-1], result.daily_equity[1:]):
+            self._daily_equity.append(self._daily_equity[-1] * equity / prev_equity if prev_equity else 0)
+        self._num_win += result.num_win
+        self._num_lose += result.num_lose
+        for processor_name, stats in result.processor_stats.items():
+            processor_stats = self._processor_stats.setdefault(
+                processor_name, {'profit': 0.0, 'num_win': 0, 'num_lose': 0}
+            )
+            processor_stats['profit'] = (processor_stats['profit'] + 1) * (stats['profit'] + 1) - 1
+            processor_stats['num_win'] += stats['num_win']
+            processor_stats['num_lose'] += stats['num_lose']
+        self._transactions.extend(result.transactions)
+        for message in result.details:
+            self._details_log.info(message)
+        self._intraday_load_time += result.intraday_load_time / num_shards
+        self._stock_universe_load_time += result.stock_universe_load_time / num_shards
+        self._context_prep_time += result.context_prep_time / num_shards
+        for processor_name, processor_time in result.processor_time.items():
+            self._processor_time[processor_name] += processor_time / num_shards
+
+    def warm_stock_universes(self, market_dates: Optional[List[datetime.date]] = None) -> None:
+        """Computes stock universes into their caches without running the backtest.
+
+        Parameters:
+            market_dates: Days to compute stock universes of. Market days of the backtest by default.
+        """
+        self._init_processors()
+        self._precompute_stock_universes(market_dates)
+
+    def _precompute_stock_universes(self, market_dates: Optional[List[datetime.date]] = None) -> None:
+        precompute_start = time.time()
+        view_times = [pd.Timestamp(day) for day in market_dates or self._market_dates]
+        for processor in self._processors:
+            processor.precompute_stock_universe(view_times)
+        self._stock_universe_load_time += time.time() - precompute_start
+
     def _load_stock_universe(
         self,
         day: datetime.date,
@@ -238,27 +545,43 @@ class Backtest:
             self._processor_time[processor_name] += time.time() - data_process_start
         return actions
 
-    @functools.lru_cache(maxsize=1000)
-    def _prepare_interday_lookback(self, day: pd.Timestamp, symbol: str) -> Optional[pd.DataFrame]:
-        if symbol not in self._interday_dataset:
-            return
-        interday_data = self._interday_dataset[symbol]
-        interday_ind = timestamp_to_index(interday_data.index, pd.Timestamp(day).tz_localize(TIME_ZONE))
-        if interday_ind is None:
-            return
-        interday_lookback = interday_data.iloc[:interday_ind]
+    def _prepare_interday_lookback(self, day: datetime.date, symbol: str) -> Optional[pd.DataFrame]:
+        if symbol in self._interday_lookbacks:
+            return self._interday_lookbacks[symbol]
+        interday_lookback = None
+        interday_data = self._interday_dataset.get(symbol)
+        if interday_data is not None:
+            interday_ind = timestamp_to_index(interday_data.index, pd.Timestamp(day).tz_localize(TIME_ZONE))
+            if interday_ind is not None:
+                interday_lookback = interday_data.iloc[:interday_ind]
+        self._interday_lookbacks[symbol] = interday_lookback
         return interday_lookback
 
-    @staticmethod
-    def _prepare_intraday_lookback(
-        current_interval_start: pd.Timestamp, symbol: str, intraday_datas: Dict[str, pd.DataFrame]
-    ) -> Optional[pd.DataFrame]:
-        intraday_data = intraday_datas[symbol]
-        intraday_ind = timestamp_to_index(intraday_data.index, current_interval_start)
-        if intraday_ind is None:
+    def _prefetch_intraday_data(self, day: datetime.date) -> None:
+        """Starts loading intraday data of the next few market days in background.
+
+        Symbols are taken from the stock universes of processors, which leaves processor states
+        untouched. Symbols entering the universe in between, e.g. newly held positions, are not
+        prefetched and are loaded on their day instead.
+        """
+        if self._prefetch_pool is None or self._prefetch_days <= 0:
             return
-        intraday_lookback = intraday_data.iloc[: intraday_ind + 1]
-        return intraday_lookback
+        day_index = self._market_dates.index(day)
+        for next_day in self._market_dates[day_index + 1 : day_index + 1 + self._prefetch_days]:
+            if next_day in self._prefetches:
+                continue
+            load_stock_universe_start = time.time()
+            unique_symbols = set()
+            for processor in self._processors:
+                unique_symbols.update(processor.get_prefetch_symbols(pd.Timestamp(next_day)))
+            self._stock_universe_load_time += time.time() - load_stock_universe_start
+            self._prefetches[next_day] = self._prefetch_pool.submit(
+                load_intraday_dataset,
+                unique_symbols,
+                pd.Timestamp(next_day),
+                self._data_client,
+                pd.Timestamp(self._market_dates[-1]),
+            )
 
     def _load_intraday_data(
         self, day: pd.Timestamp, stock_universe: Dict[TradingFrequency, Set[str]]
@@ -267,17 +590,30 @@ class Backtest:
         unique_symbols = set()
         for _, symbols in stock_universe.items():
             unique_symbols.update(symbols)
-        intraday_dataset = load_intraday_dataset(unique_symbols, day, self._data_client)
+        intraday_dataset = dict()
+        prefetch = self._prefetches.pop(day.date(), None)
+        if prefetch is not None:
+            intraday_dataset = prefetch.result()
+        missing_symbols = unique_symbols.difference(intraday_dataset)
+        if missing_symbols:
+            intraday_dataset.update(
+                load_intraday_dataset(missing_symbols, day, self._data_client, pd.Timestamp(self._market_dates[-1]))
+            )
         self._intraday_load_time += time.time() - load_intraday_start
-        return intraday_dataset
+        return {symbol: intraday_dataset[symbol] for symbol in unique_symbols}
 
     def _process(self, day: datetime.date) -> List[Transaction]:
+        self._interday_lookbacks = dict()
         for processor in self._processors:
             processor.setup(self._positions, day)
 
+        self._prefetch_intraday_data(day)
         processor_stock_universes, stock_universe = self._load_stock_universe(day)
 
         intraday_datas = self._load_intraday_data(pd.Timestamp(day), stock_universe)
+        prep_context_start = time.time()
+        context_builder = ContextBuilder(intraday_datas, Mode.BACKTEST)
+        self._context_prep_time += time.time() - prep_context_start
 
         market_open = pd.to_datetime(pd.Timestamp.combine(day, MARKET_OPEN)).tz_localize(TIME_ZONE)
         market_close = pd.to_datetime(pd.Timestamp.combine(day, MARKET_CLOSE)).tz_localize(TIME_ZONE)
@@ -304,22 +640,12 @@ class Backtest:
                 if frequency in frequency_to_process:
                     unique_symbols.update(symbols)
             for symbol in unique_symbols:
-                intraday_lookback = self._prepare_intraday_lookback(current_interval_start, symbol, intraday_datas)
-                if intraday_lookback is None or len(intraday_lookback) == 0:
-                    continue
                 interday_lookback = self._prepare_interday_lookback(day, symbol)
                 if interday_lookback is None or len(interday_lookback) == 0:
                     continue
-                current_price = intraday_lookback['Close'].iloc[-1]
-                context = Context(
-                    symbol=symbol,
-                    current_time=current_time,
-                    current_price=current_price,
-                    interday_lookback=interday_lookback,
-                    intraday_lookback=intraday_lookback,
-                    mode=Mode.BACKTEST,
-                )
-                contexts[symbol] = context
+                context = context_builder.build(symbol, current_interval_start, current_time, interday_lookback)
+                if context is not None:
+                    contexts[symbol] = context
             self._context_prep_time += time.time() - prep_context_start
 
             processors = []
@@ -510,14 +836,17 @@ class Backtest:
 
         if self._positions:
             position_info = []
+            day_ind = self._interday_panel.get_date_index(pd.Timestamp(day).tz_localize(TIME_ZONE))
             for position in self._positions:
-                interday_data = self._interday_dataset[position.symbol]
-                interday_ind = timestamp_to_index(interday_data.index, pd.Timestamp(day).tz_localize(TIME_ZONE))
+                symbol_ind = self._interday_panel.get_symbol_index(position.symbol)
                 close_price, daily_change = None, None
-                if interday_ind is not None:
-                    close_price = interday_data['Close'].iloc[interday_ind]
-                    if interday_ind > 0:
-                        daily_change = (close_price / interday_data['Close'].iloc[interday_ind - 1] - 1) * 100
+                if day_ind is not None and symbol_ind is not None:
+                    close_price = self._interday_panel.field('Close')[day_ind, symbol_ind]
+                    prev_close = self._interday_panel.previous('Close')[day_ind, symbol_ind]
+                    if np.isnan(close_price):
+                        close_price = None
+                    elif not np.isnan(prev_close):
+                        daily_change = (close_price / prev_close - 1) * 100
                 change = (close_price / position.entry_price - 1) * 100 if close_price is not None else None
                 value = close_price * position.qty if close_price is not None else None
                 position_info.append(
@@ -827,5 +1156,11 @@ class Backtest:
                 [processor_name, f'{processor_time:.0f}', f'{processor_time / data_process_time * 100:.0f}%']
             )
         outputs.append(tabulate.tabulate(processor_profile, tablefmt='grid'))
+        bar_cache = get_bar_cache()
+        cache_profile = [
+            ['Bar Cache', 'Hits', 'Misses', 'Evictions', 'Size (MB)'],
+            ['', bar_cache.hits, bar_cache.misses, bar_cache.evictions, f'{bar_cache.num_bytes / 2**20:.0f}'],
+        ]
+        outputs.append(tabulate.tabulate(cache_profile, tablefmt='grid'))
         with open(txt_output, 'w') as f:
             f.write('\n'.join(outputs))
@@ -68,7 +68,8 @@ def logging_config(logging_file=None, detail=True, name=None, timezone=None) ->
         stream_handler.formatter.converter = lambda *args: datetime.datetime.now(tz=timezone).timetuple()
     logger.addHandler(stream_handler)
     if logging_file:
-        file_handler = logging.FileHandler(logging_file)
+        # The file is opened on the first message, so that idle loggers do not hold file descriptors
+        file_handler = logging.FileHandler(logging_file, delay=True)
         file_handler.setLevel(logging.DEBUG)
         file_handler.setFormatter(formatter)
         if timezone:
@@ -77,6 +78,13 @@ def logging_config(logging_file=None, detail=True, name=None, timezone=None) ->
     return logger
 
 
+def close_logger(logger: logging.Logger) -> None:
+    """Removes handlers of a logger and closes their files."""
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+
 def get_header(title):
     header_left = '== [ %s ] ' % (title,)
     return header_left + '=' * (80 - len(header_left))
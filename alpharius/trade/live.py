@@ -4,20 +4,20 @@ import os
 import socket
 import threading
 import time
-from concurrent import futures
-from typing import List, Optional, Type, Union
+from typing import Dict, Iterable, List, Optional, Type, Union
 from zoneinfo import ZoneInfo
 
 import alpaca.trading as trading
-import numpy as np
 import pandas as pd
 import retrying
 from alpaca.common import APIError
 from sqlalchemy import exc
 
 from alpharius.data import (
-    DATA_COLUMNS,
+    BarStream,
     DataClient,
+    IntradayBuffer,
+    SimulatedClock,
     TimeInterval,
     get_transactions,
     load_interday_dataset,
@@ -26,7 +26,6 @@ from alpharius.db import Db
 from alpharius.utils import (
     TIME_ZONE,
     get_all_symbols,
-    get_today,
     get_trading_client,
 )
 
@@ -42,7 +41,8 @@ from .enums import ActionType, Mode, TradingFrequency
 from .processors.processor import Processor, instantiate_processor
 from .structs import Action, Context, Position
 
-_MAX_WORKERS = 10
+# Streamed updates processed later than this are likely falling behind the market
+_STREAM_LAG_WARNING_SECONDS = 5
 
 
 class Live:
@@ -51,8 +51,27 @@ class Live:
         processors: List[Union[Type[Processor], Processor]],
         data_client: DataClient,
         logging_timezone: Optional[ZoneInfo] = None,
+        trading_client: Optional[trading.TradingClient] = None,
+        clock: Optional[SimulatedClock] = None,
+        streaming: bool = False,
+        output_dir: Optional[str] = None,
+        record: bool = True,
     ) -> None:
-        self._output_dir = os.path.join(OUTPUT_DIR, 'live', datetime.datetime.now().strftime('%F'))
+        """Instantiates a live trading run.
+
+        Parameters:
+            processors: Processors to trade with.
+            data_client: Client to load market data.
+            logging_timezone: Time zone of log timestamps.
+            trading_client: Client to place orders. The Alpaca trading client by default.
+            clock: Source of time and sleep, e.g. a simulated clock for replays. The time module by default.
+            streaming: Whether to maintain intraday data from streamed bars and trades. Only symbols
+                the stream is behind on are polled at checkpoints.
+            output_dir: Directory of logs. Today's directory under the live outputs by default.
+            record: Whether to record transactions, aggregations and logs in the database.
+        """
+        self._clock = clock or time
+        self._output_dir = output_dir or os.path.join(OUTPUT_DIR, 'live', datetime.datetime.now().strftime('%F'))
         os.makedirs(self._output_dir, exist_ok=True)
         self._logging_timezone = logging_timezone
         self._logger = logging_config(
@@ -61,10 +80,10 @@ class Live:
         self._logger.info('Trading is running on [%s]', socket.gethostname())
         self._equity, self._cash = 0, 0
         self._cash_reserve = float(os.environ.get('CASH_RESERVE', 0))
-        self._today = get_today()
+        self._today = pd.to_datetime(self._clock.time(), utc=True, unit='s').tz_convert(TIME_ZONE).normalize()
         self._processor_classes = processors
-        self._alpaca = get_trading_client()
-        self._db = Db()
+        self._alpaca = trading_client or get_trading_client()
+        self._db = Db() if record else None
         self._update_account()
         self._update_positions()
         self._processors = []
@@ -73,12 +92,15 @@ class Live:
         self._stock_universe = collections.defaultdict(set)
         self._interday_data = dict()
         self._intraday_data = dict()
+        self._intraday_buffers: Dict[str, IntradayBuffer] = collections.defaultdict(IntradayBuffer)
         self._latest_trades = dict()
         self._db_thread = None
         self._data_client = data_client
-        clock = self._alpaca.get_clock()
-        self._market_open = clock.next_open.timestamp()
-        self._market_close = clock.next_close.timestamp()
+        self._checkpoint_latencies: Dict[pd.Timestamp, float] = {}
+        self._bar_stream = BarStream() if streaming else None
+        market_clock = self._alpaca.get_clock()
+        self._market_open = market_clock.next_open.timestamp()
+        self._market_close = market_clock.next_close.timestamp()
         if self._market_open > self._market_close:
             self._market_open = (
                 pd.to_datetime(pd.Timestamp.combine(self._today.date(), MARKET_OPEN)).tz_localize(TIME_ZONE).timestamp()
@@ -140,25 +162,27 @@ class Live:
         if not calendar or calendar[0].date != self._today.date():
             self._logger.info('Market does not open on [%s]', self._today.date())
             return
-        if time.time() < self._market_open - 3600:
+        if self._clock.time() < self._market_open - 3600:
             self._logger.info('Market open is more than one hour away')
             return
 
         # Initialize
         history_start = self._today - datetime.timedelta(days=INTERDAY_LOOKBACK_LOAD)
-        self._interday_data = load_interday_dataset(get_all_symbols(), history_start, self._today, self._data_client)
+        self._interday_data = self._load_interday_dataset(get_all_symbols())
         self._init_processors(history_start)
         self._init_stock_universe()
+        if self._bar_stream:
+            self._start_bar_stream()
         self._upload_log()
 
         # Wait for market open
-        while time.time() < self._market_open:
-            time.sleep(10)
+        while self._clock.time() < self._market_open:
+            self._clock.sleep(10)
 
         # Process
         processed = set()
-        while time.time() < self._market_close:
-            current_time = pd.to_datetime(pd.Timestamp(int(time.time()), unit='s', tz=TIME_ZONE))
+        while self._clock.time() < self._market_close:
+            current_time = pd.to_datetime(pd.Timestamp(int(self._clock.time()), unit='s', tz=TIME_ZONE))
             next_minute = current_time + datetime.timedelta(minutes=1)
             checkpoint_time = pd.to_datetime(
                 pd.Timestamp.combine(self._today.date(), datetime.time(int(next_minute.hour), int(next_minute.minute)))
@@ -173,14 +197,34 @@ class Live:
             if int(current_time.minute) % 30 == 3 and checkpoint_time not in processed:
                 self._update_interday_data()
                 processed.add(checkpoint_time)
-            time.sleep(1)
+            self._clock.sleep(1)
 
+        if self._bar_stream:
+            self._bar_stream.stop()
         self._upload_log()
         if self._db_thread:
             self._db_thread.join(timeout=100)
 
+    def _start_bar_stream(self) -> None:
+        universe_symbols: set[str] = set()
+        for symbols in self._stock_universe.values():
+            universe_symbols.update(symbols)
+        # Subscribe before loading bars of the day, so no update falls between the two
+        self._bar_stream.start(universe_symbols)
+        seed_time = pd.to_datetime(self._clock.time(), utc=True, unit='s').tz_convert(TIME_ZONE)
+        self._bar_stream.seed(
+            self._data_client.get_daily_batch(list(universe_symbols), self._today, TimeInterval.FIVE_MIN), seed_time
+        )
+        self._logger.info('Bar stream started for [%d] symbols', len(universe_symbols))
+
+    @property
+    def checkpoint_latencies(self) -> Dict[pd.Timestamp, float]:
+        """Seconds spent on processing each checkpoint, from data update to order fills."""
+        return self._checkpoint_latencies
+
     def _process(self, checkpoint_time: pd.Timestamp) -> None:
         self._logger.info('Process starts for [%s]', checkpoint_time.time())
+        process_start = self._clock.time()
         frequency_to_process = [TradingFrequency.FIVE_MIN]
         if checkpoint_time.timestamp() == self._market_open + 300:
             frequency_to_process = [TradingFrequency.FIVE_MIN, TradingFrequency.CLOSE_TO_OPEN]
@@ -239,31 +283,58 @@ class Live:
         self._logger.info('Got [%d] actions to process.', len(actions))
 
         close_actions = self._trade(actions)
-        self._db_thread = threading.Thread(target=self._update_db, args=(close_actions,))
-        self._db_thread.start()
+        self._checkpoint_latencies[checkpoint_time] = self._clock.time() - process_start
+        self._logger.info(
+            'Process finished for [%s]. Time elapsed [%.2fs]',
+            checkpoint_time.time(),
+            self._checkpoint_latencies[checkpoint_time],
+        )
+        if self._db:
+            self._db_thread = threading.Thread(target=self._update_db, args=(close_actions,))
+            self._db_thread.start()
 
     def _update_intraday_data(
         self, frequency_to_process: List[TradingFrequency], checkpoint_time: pd.Timestamp
     ) -> None:
-        update_start = time.time()
-        tasks = dict()
+        update_start = self._clock.time()
         all_symbols = []
         for frequency, symbols in self._stock_universe.items():
             if frequency not in frequency_to_process:
                 continue
             all_symbols.extend(symbols)
         all_symbols = list(set(all_symbols))
-        with futures.ThreadPoolExecutor(max_workers=_MAX_WORKERS) as pool:
-            for symbol in all_symbols:
-                t = pool.submit(self._data_client.get_daily, symbol, self._today, TimeInterval.FIVE_MIN)
-                tasks[symbol] = t
-            for symbol, t in tasks.items():
-                self._intraday_data[symbol] = t.result()
-        latest_trades = self._data_client.get_last_trades(all_symbols)
         expected_index = checkpoint_time - datetime.timedelta(minutes=5)
+        poll_symbols = all_symbols
+        if self._bar_stream:
+            for symbol, bars in self._bar_stream.get_bars(all_symbols).items():
+                self._intraday_buffers[symbol].update(bars)
+            stream_lag = self._bar_stream.get_lag()
+            if stream_lag > _STREAM_LAG_WARNING_SECONDS:
+                self._logger.warning('Bar stream is behind by up to [%.2fs]', stream_lag)
+            else:
+                self._logger.info('Bar stream lag [%.2fs]', stream_lag)
+            poll_symbols = [
+                symbol for symbol in all_symbols if self._intraday_buffers[symbol].last_time() != expected_index
+            ]
+            if poll_symbols:
+                self._logger.info('Streamed intraday data not up to date for [%d] symbols', len(poll_symbols))
+        if poll_symbols:
+            self._poll_intraday_data(poll_symbols, expected_index)
+        for symbol in all_symbols:
+            self._intraday_data[symbol] = self._intraday_buffers[symbol].frame()
+        self._logger.info(
+            'Intraday data updated for [%d] symbols. Time elapsed [%.2fs]',
+            len(all_symbols),
+            self._clock.time() - update_start,
+        )
+
+    def _poll_intraday_data(self, symbols: List[str], expected_index: pd.Timestamp) -> None:
+        for symbol, bars in self._data_client.get_daily_batch(symbols, self._today, TimeInterval.FIVE_MIN).items():
+            self._intraday_buffers[symbol].update(bars)
+        latest_trades = self._data_client.get_last_trades(symbols)
         for symbol, price in latest_trades.items():
-            intraday_lookback = self._intraday_data[symbol]
-            last_index = intraday_lookback.index[-1] if len(intraday_lookback) else None
+            intraday_buffer = self._intraday_buffers[symbol]
+            last_index = intraday_buffer.last_time()
             if not last_index or last_index != expected_index:
                 self._logger.info(
                     '[%s] intraday data not available. Expect last index [%s], but got [%s]',
@@ -271,33 +342,26 @@ class Live:
                     expected_index.strftime('%H:%M:%S'),
                     last_index.strftime('%H:%M:%S') if last_index else None,
                 )
-                self._intraday_data[symbol] = pd.concat(
-                    [
-                        intraday_lookback,
-                        pd.DataFrame(
-                            [[price if c != 'Volume' else 0 for c in DATA_COLUMNS]],
-                            index=[expected_index],
-                            columns=DATA_COLUMNS,
-                        ),
-                    ]
-                )
+                intraday_buffer.append(expected_index, price, price, price, price, 0)
             else:
-                old_value = intraday_lookback['Close'].iloc[-1]
+                old_value = intraday_buffer.frame()['Close'].iloc[-1]
                 if abs(price / old_value - 1) > 0.01:
                     self._logger.debug('[%s] Current price is updated from [%.5g] to [%.5g]', symbol, old_value, price)
-                intraday_lookback.at[intraday_lookback.index[-1], 'Close'] = np.float32(price)
-        self._logger.info(
-            'Intraday data updated for [%d] symbols. Time elapsed [%.2fs]', len(tasks), time.time() - update_start
-        )
+                intraday_buffer.set_close(price)
+
+    def _load_interday_dataset(self, symbols: Iterable[str]) -> Dict[str, pd.DataFrame]:
+        history_start = self._today - datetime.timedelta(days=INTERDAY_LOOKBACK_LOAD)
+        interday_data = load_interday_dataset(symbols, history_start, self._today, self._data_client)
+        # A bar of today is incomplete before market close. Backtest never sees it either.
+        return {symbol: hist[hist.index < self._today] for symbol, hist in interday_data.items()}
 
     def _update_interday_data(self):
         """Verifies interday data is correct."""
-        update_start = time.time()
+        update_start = self._clock.time()
         universe_symbols: set[str] = set()
         for symbols in self._stock_universe.values():
             universe_symbols.update(symbols)
-        history_start = self._today - datetime.timedelta(days=INTERDAY_LOOKBACK_LOAD)
-        interday_data = load_interday_dataset(universe_symbols, history_start, self._today, self._data_client)
+        interday_data = self._load_interday_dataset(universe_symbols)
         for symbol, interday_lookback in interday_data.items():
             old_interday_lookback = self._interday_data.get(symbol)
             if old_interday_lookback is None:
@@ -311,7 +375,7 @@ class Live:
         self._logger.info(
             'Interday data updated for [%d] symbols. Time elapsed [%.2fs]',
             len(universe_symbols),
-            time.time() - update_start,
+            self._clock.time() - update_start,
         )
 
     def _get_position(self, symbol: str) -> Optional[Position]:
@@ -453,7 +517,7 @@ class Live:
         wait_time = 0
         while orders:
             self._logger.info('Waiting for orders to fill. [%d] open orders remaining.', len(orders))
-            time.sleep(2)
+            self._clock.sleep(2)
             wait_time += 2
             if wait_time >= timeout:
                 break
@@ -467,15 +531,15 @@ class Live:
         self._upload_log()
         if not close_actions:
             return
-        current_time = time.time()
+        current_time = self._clock.time()
         wait_time = 8.6
         actions = {action.symbol: action for action in close_actions}
         # Some transactions may come late, so we wait up to 5 min to fill all transactions
         for _ in range(5):
             if not actions:
                 break
-            time.sleep(wait_time)
-            transactions = get_transactions(self._today.strftime('%F'), self._data_client)
+            self._clock.sleep(wait_time)
+            transactions = get_transactions(self._today.strftime('%F'), self._data_client, self._alpaca)
             for transaction in transactions:
                 symbol = transaction.symbol
                 if transaction.gl_pct is None:
@@ -495,6 +559,8 @@ class Live:
             self._logger.error('Aggregation updating encountered an error\n%s', e)
 
     def _upload_log(self):
+        if not self._db:
+            return
         try:
             self._db.update_log(self._today.strftime('%F'), self._output_dir)
         except exc.SQLAlchemyError as e:
@@ -74,8 +74,8 @@ class AbcdProcessor(Processor):
         market_open_index = context.market_open_index
         if market_open_index is None:
             return
-        open_price = context.intraday_lookback['Open'].iloc[market_open_index]
-        intraday_closes = context.intraday_lookback['Close'].iloc[market_open_index:].to_numpy()
+        open_price = context.intraday_opens[market_open_index]
+        intraday_closes = context.intraday_closes[market_open_index:]
         if len(intraday_closes) < 10:
             return
         if intraday_closes[-1] >= intraday_closes[-2]:
@@ -110,8 +110,8 @@ class AbcdProcessor(Processor):
         market_open_index = context.market_open_index
         if market_open_index is None:
             return
-        open_price = context.intraday_lookback['Open'].iloc[market_open_index]
-        intraday_closes = context.intraday_lookback['Close'].iloc[market_open_index:].to_numpy()
+        open_price = context.intraday_opens[market_open_index]
+        intraday_closes = context.intraday_closes[market_open_index:]
         if len(intraday_closes) < 10:
             return
         intraday_low = np.min(intraday_closes)
@@ -153,7 +153,7 @@ class AbcdProcessor(Processor):
     def _close_position(self, context: Context) -> Optional[ProcessorAction]:
         position = self._positions[context.symbol]
         side = position['side']
-        intraday_closes = context.intraday_lookback['Close'].to_numpy()
+        intraday_closes = context.intraday_closes
         take_profit = (
             context.current_time == position['entry_time'] + datetime.timedelta(minutes=30)
             and len(intraday_closes) >= 7
@@ -69,7 +69,7 @@ class BearMomentumProcessor(Processor):
         market_open_index = context.market_open_index
         if market_open_index is None:
             return
-        intraday_closes = context.intraday_lookback['Close'].iloc[market_open_index:]
+        intraday_closes = context.intraday_closes[market_open_index:]
         n = CONFIG.get(context.symbol, OTHER_N)
         if len(intraday_closes) < n + 1:
             return
@@ -79,8 +79,8 @@ class BearMomentumProcessor(Processor):
         if context.current_price >= interday_max * 0.7:
             return
         no_up, no_down = 0, 0
-        intraday_high = list(context.intraday_lookback['High'])
-        intraday_low = list(context.intraday_lookback['Low'])
+        intraday_high = context.intraday_highs.tolist()
+        intraday_low = context.intraday_lows.tolist()
         for i in range(-1, -n - 1, -1):
             if intraday_low[i] >= intraday_low[i - 1]:
                 no_down += 1
@@ -121,7 +121,7 @@ class BearMomentumProcessor(Processor):
         wait_minutes = 60 if context.symbol in CONFIG else 90
         if context.current_time >= position['entry_time'] + datetime.timedelta(minutes=wait_minutes):
             return _exit_action()
-        intraday_closes = context.intraday_lookback['Close']
+        intraday_closes = context.intraday_closes
         if (
             context.symbol not in CONFIG
             and position['side'] == 'long'
@@ -29,9 +29,11 @@ class CrossCloseProcessor(Processor):
         data_client: DataClient,
         output_dir: str,
         logging_timezone: Optional[ZoneInfo] = None,
+        threshold_ratio: float = 0.45,
     ) -> None:
         super().__init__(output_dir, logging_timezone)
         self._positions = dict()
+        self._threshold_ratio = threshold_ratio
         self._stock_universe = IntradayVolatilityStockUniverse(
             lookback_start_date, lookback_end_date, data_client, num_stocks=10, num_top_volume=50
         )
@@ -68,7 +70,7 @@ class CrossCloseProcessor(Processor):
         market_open_index = context.market_open_index
         if market_open_index is None:
             return
-        intraday_closes = context.intraday_lookback['Close'].to_numpy()[market_open_index:]
+        intraday_closes = context.intraday_closes[market_open_index:]
         if len(intraday_closes) < n_long + 1:
             return
         if intraday_closes[-2] < context.prev_day_close < intraday_closes[-1]:
@@ -100,7 +102,7 @@ class CrossCloseProcessor(Processor):
         min_close = np.min(intraday_closes)
         if intraday_closes[-n_long] > 0.8 * max_close + 0.2 * min_close:
             return
-        intraday_opens = context.intraday_lookback['Open'].iloc[market_open_index:].to_numpy()
+        intraday_opens = context.intraday_opens[market_open_index:]
         for i in range(len(intraday_closes) - n_long):
             if intraday_closes[i] > level and intraday_closes[i] > intraday_opens[i]:
                 break
@@ -127,8 +129,8 @@ class CrossCloseProcessor(Processor):
         market_open_index = context.market_open_index
         if market_open_index is None:
             return
-        intraday_opens = context.intraday_lookback['Open'].iloc[market_open_index:].to_numpy()
-        intraday_closes = context.intraday_lookback['Close'].iloc[market_open_index:].to_numpy()
+        intraday_opens = context.intraday_opens[market_open_index:]
+        intraday_closes = context.intraday_closes[market_open_index:]
         interday_closes = context.interday_lookback['Close'].to_numpy()
         if len(intraday_closes) < 3:
             return
@@ -145,7 +147,7 @@ class CrossCloseProcessor(Processor):
         if t < datetime.time(10, 0) and bar_sizes[-2] == sorted_bar_sizes[-1]:
             return
         prev_loss = intraday_closes[-2] / intraday_closes[-3] - 1
-        threshold = context.h2l_avg * 0.45
+        threshold = context.h2l_avg * self._threshold_ratio
         # If last two bars have crossed
         is_cross = intraday_opens[-2] > context.prev_day_close > intraday_closes[-1]
         is_trade = prev_loss < threshold and is_cross
@@ -176,8 +178,8 @@ class CrossCloseProcessor(Processor):
         market_open_index = context.market_open_index
         if market_open_index is None:
             return
-        intraday_highs = context.intraday_lookback['High'].to_numpy()[market_open_index:]
-        intraday_closes = context.intraday_lookback['Close'].to_numpy()[market_open_index:]
+        intraday_highs = context.intraday_highs[market_open_index:]
+        intraday_closes = context.intraday_closes[market_open_index:]
         if len(intraday_closes) < n_bar + 1:
             return
         if intraday_closes[-2] < context.prev_day_close < intraday_highs[-1]:
@@ -189,7 +191,7 @@ class CrossCloseProcessor(Processor):
         prev_gain = intraday_closes[-2] / intraday_closes[-n_bar] - 1
         if prev_gain < context.l2h_avg * 0.5:
             return
-        intraday_opens = context.intraday_lookback['Open'].to_numpy()[market_open_index:]
+        intraday_opens = context.intraday_opens[market_open_index:]
         if intraday_opens[0] > context.prev_day_close:
             return
         ups = []
@@ -229,7 +231,7 @@ class CrossCloseProcessor(Processor):
         position = self._positions[context.symbol]
         side = position['side']
         if side == 'short':
-            intraday_closes = context.intraday_lookback['Close'].to_numpy()
+            intraday_closes = context.intraday_closes
             take_profit = (
                 context.current_time == position['entry_time'] + datetime.timedelta(minutes=5)
                 and context.current_price < intraday_closes[-2]
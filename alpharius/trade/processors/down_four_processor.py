@@ -56,12 +56,12 @@ class DownFourProcessor(Processor):
         market_open_index = context.market_open_index
         if market_open_index is None:
             return
-        intraday_closes = context.intraday_lookback['Close'].tolist()[market_open_index:]
+        intraday_closes = context.intraday_closes[market_open_index:].tolist()
         if len(intraday_closes) < N:
             return
         if abs(context.current_price / context.prev_day_close - 1) > 0.5:
             return
-        intraday_opens = context.intraday_lookback['Open'].tolist()[market_open_index:]
+        intraday_opens = context.intraday_opens[market_open_index:].tolist()
         if intraday_opens[-N] > context.prev_day_close > intraday_closes[-1]:
             return
         losses = [intraday_closes[i] / intraday_opens[i] - 1 for i in range(-N, 0)]
@@ -55,9 +55,9 @@ class DownFourV2Processor(Processor):
         if context.current_price > context.prev_day_close * 1.15:
             return
 
-        intraday_closes = context.intraday_lookback['Close'].tolist()[market_open_index:]
-        intraday_opens = context.intraday_lookback['Open'].tolist()[market_open_index:]
-        intraday_vols = context.intraday_lookback['Volume'].tolist()[market_open_index:]
+        intraday_closes = context.intraday_closes[market_open_index:].tolist()
+        intraday_opens = context.intraday_opens[market_open_index:].tolist()
+        intraday_vols = context.intraday_volumes[market_open_index:].tolist()
         h2l_avg = context.h2l_avg
 
         # Filters
@@ -83,8 +83,8 @@ class DownFourV2Processor(Processor):
             return
 
         current_bar_loss = bar_losses[-1]
-        current_high = context.intraday_lookback['High'].iloc[-1]
-        current_low = context.intraday_lookback['Low'].iloc[-1]
+        current_high = context.intraday_highs[-1]
+        current_low = context.intraday_lows[-1]
         current_bar_range = current_low / current_high - 1
         prev_bar_loss = bar_losses[-2]
 
@@ -106,7 +106,7 @@ class DownFourV2Processor(Processor):
 
     def _close_position(self, context: Context) -> Optional[ProcessorAction]:
         position = self._positions[context.symbol]
-        intraday_closes = context.intraday_lookback['Close'].tolist()
+        intraday_closes = context.intraday_closes.tolist()
         is_close = (
             context.current_time >= position['entry_time'] + datetime.timedelta(minutes=15)
             and len(intraday_closes) >= 4
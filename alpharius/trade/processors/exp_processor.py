@@ -62,13 +62,13 @@ class ExpProcessor(Processor):
         )
         if not (last_two_day_inc or (last_six_day_inc >= 5 and last_six_day_inc_strict >= 3)):
             return
-        intraday_closes = context.intraday_lookback['Close'].tolist()[market_open_index:]
-        intraday_opens = context.intraday_lookback['Open'].tolist()[market_open_index:]
+        intraday_closes = context.intraday_closes[market_open_index:].tolist()
+        intraday_opens = context.intraday_opens[market_open_index:].tolist()
         if context.current_price > intraday_opens[0]:
             return
         if context.current_price < intraday_opens[-1]:
             return
-        intraday_lows = context.intraday_lookback['Low'].tolist()[market_open_index:-1] or [1]
+        intraday_lows = context.intraday_lows[market_open_index:-1].tolist() or [1]
         if (
             context.current_price / min(intraday_closes) - 1 > 0.005
             or context.current_price / min(intraday_lows) - 1 > 0.01
@@ -98,7 +98,7 @@ class ExpProcessor(Processor):
         action_type = ActionType.SELL_TO_CLOSE if side == 'long' else ActionType.BUY_TO_CLOSE
         action = ProcessorAction(context.symbol, action_type, 1)
         market_open_index = context.market_open_index
-        intraday_closes = context.intraday_lookback['Close'].to_numpy()[market_open_index:]
+        intraday_closes = context.intraday_closes[market_open_index:]
         entry_index = len(intraday_closes) - (context.current_time - position['entry_time']).seconds // 300 - 1
         take_profit = False
         if entry_index >= 0:
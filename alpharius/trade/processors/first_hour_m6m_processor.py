@@ -54,8 +54,8 @@ class FirstHourM6mProcessor(Processor):
 
     def _open_long_position(self, context: Context) -> Optional[ProcessorAction]:
         market_open_index = context.market_open_index
-        intraday_highs = context.intraday_lookback['High'].tolist()[market_open_index:]
-        intraday_closes = context.intraday_lookback['Close'].tolist()[market_open_index:]
+        intraday_highs = context.intraday_highs[market_open_index:].tolist()
+        intraday_closes = context.intraday_closes[market_open_index:].tolist()
         interday_closes = context.interday_lookback['Close'].tolist()
         interday_opens = context.interday_lookback['Open'].tolist()
         if len(interday_closes) < DAYS_IN_A_QUARTER:
@@ -96,10 +96,10 @@ class FirstHourM6mProcessor(Processor):
         if t != datetime.time(10, 0):
             return
         market_open_index = context.market_open_index
-        intraday_highs = context.intraday_lookback['High'].tolist()[market_open_index:]
-        intraday_lows = context.intraday_lookback['Low'].tolist()[market_open_index:]
-        intraday_closes = context.intraday_lookback['Close'].tolist()[market_open_index:]
-        intraday_opens = context.intraday_lookback['Open'].tolist()[market_open_index:]
+        intraday_highs = context.intraday_highs[market_open_index:].tolist()
+        intraday_lows = context.intraday_lows[market_open_index:].tolist()
+        intraday_closes = context.intraday_closes[market_open_index:].tolist()
+        intraday_opens = context.intraday_opens[market_open_index:].tolist()
         interday_closes = context.interday_lookback['Close'].tolist()
         if len(interday_closes) < DAYS_IN_A_QUARTER:
             return
@@ -71,14 +71,14 @@ class H2lFiveMinProcessor(Processor):
             return
         if context.current_price < 0.4 * self._get_quarterly_high(context):
             return
-        intraday_closes = context.intraday_lookback['Close'].tolist()[market_open_index:]
+        intraday_closes = context.intraday_closes[market_open_index:].tolist()
         if len(intraday_closes) < 2:
             return
         if context.current_price > np.min(intraday_closes):
             return
         if abs(context.current_price / context.prev_day_close - 1) > 0.5:
             return
-        intraday_opens = context.intraday_lookback['Open'].tolist()[market_open_index:]
+        intraday_opens = context.intraday_opens[market_open_index:].tolist()
         if intraday_opens[-2] > context.prev_day_close > intraday_closes[-1]:
             return
         prev_loss = intraday_closes[-2] / intraday_opens[-2] - 1
@@ -101,7 +101,7 @@ class H2lFiveMinProcessor(Processor):
 
     def _close_position(self, context: Context) -> Optional[ProcessorAction]:
         position = self._positions[context.symbol]
-        intraday_closes = context.intraday_lookback['Close'].to_numpy()
+        intraday_closes = context.intraday_closes
         take_profit = len(intraday_closes) >= 2 and context.current_price > intraday_closes[-2]
         is_close = take_profit or context.current_time >= position['entry_time'] + datetime.timedelta(minutes=15)
         self._logger.debug(
@@ -1,5 +1,5 @@
 import datetime
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
 from zoneinfo import ZoneInfo
 
 import numpy as np
@@ -29,9 +29,11 @@ class H2lHourProcessor(Processor):
         data_client: DataClient,
         output_dir: str,
         logging_timezone: Optional[ZoneInfo] = None,
+        params: Sequence[Tuple[int, float]] = PARAMS,
     ) -> None:
         super().__init__(output_dir, logging_timezone)
         self._positions = dict()
+        self._params = params
         self._stock_universe = IntradayVolatilityStockUniverse(
             lookback_start_date, lookback_end_date, data_client, num_stocks=10, num_top_volume=50
         )
@@ -68,15 +70,15 @@ class H2lHourProcessor(Processor):
         market_open_index = context.market_open_index
         if market_open_index is None:
             return
-        intraday_closes = context.intraday_lookback['Close'].tolist()[market_open_index:]
-        if len(intraday_closes) < PARAMS[0][0]:
+        intraday_closes = context.intraday_closes[market_open_index:].tolist()
+        if len(intraday_closes) < self._params[0][0]:
             return
         intraday_low = np.min(intraday_closes)
         if context.current_price > intraday_low and intraday_closes[-2] > intraday_low:
             return
         if abs(context.current_price / context.prev_day_close - 1) > 0.25:
             return
-        intraday_opens = context.intraday_lookback['Open'].tolist()[market_open_index:]
+        intraday_opens = context.intraday_opens[market_open_index:].tolist()
         if intraday_opens[-1] > context.prev_day_close > intraday_closes[-1]:
             return
         # If the price has already dropped a lot in the quarter, skip
@@ -96,7 +98,7 @@ class H2lHourProcessor(Processor):
         h2l_avg = context.h2l_avg
         h2l_std = context.h2l_std
         lower_threshold = max(h2l_avg - 3 * h2l_std, -0.5)
-        for n, z in PARAMS:
+        for n, z in self._params:
             if len(intraday_closes) < n:
                 continue
             current_loss = context.current_price / intraday_closes[-n] - 1
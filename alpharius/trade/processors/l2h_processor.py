@@ -77,8 +77,8 @@ class L2hProcessor(Processor):
         market_open_index = context.market_open_index
         if market_open_index is None:
             return
-        intraday_closes = context.intraday_lookback['Close'].to_numpy()[market_open_index:]
-        intraday_opens = context.intraday_lookback['Open'].to_numpy()[market_open_index:]
+        intraday_closes = context.intraday_closes[market_open_index:]
+        intraday_opens = context.intraday_opens[market_open_index:]
         if len(intraday_closes) < 10:
             return
         if context.current_price < np.max(intraday_closes):
@@ -119,7 +119,7 @@ class L2hProcessor(Processor):
 
     def _close_position(self, context: Context) -> Optional[ProcessorAction]:
         position = self._positions[context.symbol]
-        intraday_closes = list(context.intraday_lookback['Close'])
+        intraday_closes = context.intraday_closes.tolist()
         take_profit = (
             context.current_time == position['entry_time'] + datetime.timedelta(minutes=10)
             and len(intraday_closes) >= 3
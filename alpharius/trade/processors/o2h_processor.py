@@ -78,7 +78,7 @@ class O2hProcessor(Processor):
         market_open_price = context.today_open
         if market_open_price is None:
             return
-        intraday_closes = context.intraday_lookback['Close'].tolist()
+        intraday_closes = context.intraday_closes.tolist()
         if len(intraday_closes) < 3:
             return
         if context.current_price < context.prev_day_close:
@@ -81,9 +81,9 @@ class O2lProcessor(Processor):
         market_open_index = context.market_open_index
         if market_open_index is None:
             return
-        intraday_opens = context.intraday_lookback['Open'].to_numpy()[market_open_index:]
+        intraday_opens = context.intraday_opens[market_open_index:]
         market_open_price = intraday_opens[0]
-        intraday_closes = context.intraday_lookback['Close'].to_numpy()[market_open_index:]
+        intraday_closes = context.intraday_closes[market_open_index:]
         if intraday_closes[-1] > np.min(intraday_closes):
             return
         if context.current_price < context.prev_day_close < market_open_price and t <= datetime.time(10, 0):
@@ -109,7 +109,7 @@ class O2lProcessor(Processor):
 
     def _close_position(self, context: Context) -> Optional[ProcessorAction]:
         position = self._positions[context.symbol]
-        intraday_closes = context.intraday_lookback['Close'].tolist()
+        intraday_closes = context.intraday_closes.tolist()
         elapsed_fifteen = context.current_time == position['entry_time'] + datetime.timedelta(minutes=15)
         take_profit = elapsed_fifteen and len(intraday_closes) >= 4 and intraday_closes[-1] > intraday_closes[-4]
         early_stop = (
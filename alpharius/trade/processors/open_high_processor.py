@@ -71,14 +71,14 @@ class OpenHighProcessor(Processor):
         # If 80% of the monthly growth is contirbued by last week
         if week_low / month_low - 1 < 0.2 * month_gain:
             return
-        intraday_opens = context.intraday_lookback['Open'].tolist()[market_open_index:]
+        intraday_opens = context.intraday_opens[market_open_index:].tolist()
         open_price = intraday_opens[0]
         open_gain = open_price / context.prev_day_close - 1
         if open_gain < context.l2h_avg:
             return
         if context.current_price < context.prev_day_close:
             return
-        intraday_closes = context.intraday_lookback['Close'].tolist()[market_open_index:]
+        intraday_closes = context.intraday_closes[market_open_index:].tolist()
         n = 4
         if len(intraday_closes) < n:
             return
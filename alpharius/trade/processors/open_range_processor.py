@@ -61,7 +61,7 @@ class OpenRangeProcessor(Processor):
             return
         if context.current_time.time() >= datetime.time(14, 30):
             return
-        intraday_closes = context.intraday_lookback['Close'].to_numpy()[market_open_index:]
+        intraday_closes = context.intraday_closes[market_open_index:]
         if len(intraday_closes) < n_long + 1:
             return
         min_range, max_range = self._get_range(context)
@@ -95,7 +95,7 @@ class OpenRangeProcessor(Processor):
         else:
             if n_dec > 2:
                 return
-        intraday_opens = context.intraday_lookback['Open'].iloc[market_open_index:].to_numpy()
+        intraday_opens = context.intraday_opens[market_open_index:]
         for i in range(len(intraday_closes) - n_long):
             if intraday_closes[i] > level and intraday_closes[i] > intraday_opens[i]:
                 break
@@ -131,7 +131,7 @@ class OpenRangeProcessor(Processor):
                 minutes=60
             ) or context.current_time.time() >= datetime.time(16, 0)
             if not is_close:
-                intraday_closes = context.intraday_lookback['Close'].to_numpy()
+                intraday_closes = context.intraday_closes
                 if (
                     intraday_closes[-1]
                     < intraday_closes[-2]
@@ -153,8 +153,8 @@ class OpenRangeProcessor(Processor):
 
     def _get_range(self, context: Context) -> tuple[float, float]:
         market_open_index = context.market_open_index
-        intraday_closes = context.intraday_lookback['Close'].to_numpy()[market_open_index:]
-        intraday_opens = context.intraday_lookback['Open'].to_numpy()[market_open_index:]
+        intraday_closes = context.intraday_closes[market_open_index:]
+        intraday_opens = context.intraday_opens[market_open_index:]
         max_range = max(max(intraday_closes[:12]), max(intraday_opens[:12]))
         min_range = min(min(intraday_closes[:12]), min(intraday_opens[:12]))
         return min_range, max_range
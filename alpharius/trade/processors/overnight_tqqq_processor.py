@@ -26,8 +26,8 @@ class OvernightTqqqProcessor(Processor):
         market_open_index = context.market_open_index
         if market_open_index is None:
             return
-        intraday_high = max(context.intraday_lookback['High'].values[market_open_index:])
-        intraday_low = min(context.intraday_lookback['Low'].values[market_open_index:])
+        intraday_high = max(context.intraday_highs[market_open_index:])
+        intraday_low = min(context.intraday_lows[market_open_index:])
         intraday_change = intraday_high / intraday_low - 1
         interday_closes = context.interday_lookback['Close'].values
         interday_opens = context.interday_lookback['Open'].values
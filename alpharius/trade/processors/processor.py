@@ -12,6 +12,7 @@ from alpharius.data import DataClient
 
 from ..common import logging_config
 from ..enums import PositionStatus, TradingFrequency
+from ..stock_universe import BaseStockUniverse, CachedStockUniverse
 from ..structs import Context, Position, ProcessorAction
 
 
@@ -27,6 +28,7 @@ class Processor(abc.ABC):
             timezone=logging_timezone,
         )
         self._positions = dict()
+        self._stock_universe: Optional[BaseStockUniverse] = None
 
     @property
     def name(self) -> str:
@@ -39,6 +41,22 @@ class Processor(abc.ABC):
     def get_stock_universe(self, view_time: pd.Timestamp) -> List[str]:
         raise NotImplementedError('Calling parent interface')
 
+    def get_prefetch_symbols(self, view_time: pd.Timestamp) -> List[str]:
+        """Gets symbols of the stock universe and positions, to load their data ahead of view_time.
+
+        Unlike get_stock_universe(), it does not change the processor state, so it can be called
+        for any day at any time.
+        """
+        symbols = set(self._positions)
+        if self._stock_universe is not None:
+            symbols.update(self._stock_universe.get_stock_universe(view_time))
+        return list(symbols)
+
+    def precompute_stock_universe(self, view_times: List[pd.Timestamp]) -> None:
+        """Computes stock universes of many days at once, if the processor's universe is cached."""
+        if isinstance(self._stock_universe, CachedStockUniverse):
+            self._stock_universe.precompute(view_times)
+
     def process_data(self, context: Context) -> Optional[ProcessorAction]:
         return None
 
@@ -107,6 +125,6 @@ def instantiate_processor(
             init_kwargs[param.name] = logging_timezone
         elif param.name in kwargs:
             init_kwargs[param.name] = kwargs[param.name]
-        elif param.name != 'self':
+        elif param.name != 'self' and param.default is inspect.Parameter.empty:
             raise ValueError(f'Input parameter {param.name} not defined in {class_name}')
     return processor_class(**init_kwargs)
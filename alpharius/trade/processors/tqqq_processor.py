@@ -82,8 +82,8 @@ class TqqqProcessor(Processor):
             return
         interday_closes = context.interday_lookback['Close'].to_numpy()
         market_open_index = context.market_open_index
-        intraday_closes = context.intraday_lookback['Close'].to_numpy()[market_open_index:]
-        intraday_opens = context.intraday_lookback['Open'].to_numpy()[market_open_index:]
+        intraday_closes = context.intraday_closes[market_open_index:]
+        intraday_opens = context.intraday_opens[market_open_index:]
         # short
         l2h = context.l2h_avg
         short_t = 26
@@ -152,9 +152,9 @@ class TqqqProcessor(Processor):
         if t != datetime.time(10, 0):
             return
         market_open_index = context.market_open_index
-        intraday_highs = context.intraday_lookback['High'].iloc[market_open_index:].to_numpy()
-        intraday_opens = context.intraday_lookback['Open'].iloc[market_open_index:].to_numpy()
-        intraday_closes = context.intraday_lookback['Close'].iloc[market_open_index:].to_numpy()
+        intraday_highs = context.intraday_highs[market_open_index:]
+        intraday_opens = context.intraday_opens[market_open_index:]
+        intraday_closes = context.intraday_closes[market_open_index:]
         if len(intraday_highs) != 6:
             return
         cnt = 0
@@ -200,8 +200,8 @@ class TqqqProcessor(Processor):
         if interday_closes[-1] > np.max(interday_closes[-DAYS_IN_A_MONTH:]) * 0.9:
             return
         market_open_index = context.market_open_index
-        intraday_opens = context.intraday_lookback['Open'].to_numpy()[market_open_index:]
-        intraday_closes = context.intraday_lookback['Close'].to_numpy()[market_open_index:]
+        intraday_opens = context.intraday_opens[market_open_index:]
+        intraday_closes = context.intraday_closes[market_open_index:]
         change_from_open = context.current_price / intraday_opens[0] - 1
         change_from_close = context.current_price / context.prev_day_close - 1
         h2l = context.h2l_avg
@@ -270,7 +270,7 @@ class TqqqProcessor(Processor):
             if day_change > 0.3 * context.h2l_avg:
                 return
         market_open_index = context.market_open_index
-        intraday_closes = context.intraday_lookback['Close'].iloc[market_open_index:].to_numpy()
+        intraday_closes = context.intraday_closes[market_open_index:]
         if len(intraday_closes) < 5:
             return
         change_today = context.current_price / context.prev_day_close - 1
@@ -321,12 +321,12 @@ class TqqqProcessor(Processor):
         market_open_index = context.market_open_index
         if market_open_index is None:
             return
-        intraday_opens = context.intraday_lookback['Open'].iloc[market_open_index:].to_numpy()
+        intraday_opens = context.intraday_opens[market_open_index:]
         open_price = intraday_opens[0]
         open_gain = open_price / context.prev_day_close - 1
         if open_gain < context.l2h_avg:
             return
-        intraday_closes = context.intraday_lookback['Close'].iloc[market_open_index:].to_numpy()
+        intraday_closes = context.intraday_closes[market_open_index:]
         if len(intraday_closes) < 19:
             return
         for i in [-1, -7, -13]:
@@ -372,8 +372,8 @@ class TqqqProcessor(Processor):
         market_open_index = context.market_open_index
         if market_open_index is None:
             return
-        intraday_opens = context.intraday_lookback['Open'].to_numpy()[market_open_index:]
-        intraday_closes = context.intraday_lookback['Close'].to_numpy()[market_open_index:]
+        intraday_opens = context.intraday_opens[market_open_index:]
+        intraday_closes = context.intraday_closes[market_open_index:]
         if len(intraday_closes) < n:
             return
         if not cmp3_operator(intraday_closes[-1], context.prev_day_close, intraday_opens[-1]):
@@ -417,8 +417,8 @@ class TqqqProcessor(Processor):
         market_open_index = context.market_open_index
         if market_open_index is None:
             return
-        intraday_closes = context.intraday_lookback['Close'].iloc[market_open_index:].to_numpy()
-        intraday_opens = context.intraday_lookback['Open'].iloc[market_open_index:].to_numpy()
+        intraday_closes = context.intraday_closes[market_open_index:]
+        intraday_opens = context.intraday_opens[market_open_index:]
         if len(intraday_closes) < 12:
             return
         if not (intraday_closes[-1] > intraday_opens[-1] and intraday_closes[-2] < intraday_opens[-2]):
@@ -477,13 +477,13 @@ class TqqqProcessor(Processor):
         )
         if not (last_two_day_inc or (last_six_day_inc >= 5 and last_six_day_inc_strict >= 3)):
             return
-        intraday_closes = context.intraday_lookback['Close'].iloc[market_open_index:].to_numpy()
-        intraday_opens = context.intraday_lookback['Open'].iloc[market_open_index:].to_numpy()
+        intraday_closes = context.intraday_closes[market_open_index:]
+        intraday_opens = context.intraday_opens[market_open_index:]
         if context.current_price > intraday_opens[0]:
             return
         if context.current_price < intraday_opens[-1]:
             return
-        intraday_lows = context.intraday_lookback['Low'].iloc[market_open_index:-1].to_list() or [1]
+        intraday_lows = context.intraday_lows[market_open_index:-1].tolist() or [1]
         if (
             context.current_price / min(intraday_closes) - 1 > 0.005
             or context.current_price / min(intraday_lows) - 1 > 0.01
@@ -513,7 +513,7 @@ class TqqqProcessor(Processor):
             return action
 
         market_open_index = context.market_open_index
-        intraday_closes = context.intraday_lookback['Close'].to_numpy()[market_open_index:]
+        intraday_closes = context.intraday_closes[market_open_index:]
         entry_index = len(intraday_closes) - (context.current_time - position['entry_time']).seconds // 300 - 1
         entry_price = intraday_closes[entry_index] if entry_index >= 0 else None
         strategy = position['strategy']
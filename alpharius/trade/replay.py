@@ -0,0 +1,203 @@
+import datetime
+import os
+import threading
+import uuid
+from typing import Dict, List, Optional, Type, Union
+
+import alpaca.trading as trading
+import pandas as pd
+
+from alpharius.data import DataClient, ReplayDataClient, SimulatedClock
+from alpharius.utils import TIME_ZONE
+
+from .common import MARKET_CLOSE, MARKET_OPEN, OUTPUT_DIR
+from .live import Live
+from .processors.processor import Processor
+
+_INITIAL_CASH = 100000
+# Live does not start if market open is more than one hour away
+_START_BEFORE_OPEN = datetime.timedelta(minutes=30)
+
+
+class ReplayTradingClient:
+    """Stand-in of the Alpaca trading client for replaying a historical day.
+
+    Orders are filled immediately at the last trade price of the replay data client. The
+    account starts with cash only and keeps positions and orders in memory.
+    """
+
+    def __init__(self, data_client: ReplayDataClient, clock: SimulatedClock, cash: float = _INITIAL_CASH) -> None:
+        self._data_client = data_client
+        self._clock = clock
+        self._cash = cash
+        self._positions: Dict[str, trading.Position] = {}
+        self._orders: List[trading.Order] = []
+        self._lock = threading.Lock()
+
+    def _get_market_time(self, t: datetime.time) -> pd.Timestamp:
+        return pd.Timestamp.combine(self._clock.now().date(), t).tz_localize(TIME_ZONE)
+
+    def get_clock(self) -> trading.Clock:
+        now = self._clock.now()
+        market_open = self._get_market_time(MARKET_OPEN)
+        market_close = self._get_market_time(MARKET_CLOSE)
+        next_open = market_open if now < market_open else market_open + datetime.timedelta(days=1)
+        next_close = market_close if now < market_close else market_close + datetime.timedelta(days=1)
+        return trading.Clock(
+            timestamp=now, is_open=market_open <= now < market_close, next_open=next_open, next_close=next_close
+        )
+
+    def get_calendar(self, filters: trading.GetCalendarRequest) -> List[trading.Calendar]:
+        """Gets weekdays in the requested range. Market holidays are not known to the replay."""
+        return [
+            trading.Calendar(
+                date=date.strftime('%F'), open=MARKET_OPEN.strftime('%H:%M'), close=MARKET_CLOSE.strftime('%H:%M')
+            )
+            for date in pd.date_range(filters.start, filters.end)
+            if date.isoweekday() < 6
+        ]
+
+    def get_account(self) -> trading.TradeAccount:
+        with self._lock:
+            symbols = list(self._positions)
+            prices = self._data_client.get_last_trades(symbols)
+            equity = self._cash
+            for symbol, position in self._positions.items():
+                equity += float(position.qty) * prices.get(symbol, float(position.avg_entry_price))
+            return trading.TradeAccount(
+                id=uuid.uuid4(),
+                account_number='replay',
+                status=trading.AccountStatus.ACTIVE,
+                cash=str(self._cash),
+                equity=str(equity),
+                daytrading_buying_power=str(4 * equity),
+            )
+
+    def get_all_positions(self) -> List[trading.Position]:
+        with self._lock:
+            return list(self._positions.values())
+
+    def submit_order(self, order_data: trading.OrderRequest) -> trading.Order:
+        symbol = order_data.symbol
+        price = self._data_client.get_last_trades([symbol])[symbol]
+        qty = order_data.qty if order_data.qty is not None else order_data.notional / price
+        signed_qty = qty if order_data.side == trading.OrderSide.BUY else -qty
+        now = self._clock.now()
+        with self._lock:
+            self._cash -= signed_qty * price
+            position = self._positions.pop(symbol, None)
+            old_qty = float(position.qty) if position else 0
+            entry_price = float(position.avg_entry_price) if position else price
+            new_qty = old_qty + signed_qty
+            if old_qty * new_qty < 0 or not old_qty:
+                entry_price = price
+            elif abs(new_qty) > abs(old_qty):
+                entry_price = (entry_price * old_qty + price * signed_qty) / new_qty
+            if new_qty:
+                self._positions[symbol] = _get_position(symbol, new_qty, entry_price, price)
+            order = trading.Order(
+                id=uuid.uuid4(),
+                client_order_id=str(uuid.uuid4()),
+                created_at=now,
+                updated_at=now,
+                submitted_at=now,
+                filled_at=now,
+                asset_id=uuid.uuid4(),
+                symbol=symbol,
+                asset_class=trading.AssetClass.US_EQUITY,
+                qty=str(qty),
+                filled_qty=str(qty),
+                filled_avg_price=str(price),
+                order_class=trading.OrderClass.SIMPLE,
+                order_type=order_data.type,
+                type=order_data.type,
+                side=order_data.side,
+                time_in_force=order_data.time_in_force,
+                status=trading.OrderStatus.FILLED,
+                extended_hours=False,
+            )
+            self._orders.append(order)
+        return order
+
+    def get_order_by_id(self, order_id: str) -> trading.Order:
+        with self._lock:
+            for order in self._orders:
+                if str(order.id) == str(order_id):
+                    return order
+        raise ValueError(f'Order {order_id} not found')
+
+    def get_orders(self, filter: trading.GetOrdersRequest) -> List[trading.Order]:
+        with self._lock:
+            orders = [
+                order
+                for order in self._orders
+                if (filter.after is None or order.submitted_at >= filter.after)
+                and (filter.until is None or order.submitted_at <= filter.until)
+            ]
+        if filter.direction == trading.Sort.DESC:
+            orders = orders[::-1]
+        return orders[: filter.limit] if filter.limit else orders
+
+
+def _get_position(symbol: str, qty: float, entry_price: float, price: float) -> trading.Position:
+    return trading.Position(
+        asset_id=uuid.uuid4(),
+        symbol=symbol,
+        exchange=trading.AssetExchange.NASDAQ,
+        asset_class=trading.AssetClass.US_EQUITY,
+        avg_entry_price=str(entry_price),
+        qty=str(qty),
+        side=trading.PositionSide.LONG if qty > 0 else trading.PositionSide.SHORT,
+        market_value=str(qty * price),
+        cost_basis=str(qty * entry_price),
+        unrealized_pl=str(qty * (price - entry_price)),
+        unrealized_plpc=str(price / entry_price - 1),
+        unrealized_intraday_pl=str(qty * (price - entry_price)),
+        unrealized_intraday_plpc=str(price / entry_price - 1),
+        current_price=str(price),
+        lastday_price=str(entry_price),
+        change_today='0',
+    )
+
+
+def run_replay(
+    processors: List[Union[Type[Processor], Processor]],
+    day: pd.Timestamp,
+    data_client: DataClient,
+    symbols: Optional[List[str]] = None,
+    speed: Optional[float] = None,
+) -> Dict[pd.Timestamp, float]:
+    """Runs live trading over a historical day with recorded bars and simulated fills.
+
+    Nothing is recorded in the database, and logs are written under the replay outputs.
+
+    Parameters:
+        processors: Processors to trade with.
+        day: The day to replay.
+        data_client: Data client to load recorded bars from.
+        symbols: Symbols whose bars are loaded before the replay starts, so that checkpoint
+            latencies do not include fetching them.
+        speed: Acceleration of waits in the replay. None to skip waits entirely.
+
+    Returns:
+        Seconds spent on processing each checkpoint.
+    """
+    if not day.tzinfo:
+        day = day.tz_localize(TIME_ZONE)
+    start = pd.Timestamp.combine(day.date(), MARKET_OPEN).tz_localize(TIME_ZONE) - _START_BEFORE_OPEN
+    clock = SimulatedClock(start, speed)
+    replay_data_client = ReplayDataClient(data_client, day, clock)
+    if symbols:
+        replay_data_client.load(symbols)
+    trading_client = ReplayTradingClient(replay_data_client, clock)
+    # Simulated fills must not reach the database, and logs must not overwrite the ones of live trading
+    live = Live(
+        processors,
+        replay_data_client,
+        trading_client=trading_client,
+        clock=clock,
+        output_dir=os.path.join(OUTPUT_DIR, 'replay', day.strftime('%F')),
+        record=False,
+    )
+    live.run()
+    return live.checkpoint_latencies
@@ -1,16 +1,21 @@
 import abc
 import datetime
+import fcntl
 import functools
 import inspect
 import json
+import multiprocessing
 import os
-from typing import List
+import threading
+import weakref
+from concurrent import futures
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import alpaca.trading as trading
 import numpy as np
 import pandas as pd
 
-from alpharius.data import DataClient, load_interday_dataset
+from alpharius.data import DataClient, InterdayPanel, load_interday_dataset
 from alpharius.utils import (
     ALPACA_API_KEY_ENV,
     ALPACA_SECRET_KEY_ENV,
@@ -24,11 +29,15 @@ from .common import (
     CACHE_DIR,
     DAYS_IN_A_MONTH,
     DAYS_IN_A_QUARTER,
-    timestamp_to_index,
 )
 from .constants import COMPANY_SYMBOLS
 
 _STOCK_UNIVERSE_CACHE_ROOT = os.path.join(CACHE_DIR, 'stock_universe')
+# Days below which computing in a worker process does not pay off the fork
+_MIN_DAYS_PER_WORKER = 50
+
+# Universe being precomputed, inherited by forked workers
+_precompute_universe = None
 
 
 class SaveInitMeta(type):
@@ -54,23 +63,54 @@ class SaveInitMeta(type):
         return super().__new__(mcs, name, bases, attrs)
 
 
+class StockUniverseMeta(SaveInitMeta):
+    """Shares one instance among universes created with the same class and init args.
+
+    Processors commonly create identical universes. Instances are kept as long as anything
+    refers to them. Objects hashed by their class only, i.e. data clients, must be the same
+    object for instances to be shared. Universes with args that cannot be hashed are not shared.
+    """
+
+    _instances = weakref.WeakValueDictionary()
+    _lock = threading.RLock()
+
+    def __call__(cls, *args, **kwargs):
+        bound_args = inspect.signature(cls.__init__).bind(None, *args, **kwargs)
+        bound_args.apply_defaults()
+        init_args = list(bound_args.arguments.items())[1:]
+        try:
+            args_hash = hash_object(dict(init_args))
+        except ValueError:
+            return super().__call__(*args, **kwargs)
+        key = (cls, args_hash, tuple(id(value) for _, value in init_args if hasattr(value, '__to_hash__')))
+        with cls._lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = super().__call__(*args, **kwargs)
+                cls._instances[key] = instance
+            return instance
+
+
+@functools.lru_cache(maxsize=16)
+def get_market_dates(start_date: datetime.date, end_date: datetime.date) -> Tuple[datetime.date, ...]:
+    """Gets market dates between start_date and end_date, both inclusive."""
+    api_key = os.environ[ALPACA_API_KEY_ENV]
+    secret_key = os.environ[ALPACA_SECRET_KEY_ENV]
+    trading_client = trading.TradingClient(api_key, secret_key)
+    calendar = trading_client.get_calendar(filters=trading.GetCalendarRequest(start=start_date, end=end_date))
+    return tuple(day.date for day in calendar)
+
+
 class BaseStockUniverse:
     """Stock universe returns all tradable symbols."""
 
     def __init__(self, lookback_start_date: pd.Timestamp, lookback_end_date: pd.Timestamp) -> None:
-        api_key = os.environ[ALPACA_API_KEY_ENV]
-        secret_key = os.environ[ALPACA_SECRET_KEY_ENV]
-        trading_client = trading.TradingClient(api_key, secret_key)
-        calendar = trading_client.get_calendar(
-            filters=trading.GetCalendarRequest(
-                start=lookback_start_date.date(),
-                end=lookback_end_date.date(),
-            )
-        )
         self._lookback_start_date = lookback_start_date
         self._lookback_end_date = lookback_end_date
-        self._market_dates = [day.date for day in calendar]
+        self._market_dates = get_market_dates(lookback_start_date.date(), lookback_end_date.date())
         self._cache_dir = None
+        self._cache = None
+        self._cache_lock = threading.Lock()
 
     @functools.lru_cache(maxsize=100)
     def get_prev_day(self, view_time: pd.Timestamp) -> pd.Timestamp:
@@ -85,57 +125,195 @@ class BaseStockUniverse:
         return get_all_symbols()
 
 
-class CachedStockUniverse(BaseStockUniverse, metaclass=SaveInitMeta):
-    """Cache mixin for stock universe."""
+@functools.lru_cache(maxsize=None)
+def _get_source_hash(cls: type) -> str:
+    """Hashes the source of a class and its bases in the same module."""
+
+    def get_nested(cls) -> str:
+        content = inspect.getsource(cls)
+        for base_cls in cls.__bases__:
+            if base_cls.__module__ == cls.__module__:
+                content += get_nested(base_cls)
+        return content
 
-    def get_source(self) -> str:
+    return hash_str(get_nested(cls))
 
-        def get_nested(cls) -> str:
-            content = inspect.getsource(cls)
-            for base_cls in cls.__bases__:
-                if base_cls.__module__ == cls.__module__:
-                    content += get_nested(base_cls)
-            return content
 
-        return get_nested(self.__class__)
+class CachedStockUniverse(BaseStockUniverse, metaclass=StockUniverseMeta):
+    """Cache mixin for stock universe.
+
+    Universes of all days are kept in one JSON lines file per universe config, each line
+    holding the universes of one or more days. The file is loaded once and appended to with a
+    single write for each batch of newly computed days. If a day appears more than once, its
+    last line wins.
+    """
 
     def get_cache_dir(self) -> str:
         if self._cache_dir:
             return self._cache_dir
         class_name = self.__class__.__name__
-        content = self.get_source()
         init_args_hash = hash_object(self._init_args)
-        cache_name = class_name + '_' + hash_str(content + init_args_hash)
+        cache_name = class_name + '_' + hash_str(_get_source_hash(self.__class__) + init_args_hash)
         self._cache_dir = os.path.join(_STOCK_UNIVERSE_CACHE_ROOT, cache_name)
         os.makedirs(self._cache_dir, exist_ok=True)
         return self._cache_dir
 
-    def get_stock_universe(self, view_time: pd.Timestamp) -> List[str]:
-        cache_file = os.path.join(self.get_cache_dir(), view_time.strftime('%F') + '.json')
+    def _get_cache_file(self) -> str:
+        return os.path.join(self.get_cache_dir(), 'stock_universe.jsonl')
+
+    def _load_cache(self) -> Dict[str, List[str]]:
+        if self._cache is not None:
+            return self._cache
+        cache = {}
+        cache_file = self._get_cache_file()
         if os.path.isfile(cache_file):
             with open(cache_file, 'r') as f:
-                try:
-                    return json.load(f)
-                except json.JSONDecodeError:
-                    pass
+                for line in f:
+                    try:
+                        cache.update(json.loads(line))
+                    except json.JSONDecodeError:
+                        # A line left partial by an interrupted write
+                        continue
+        self._cache = cache
+        return cache
+
+    def _save_cache(self, stock_universes: Dict[str, List[str]]) -> None:
+        """Adds universes of days to the cache and appends them to the cache file."""
+        self._load_cache().update(stock_universes)
+        with open(self._get_cache_file(), 'a') as f:
+            # Held until the file is closed after the write, so appends of processes sharing the
+            # cache do not interleave
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.write(json.dumps(stock_universes) + '\n')
+
+    def get_stock_universe(self, view_time: pd.Timestamp) -> List[str]:
+        key = view_time.strftime('%F')
+        with self._cache_lock:
+            stock_universe = self._load_cache().get(key)
+        if stock_universe is not None:
+            return stock_universe
         stock_universe = self.get_stock_universe_impl(view_time)
-        with open(cache_file, 'w') as f:
-            json.dump(stock_universe, f)
+        with self._cache_lock:
+            self._save_cache({key: stock_universe})
         return stock_universe
 
+    def precompute(self, view_times: Iterable[pd.Timestamp], num_workers: Optional[int] = None) -> None:
+        """Computes universes of all days not cached yet and caches them in one go.
+
+        The first missing day is computed in this process, which also loads the features the
+        universe shares with others. Remaining days are split among forked worker processes if
+        there are enough of them.
+
+        Parameters:
+            view_times: Times to view the universes at.
+            num_workers: Maximum number of worker processes. The number of CPUs by default.
+        """
+        global _precompute_universe
+        with self._cache_lock:
+            cache = self._load_cache()
+            missing = {}
+            for view_time in view_times:
+                key = view_time.strftime('%F')
+                if key not in cache:
+                    missing.setdefault(key, view_time)
+        if not missing:
+            return
+        view_times = list(missing.values())
+        stock_universes = _compute_stock_universes(view_times[:1], self)
+        view_times = view_times[1:]
+        num_workers = min(num_workers or os.cpu_count() or 1, len(view_times) // _MIN_DAYS_PER_WORKER)
+        if num_workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            _precompute_universe = self
+            try:
+                with futures.ProcessPoolExecutor(
+                    max_workers=num_workers, mp_context=multiprocessing.get_context('fork')
+                ) as pool:
+                    for res in pool.map(
+                        _compute_stock_universes, [view_times[i::num_workers] for i in range(num_workers)]
+                    ):
+                        stock_universes.update(res)
+            finally:
+                _precompute_universe = None
+        else:
+            stock_universes.update(_compute_stock_universes(view_times, self))
+        with self._cache_lock:
+            self._save_cache(stock_universes)
+
     @abc.abstractmethod
     def get_stock_universe_impl(self, view_time: pd.Timestamp) -> List[str]:
         raise NotImplementedError()
 
 
+def _compute_stock_universes(
+    view_times: List[pd.Timestamp], stock_universe: Optional[CachedStockUniverse] = None
+) -> Dict[str, List[str]]:
+    stock_universe = stock_universe or _precompute_universe
+    return {view_time.strftime('%F'): stock_universe.get_stock_universe_impl(view_time) for view_time in view_times}
+
+
+@functools.lru_cache(maxsize=2)
+def get_interday_panel(
+    lookback_start_date: pd.Timestamp, lookback_end_date: pd.Timestamp, data_client: DataClient
+) -> InterdayPanel:
+    """Gets the interday panel of all symbols, shared by everything loading the same range."""
+    return InterdayPanel(load_interday_dataset(get_all_symbols(), lookback_start_date, lookback_end_date, data_client))
+
+
+def _get_dollar_volume(panel: InterdayPanel) -> np.ndarray:
+    """Average dollar volume of the latest month."""
+    return panel.to_panel(panel.rolling_mean(panel.values('Close') * panel.values('Volume'), DAYS_IN_A_MONTH))
+
+
+def _get_intraday_range(panel: InterdayPanel) -> np.ndarray:
+    """Average range of the latest month relative to the previous close."""
+    closes = panel.values('Close')
+    prev_closes = np.full_like(closes, np.nan)
+    prev_closes[1:] = closes[:-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ranges = (panel.values('High') - panel.values('Low')) / prev_closes
+    return panel.to_panel(panel.rolling_mean(ranges, DAYS_IN_A_MONTH, first_row=1))
+
+
+def _get_l2h_avg(panel: InterdayPanel) -> np.ndarray:
+    """Average of low relative to high of the latest month."""
+    l2h = panel.values('Low') / panel.values('High') - 1
+    return panel.to_panel(panel.rolling_mean(l2h, DAYS_IN_A_MONTH, first_row=1))
+
+
+def _get_quarter_max_close(panel: InterdayPanel) -> np.ndarray:
+    """Highest close of the latest quarter, including the current bar."""
+    return panel.to_panel(panel.rolling_max(panel.values('Close'), DAYS_IN_A_QUARTER + 1))
+
+
+def _get_top(candidates: np.ndarray, scores: np.ndarray, num: int) -> np.ndarray:
+    """Gets the candidates with the highest scores, ordered by score descending and then by candidate.
+
+    Ties at the cutoff are broken by candidate as well.
+    """
+    return candidates[np.lexsort((candidates, -scores))[:num]]
+
+
 class DataBasedStockUniverse(BaseStockUniverse):
     def __init__(
         self, lookback_start_date: pd.Timestamp, lookback_end_date: pd.Timestamp, data_client: DataClient
     ) -> None:
         super().__init__(lookback_start_date, lookback_end_date)
-        self._historical_data = load_interday_dataset(
-            get_all_symbols(), lookback_start_date, lookback_end_date, data_client
-        )
+        self._panel = get_interday_panel(lookback_start_date, lookback_end_date, data_client)
+        self._historical_data = self._panel.frames
+        self._company_mask = np.isin(self._panel.symbols, COMPANY_SYMBOLS)
+
+    def _get_candidates(self, prev_day_ind: int, min_rows: int) -> np.ndarray:
+        """Gets indices of company symbols having a bar on a date, preceded by at least min_rows bars."""
+        return np.flatnonzero(self._company_mask & (self._panel.rows()[prev_day_ind] >= min_rows))
+
+    def _get_volatility_candidates(self, prev_day_ind: int, top_volume_symbols: List[str]) -> np.ndarray:
+        """Gets indices of top volume symbols having a month of bars and not far below their quarter high."""
+        candidates = self._get_candidates(prev_day_ind, DAYS_IN_A_MONTH)
+        top_volume = [self._panel.get_symbol_index(symbol) for symbol in top_volume_symbols]
+        candidates = candidates[np.isin(candidates, top_volume)]
+        prev_closes = self._panel.field('Close')[prev_day_ind, candidates]
+        quarter_max_closes = self._panel.feature('quarter_max_close', _get_quarter_max_close)[prev_day_ind, candidates]
+        return candidates[prev_closes >= 0.4 * quarter_max_closes]
 
 
 class TopVolumeUniverse(DataBasedStockUniverse, CachedStockUniverse):
@@ -147,34 +325,16 @@ class TopVolumeUniverse(DataBasedStockUniverse, CachedStockUniverse):
         num_stocks: int = 100,
     ) -> None:
         super().__init__(lookback_start_date, lookback_end_date, data_client)
-        self._company_symbols = set(COMPANY_SYMBOLS)
         self._num_stocks = num_stocks
 
-    def _get_dollar_volume(self, symbol: str, prev_day_ind: int) -> float:
-        hist = self._historical_data[symbol]
-        pv = [
-            hist['Close'].iloc[i] * hist['Volume'].iloc[i]
-            for i in range(max(prev_day_ind - DAYS_IN_A_MONTH + 1, 0), prev_day_ind + 1)
-        ]
-        return np.average(pv) if pv else 0
-
     def get_stock_universe_impl(self, view_time: pd.Timestamp) -> List[str]:
-        prev_day = self.get_prev_day(view_time)
-        dollar_volumes = []
-        for symbol, hist in self._historical_data.items():
-            if symbol not in self._company_symbols:
-                continue
-            if prev_day not in hist.index:
-                continue
-            prev_day_ind = timestamp_to_index(hist.index, prev_day)
-            if prev_day_ind is None or prev_day_ind < DAYS_IN_A_MONTH:
-                continue
-            prev_close = hist['Close'].iloc[prev_day_ind]
-            if prev_close < 5:
-                continue
-            dollar_volumes.append((symbol, self._get_dollar_volume(symbol, prev_day_ind)))
-        dollar_volumes.sort(key=lambda s: s[1], reverse=True)
-        return [s[0] for s in dollar_volumes[: self._num_stocks]]
+        prev_day_ind = self._panel.get_date_index(self.get_prev_day(view_time))
+        if prev_day_ind is None:
+            return []
+        candidates = self._get_candidates(prev_day_ind, DAYS_IN_A_MONTH)
+        candidates = candidates[self._panel.field('Close')[prev_day_ind, candidates] >= 5]
+        dollar_volumes = self._panel.feature('dollar_volume', _get_dollar_volume)[prev_day_ind, candidates]
+        return [self._panel.symbols[i] for i in _get_top(candidates, dollar_volumes, self._num_stocks)]
 
 
 class IntradayVolatilityStockUniverse(DataBasedStockUniverse, CachedStockUniverse):
@@ -188,42 +348,20 @@ class IntradayVolatilityStockUniverse(DataBasedStockUniverse, CachedStockUnivers
     ):
         super().__init__(lookback_start_date, lookback_end_date, data_client)
         self._top_volume = TopVolumeUniverse(lookback_start_date, lookback_end_date, data_client, num_top_volume)
-        self._company_symbols = set(COMPANY_SYMBOLS)
         self._num_stocks = num_stocks
 
-    def _get_intraday_range(self, symbol: str, prev_day_ind: int) -> float:
-        hist = self._historical_data[symbol]
-        res = []
-        for i in range(max(prev_day_ind - DAYS_IN_A_MONTH + 1, 1), prev_day_ind + 1):
-            h = hist['High'].iloc[i]
-            l = hist['Low'].iloc[i]
-            c = hist['Close'].iloc[i - 1]
-            res.append((h - l) / c)
-        return np.average(res) if res else 0
+    def precompute(self, view_times: Iterable[pd.Timestamp], num_workers: Optional[int] = None) -> None:
+        view_times = list(view_times)
+        self._top_volume.precompute(view_times, num_workers)
+        super().precompute(view_times, num_workers)
 
     def get_stock_universe_impl(self, view_time: pd.Timestamp) -> List[str]:
-        prev_day = self.get_prev_day(view_time)
-        intraday_volatility_list = []
-        top_volume_symbols = set(self._top_volume.get_stock_universe(view_time))
-        for symbol, hist in self._historical_data.items():
-            if symbol not in self._company_symbols:
-                continue
-            if symbol not in top_volume_symbols:
-                continue
-            if prev_day not in hist.index:
-                continue
-            prev_day_ind = timestamp_to_index(hist.index, prev_day)
-            if prev_day_ind is None or prev_day_ind < DAYS_IN_A_MONTH:
-                continue
-            prev_close = hist['Close'].iloc[prev_day_ind]
-            start_ind = max(prev_day_ind - DAYS_IN_A_QUARTER, 0)
-            if prev_close < 0.4 * np.max(hist['Close'][start_ind : prev_day_ind + 1]):
-                continue
-            intraday_volatility = self._get_intraday_range(symbol, prev_day_ind)
-            intraday_volatility_list.append((symbol, intraday_volatility))
-
-        intraday_volatility_list.sort(key=lambda s: s[1], reverse=True)
-        return [s[0] for s in intraday_volatility_list[: self._num_stocks]]
+        prev_day_ind = self._panel.get_date_index(self.get_prev_day(view_time))
+        if prev_day_ind is None:
+            return []
+        candidates = self._get_volatility_candidates(prev_day_ind, self._top_volume.get_stock_universe(view_time))
+        intraday_ranges = self._panel.feature('intraday_range', _get_intraday_range)[prev_day_ind, candidates]
+        return [self._panel.symbols[i] for i in _get_top(candidates, intraday_ranges, self._num_stocks)]
 
 
 class L2hVolatilityStockUniverse(DataBasedStockUniverse, CachedStockUniverse):
@@ -236,38 +374,18 @@ class L2hVolatilityStockUniverse(DataBasedStockUniverse, CachedStockUniverse):
     ):
         super().__init__(lookback_start_date, lookback_end_date, data_client)
         self._top_volume = TopVolumeUniverse(lookback_start_date, lookback_end_date, data_client, num_top_volume)
-        self._company_symbols = set(COMPANY_SYMBOLS)
 
-    def _get_l2h_avg(self, symbol: str, prev_day_ind: int) -> float:
-        hist = self._historical_data[symbol]
-        res = []
-        for i in range(max(prev_day_ind - DAYS_IN_A_MONTH + 1, 1), prev_day_ind + 1):
-            h = hist['High'].iloc[i]
-            l = hist['Low'].iloc[i]
-            res.append(l / h - 1)
-        return np.average(res) if res else 0
+    def precompute(self, view_times: Iterable[pd.Timestamp], num_workers: Optional[int] = None) -> None:
+        view_times = list(view_times)
+        self._top_volume.precompute(view_times, num_workers)
+        super().precompute(view_times, num_workers)
 
     def get_stock_universe_impl(self, view_time: pd.Timestamp) -> List[str]:
-        prev_day = self.get_prev_day(view_time)
-        top_volume_symbols = set(self._top_volume.get_stock_universe(view_time))
-        symbols = []
-        for symbol, hist in self._historical_data.items():
-            if symbol not in self._company_symbols:
-                continue
-            if symbol not in top_volume_symbols:
-                continue
-            if prev_day not in hist.index:
-                continue
-            prev_day_ind = timestamp_to_index(hist.index, prev_day)
-            if prev_day_ind is None or prev_day_ind < DAYS_IN_A_MONTH:
-                continue
-            prev_close = hist['Close'].iloc[prev_day_ind]
-            start_ind = max(prev_day_ind - DAYS_IN_A_QUARTER, 0)
-            if prev_close < 0.4 * np.max(hist['Close'][start_ind : prev_day_ind + 1]):
-                continue
-            l2h_avg = self._get_l2h_avg(symbol, prev_day_ind)
-            if l2h_avg < -0.05:
-                symbols.append((symbol, l2h_avg))
-        symbols.sort(key=lambda x: x[1])
-        symbols = symbols[:100]
-        return [s[0] for s in symbols]
+        prev_day_ind = self._panel.get_date_index(self.get_prev_day(view_time))
+        if prev_day_ind is None:
+            return []
+        candidates = self._get_volatility_candidates(prev_day_ind, self._top_volume.get_stock_universe(view_time))
+        l2h_avgs = self._panel.feature('l2h_avg', _get_l2h_avg)[prev_day_ind, candidates]
+        selected = l2h_avgs < -0.05
+        candidates, l2h_avgs = candidates[selected], l2h_avgs[selected]
+        return [self._panel.symbols[i] for i in _get_top(candidates, -l2h_avgs, 100)]
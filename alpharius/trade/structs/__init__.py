@@ -1,6 +1,6 @@
 from .action import Action
-from .context import Context
+from .context import Context, ContextBuilder, IntradayBars
 from .position import Position
 from .processor_action import ProcessorAction
 
-__all__ = ['Action', 'Context', 'Position', 'ProcessorAction']
+__all__ = ['Action', 'Context', 'ContextBuilder', 'IntradayBars', 'Position', 'ProcessorAction']
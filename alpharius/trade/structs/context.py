@@ -1,11 +1,36 @@
-from typing import Optional
+from typing import Dict, Optional
 
 import numpy as np
 import pandas as pd
 
+from alpharius.data import DATA_COLUMNS
+
 from ..common import DAYS_IN_A_MONTH, MARKET_OPEN
 from ..enums import Mode
 
+_MARKET_OPEN_SECONDS = MARKET_OPEN.hour * 3600 + MARKET_OPEN.minute * 60 + MARKET_OPEN.second
+
+
+def _get_market_open_index(index: pd.DatetimeIndex) -> int:
+    """Gets the position of the first bar at or after market open, or the length of index if none is."""
+    seconds = index.hour * 3600 + index.minute * 60 + index.second
+    after_open = np.flatnonzero(seconds >= _MARKET_OPEN_SECONDS)
+    return int(after_open[0]) if len(after_open) else len(index)
+
+
+class IntradayBars:
+    """5-minute bars of one symbol for a day as arrays.
+
+    Contexts of every step of the day view the arrays up to the bars known at the step, so that
+    no data frame is sliced unless a processor asks for one.
+    """
+
+    def __init__(self, frame: pd.DataFrame) -> None:
+        self.frame = frame
+        self.times = frame.index.as_unit('ns').asi8
+        self.columns: Dict[str, np.ndarray] = {column: frame[column].to_numpy() for column in DATA_COLUMNS}
+        self.market_open_index = _get_market_open_index(frame.index)
+
 
 class Context:
     def __init__(
@@ -14,35 +39,84 @@ class Context:
         current_time: pd.Timestamp,
         current_price: float,
         interday_lookback: pd.DataFrame,
-        intraday_lookback: Optional[pd.DataFrame],
+        intraday_lookback: Optional[pd.DataFrame] = None,
         mode: Optional['Mode'] = None,
+        intraday_bars: Optional[IntradayBars] = None,
+        intraday_end: int = 0,
     ) -> None:
+        """Instantiates a context.
+
+        Parameters:
+            symbol: Symbol of the context.
+            current_time: Time of the step.
+            current_price: Latest price of the symbol.
+            interday_lookback: Daily bars before the day.
+            intraday_lookback: 5-minute bars of the day so far.
+            mode: Mode of trading.
+            intraday_bars: 5-minute bars of the whole day, of which the first intraday_end bars
+                are known at the step. Used in place of intraday_lookback.
+            intraday_end: Number of bars of intraday_bars known at the step.
+        """
         self.symbol = symbol
         self.current_time = current_time
         self.current_price = current_price
         self.interday_lookback = interday_lookback
-        self.intraday_lookback = intraday_lookback
+        self._intraday_lookback = intraday_lookback
         self.mode = mode
+        self._intraday_bars = intraday_bars
+        self._intraday_end = intraday_end
         self._market_open_index = None
 
+    @property
+    def intraday_lookback(self) -> Optional[pd.DataFrame]:
+        if self._intraday_lookback is None and self._intraday_bars is not None:
+            self._intraday_lookback = self._intraday_bars.frame.iloc[: self._intraday_end]
+        return self._intraday_lookback
+
+    def _get_intraday_values(self, column: str) -> np.ndarray:
+        if self._intraday_bars is not None:
+            return self._intraday_bars.columns[column][: self._intraday_end]
+        return self.intraday_lookback[column].to_numpy()
+
+    @property
+    def intraday_opens(self) -> np.ndarray:
+        return self._get_intraday_values('Open')
+
+    @property
+    def intraday_highs(self) -> np.ndarray:
+        return self._get_intraday_values('High')
+
+    @property
+    def intraday_lows(self) -> np.ndarray:
+        return self._get_intraday_values('Low')
+
+    @property
+    def intraday_closes(self) -> np.ndarray:
+        return self._get_intraday_values('Close')
+
+    @property
+    def intraday_volumes(self) -> np.ndarray:
+        return self._get_intraday_values('Volume')
+
     @property
     def prev_day_close(self) -> float:
         return self.interday_lookback['Close'].iloc[-1]
 
     @property
     def market_open_index(self) -> Optional[int]:
-        if self._market_open_index is not None:
-            return self._market_open_index
-        for i in range(len(self.intraday_lookback)):
-            if self.intraday_lookback.index[i].time() >= MARKET_OPEN:
-                self._market_open_index = i
-                return i
-        return None
+        if self._market_open_index is None:
+            if self._intraday_bars is not None:
+                index, size = self._intraday_bars.market_open_index, self._intraday_end
+            else:
+                index, size = _get_market_open_index(self.intraday_lookback.index), len(self.intraday_lookback)
+            if index < size:
+                self._market_open_index = index
+        return self._market_open_index
 
     @property
     def today_open(self) -> float | None:
         p = self.market_open_index
-        return self.intraday_lookback['Open'].iloc[p] if p is not None else None
+        return self.intraday_opens[p] if p is not None else None
 
     @property
     def h2l_avg(self) -> float:
@@ -76,3 +150,46 @@ class Context:
             l2h_avg = np.average(l2h)
             self.interday_lookback.attrs[key] = l2h_avg
         return self.interday_lookback.attrs[key]
+
+
+class ContextBuilder:
+    """Builds contexts of the 5-minute steps of a day.
+
+    Bars are turned into arrays once a day. Each step advances a cursor of every symbol past the
+    bars started by then, which takes no search over timestamps.
+    """
+
+    def __init__(self, intraday_datas: Dict[str, pd.DataFrame], mode: Optional[Mode] = None) -> None:
+        self._bars = {symbol: IntradayBars(frame) for symbol, frame in intraday_datas.items()}
+        self._cursors = dict.fromkeys(self._bars, 0)
+        self._mode = mode
+
+    def build(
+        self,
+        symbol: str,
+        current_interval_start: pd.Timestamp,
+        current_time: pd.Timestamp,
+        interday_lookback: pd.DataFrame,
+    ) -> Optional[Context]:
+        """Builds the context of a symbol with bars up to the one starting at current_interval_start.
+
+        Steps of a symbol must come in time order. Returns None if the symbol has no bar starting
+        at current_interval_start.
+        """
+        bars = self._bars[symbol]
+        t = current_interval_start.value
+        end = self._cursors[symbol]
+        while end < len(bars.times) and bars.times[end] <= t:
+            end += 1
+        self._cursors[symbol] = end
+        if not end or bars.times[end - 1] != t:
+            return None
+        return Context(
+            symbol=symbol,
+            current_time=current_time,
+            current_price=bars.columns['Close'][end - 1],
+            interday_lookback=interday_lookback,
+            mode=self._mode,
+            intraday_bars=bars,
+            intraday_end=end,
+        )
@@ -0,0 +1,107 @@
+import functools
+import itertools
+import multiprocessing
+import os
+from concurrent import futures
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Type, Union
+
+import pandas as pd
+
+from alpharius.data import DataClient
+
+from .backtest import Backtest, Performance, get_market_dates
+from .processors.processor import Processor
+
+# Backtests being run, inherited by forked worker processes
+_sweep_backtests: List[Backtest] = []
+
+
+class BacktestResult(NamedTuple):
+    daily_equity: List[float]
+    performance: Performance
+
+
+def _run_backtest(index: int) -> BacktestResult:
+    backtest = _sweep_backtests[index]
+    backtest.run()
+    return BacktestResult(backtest.daily_equity, backtest.performance)
+
+
+def run_backtests(backtests: List[Backtest], num_workers: Optional[int] = None) -> List[BacktestResult]:
+    """Runs backtests side by side.
+
+    Interday data and stock universes of all backtests are loaded once here, with processors of
+    the first backtest, before backtests run in forked worker processes, which share them. The
+    backtests are expected to load the same interday range. Each backtest writes its output to
+    its own directory.
+
+    Parameters:
+        backtests: Backtests to run.
+        num_workers: Maximum number of worker processes. The number of CPUs by default.
+
+    Returns:
+        Results of the backtests, in order.
+    """
+    global _sweep_backtests
+    backtests[0].warm_stock_universes(sorted({day for backtest in backtests for day in backtest.market_dates}))
+    num_workers = min(num_workers or os.cpu_count() or 1, len(backtests))
+    _sweep_backtests = backtests
+    try:
+        if num_workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            with futures.ProcessPoolExecutor(
+                max_workers=num_workers, mp_context=multiprocessing.get_context('fork')
+            ) as pool:
+                return list(pool.map(_run_backtest, range(len(backtests))))
+        return [_run_backtest(i) for i in range(len(backtests))]
+    finally:
+        _sweep_backtests = []
+
+
+def get_param_grid(param_grid: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Gets all combinations of parameter values."""
+    names = list(param_grid)
+    return [dict(zip(names, values)) for values in itertools.product(*param_grid.values())]
+
+
+def run_sweep(
+    processor_class: Union[Type[Processor], functools.partial],
+    param_grid: Dict[str, Sequence[Any]],
+    start_date: Union[pd.Timestamp, str],
+    end_date: Union[pd.Timestamp, str],
+    data_client: DataClient,
+    num_workers: Optional[int] = None,
+    **kwargs,
+) -> pd.DataFrame:
+    """Backtests a processor with every combination of parameters in a grid.
+
+    Parameters:
+        processor_class: Processor class, or a partial of it, taking the parameters as keyword arguments.
+        param_grid: Values to try for each parameter.
+        start_date: First day of the backtests. Inclusive.
+        end_date: Last day of the backtests. Exclusive.
+        data_client: Data client to load bars from.
+        num_workers: Maximum number of worker processes. The number of CPUs by default.
+        kwargs: Other arguments of the backtests.
+
+    Returns:
+        A table with a row for each grid point, holding its parameters and performance.
+    """
+    if isinstance(start_date, str):
+        start_date = pd.to_datetime(start_date)
+    if isinstance(end_date, str):
+        end_date = pd.to_datetime(end_date)
+    grid = get_param_grid(param_grid)
+    market_dates = get_market_dates(start_date, end_date)
+    backtests = [
+        Backtest(
+            start_date=start_date,
+            end_date=end_date,
+            processors=[functools.partial(processor_class, **params)],
+            data_client=data_client,
+            market_dates=market_dates,
+            **kwargs,
+        )
+        for params in grid
+    ]
+    results = run_backtests(backtests, num_workers)
+    return pd.DataFrame([{**params, **result.performance._asdict()} for params, result in zip(grid, results)])
@@ -3,10 +3,11 @@ import datetime
 from typing import Type
 
 import matplotlib
+import pandas as pd
 from dateutil.relativedelta import relativedelta
 
 from alpharius.data import get_default_data_client
-from alpharius.trade import Backtest, Live, processors
+from alpharius.trade import Backtest, Live, processors, run_replay
 from alpharius.utils import get_latest_day
 
 # Interactive plot is not disabled when trading or backtesting is invoked.
@@ -53,11 +54,36 @@ def main():
     parser = argparse.ArgumentParser(description='Alpharius stock trading.')
 
     parser.add_argument(
-        '-m', '--mode', help='Running mode. Can be backtest or trade.', required=True, choices=['backtest', 'live']
+        '-m',
+        '--mode',
+        help='Running mode. Can be backtest, live or replay.',
+        required=True,
+        choices=['backtest', 'live', 'replay'],
     )
     parser.add_argument('--start_date', default=None, help='Start date of the backtesting. Only used in backtest mode.')
     parser.add_argument('--end_date', default=None, help='End date of the backtesting. Only used in backtest mode.')
+    parser.add_argument('--replay_date', default=None, help='Date to replay. Only used in replay mode.')
+    parser.add_argument(
+        '--speed',
+        type=float,
+        default=None,
+        help='Acceleration of waits. Only used in replay mode. Skip waits if unset.',
+    )
+    parser.add_argument(
+        '--streaming', action='store_true', help='Stream intraday bars instead of polling. Only used in live mode.'
+    )
     parser.add_argument('--ack_all', action='store_true', help='Ack all trade actions. Only used in backtest mode.')
+    parser.add_argument(
+        '--num_shards',
+        type=int,
+        default=1,
+        help='Number of processes to split days among. Only used in backtest mode.',
+    )
+    parser.add_argument(
+        '--attribution',
+        action='store_true',
+        help='Also backtest each processor on its own in parallel. Only used in backtest mode.',
+    )
     parser.add_argument(
         '--processors',
         nargs='+',
@@ -85,6 +111,8 @@ def main():
             processors=selected_processors,
             data_client=data_client,
             ack_all=args.ack_all,
+            num_shards=args.num_shards,
+            attribution=args.attribution,
         )
         runner.run()
     else:
@@ -93,8 +121,14 @@ def main():
             selected_processors = _filter_processors(PROCESSORS, args.processors)
             if not selected_processors:
                 parser.error(f'No processors matched: {args.processors}')
-        runner = Live(processors=selected_processors, data_client=data_client)
-        runner.run()
+        if args.mode == 'replay':
+            if not args.replay_date:
+                parser.error('--replay_date is required in replay mode')
+            latencies = run_replay(selected_processors, pd.Timestamp(args.replay_date), data_client, speed=args.speed)
+            print(pd.Series(latencies.values(), name='Checkpoint Latency (s)').describe().to_string())
+        else:
+            runner = Live(processors=selected_processors, data_client=data_client, streaming=args.streaming)
+            runner.run()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,151 @@
+import datetime
+import functools
+import math
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Type, Union
+
+import pandas as pd
+
+from alpharius.data import DataClient
+
+from .backtest import Backtest, Performance, compute_performance, get_market_dates
+from .common import INTERDAY_LOOKBACK_LOAD
+from .processors.processor import Processor
+from .sweep import get_param_grid, run_backtests
+
+
+class WalkForwardWindow(NamedTuple):
+    train_start: pd.Timestamp
+    train_end: pd.Timestamp
+    test_start: pd.Timestamp
+    test_end: pd.Timestamp
+    params: Dict[str, Any]
+    train_performance: Performance
+    test_performance: Performance
+
+
+class WalkForwardResult(NamedTuple):
+    windows: List[WalkForwardWindow]
+    equity: pd.Series
+    performance: Performance
+
+
+def get_windows(
+    start_date: pd.Timestamp, end_date: pd.Timestamp, train_period: pd.DateOffset, test_period: pd.DateOffset
+) -> List[Sequence[pd.Timestamp]]:
+    """Splits a date range into rolling train and test windows.
+
+    Each test window directly follows its train window, and the next windows start one test period later.
+    Dates are inclusive at the start and exclusive at the end.
+
+    Returns:
+        Train start, train end, test start and test end of each window.
+    """
+    windows = []
+    test_start = start_date + train_period
+    while test_start < end_date:
+        test_end = min(test_start + test_period, end_date)
+        windows.append((test_start - train_period, test_start, test_start, test_end))
+        test_start = test_end
+    if not windows:
+        raise ValueError(f'Range from {start_date.date()} to {end_date.date()} is too short for a train window')
+    return windows
+
+
+def _get_score(performance: Performance, metric: str) -> float:
+    score = getattr(performance, metric)
+    return -math.inf if math.isnan(score) else score
+
+
+def run_walk_forward(
+    processor_class: Union[Type[Processor], functools.partial],
+    param_grid: Dict[str, Sequence[Any]],
+    start_date: Union[pd.Timestamp, str],
+    end_date: Union[pd.Timestamp, str],
+    data_client: DataClient,
+    train_period: pd.DateOffset = pd.DateOffset(months=12),
+    test_period: pd.DateOffset = pd.DateOffset(months=3),
+    metric: str = 'sharpe_ratio',
+    num_workers: Optional[int] = None,
+) -> WalkForwardResult:
+    """Runs walk-forward optimization of a processor.
+
+    History is split into rolling train and test windows. On each train window, the processor is
+    backtested with every combination of parameters in the grid. The parameters scoring best are
+    then backtested on the following test window, and the test windows are stitched into an
+    out-of-sample equity curve.
+
+    All backtests load interday data over the whole range, so they share one interday panel and
+    one set of stock universes, and their caches are computed once, as are market days. Backtests
+    of all windows run side by side in forked worker processes.
+
+    Parameters:
+        processor_class: Processor class, or a partial of it, taking the parameters as keyword arguments.
+        param_grid: Values to try for each parameter.
+        start_date: First day of the first train window. Inclusive.
+        end_date: Last day of the last test window. Exclusive.
+        data_client: Data client to load bars from.
+        train_period: Length of train windows.
+        test_period: Length of test windows.
+        metric: Field of the performance to pick parameters by. Higher is better.
+        num_workers: Maximum number of worker processes. The number of CPUs by default.
+
+    Returns:
+        Parameters and performance of each window, the out-of-sample daily equity and its performance.
+    """
+    if metric not in Performance._fields:
+        raise ValueError(f'Unknown metric {metric}')
+    if isinstance(start_date, str):
+        start_date = pd.to_datetime(start_date)
+    if isinstance(end_date, str):
+        end_date = pd.to_datetime(end_date)
+    windows = get_windows(start_date, end_date, train_period, test_period)
+    grid = get_param_grid(param_grid)
+    market_dates = get_market_dates(start_date, end_date)
+
+    def get_backtest(window_start: pd.Timestamp, window_end: pd.Timestamp, params: Dict[str, Any]) -> Backtest:
+        return Backtest(
+            start_date=window_start,
+            end_date=window_end,
+            processors=[functools.partial(processor_class, **params)],
+            data_client=data_client,
+            lookback_start_date=start_date - datetime.timedelta(days=INTERDAY_LOOKBACK_LOAD),
+            lookback_end_date=end_date,
+            market_dates=[day for day in market_dates if window_start.date() <= day < window_end.date()],
+        )
+
+    train_results = run_backtests(
+        [get_backtest(train_start, train_end, params) for train_start, train_end, _, _ in windows for params in grid],
+        num_workers,
+    )
+    best_params, train_performances = [], []
+    for i in range(len(windows)):
+        window_results = train_results[i * len(grid) : (i + 1) * len(grid)]
+        best = max(range(len(grid)), key=lambda j: _get_score(window_results[j].performance, metric))
+        best_params.append(grid[best])
+        train_performances.append(window_results[best].performance)
+    test_backtests = [
+        get_backtest(test_start, test_end, params) for (_, _, test_start, test_end), params in zip(windows, best_params)
+    ]
+    test_results = run_backtests(test_backtests, num_workers)
+
+    dates, equity = [], [1]
+    num_win, num_lose = 0, 0
+    for backtest, result in zip(test_backtests, test_results):
+        daily_equity = result.daily_equity
+        base = equity[-1]
+        for day, value in zip(backtest.market_dates, daily_equity[1:]):
+            dates.append(day)
+            equity.append(base * value / daily_equity[0] if daily_equity[0] else 0)
+        num_win += result.performance.num_win
+        num_lose += result.performance.num_lose
+
+    return WalkForwardResult(
+        windows=[
+            WalkForwardWindow(*window, params, train_performance, test_result.performance)
+            for window, params, train_performance, test_result in zip(
+                windows, best_params, train_performances, test_results
+            )
+        ],
+        equity=pd.Series(equity[1:], index=pd.DatetimeIndex(dates), name='equity'),
+        performance=compute_performance(equity, num_win, num_lose),
+    )
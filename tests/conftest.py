@@ -4,6 +4,13 @@ import alpaca.trading as alpaca_trading
 import alpaca_trade_api as tradeapi
 import pytest
 
+try:
+    import git
+except ImportError:
+    git = None
+
+from alpharius import data
+
 from . import fakes
 
 
@@ -38,8 +45,20 @@ def mock_trading_client(mocker):
     return client
 
 
+@pytest.fixture(autouse=True)
+def mock_git(mocker):
+    if git is not None:
+        mocker.patch.object(git, 'Repo', return_value=mocker.MagicMock())
+
+
 @pytest.fixture(autouse=True)
 def mock_default_data_client(mocker):
     client = fakes.FakeDataClient()
     mocker.patch('alpharius.data.get_default_data_client', return_value=client)
     return client
+
+
+@pytest.fixture(autouse=True)
+def clear_bar_cache():
+    yield
+    data.get_bar_cache().clear()
@@ -1,5 +1,6 @@
 import os
 
+import numpy as np
 import pandas as pd
 import pytest
 from alpaca.data.historical import StockHistoricalDataClient
@@ -52,3 +53,34 @@ def test_get_last_trades():
     client = data.AlpacaClient()
     prices = client.get_last_trades(['AAPL'])
     assert len(prices) == 1
+
+
+def test_get_data_sorts_bars(mocker):
+    raw_data = [
+        {'t': f'2024-03-26T{t}:00Z', 'o': c, 'h': c, 'l': c, 'c': c, 'v': 100, 'n': 1, 'vw': c}
+        for t, c in [('14:00', 2.0), ('13:55', 1.0)]
+    ]
+    mocker.patch.object(StockHistoricalDataClient, 'get_stock_bars', return_value=BarSet({'AAPL': raw_data}))
+    client = data.AlpacaClient()
+
+    d = client.get_data(
+        'AAPL', pd.Timestamp('2024-03-26'), pd.Timestamp('2024-03-27'), time_interval=data.TimeInterval.FIVE_MIN
+    )
+
+    assert list(d['Close']) == [1, 2]
+    assert list(d.index.strftime('%H:%M')) == ['09:55', '10:00']
+    assert d['Volume'].dtype == np.uint32
+
+
+def test_get_data_batch(mocker):
+    mocker.patch.object(data.alpaca_client, '_BATCH_SIZE', 2)
+    client = data.AlpacaClient()
+
+    d = client.get_data_batch(
+        ['AAPL', 'MSFT', 'GOOG'], pd.Timestamp('2024-03-26'), pd.Timestamp('2024-03-27'), data.TimeInterval.FIVE_MIN
+    )
+
+    assert list(d) == ['AAPL', 'MSFT', 'GOOG']
+    assert len(d['AAPL']) > 0
+    assert len(d['MSFT']) == 0
+    assert StockHistoricalDataClient.get_stock_bars.call_count == 2
@@ -0,0 +1,55 @@
+import datetime
+
+import pandas as pd
+
+import alpharius.data as data
+
+from ..fakes import FakeDataClient
+
+
+def _get_key(symbol: str) -> data.BarCacheKey:
+    return data.BarCacheKey(symbol, data.TimeInterval.DAY, datetime.date(2024, 1, 1), datetime.date(2024, 2, 1))
+
+
+def _get_bars() -> pd.DataFrame:
+    return FakeDataClient().get_data(
+        'QQQ', pd.Timestamp('2024-01-01'), pd.Timestamp('2024-02-01'), data.TimeInterval.DAY
+    )
+
+
+def test_get_put():
+    cache = data.BarCache(1 << 20)
+    df = _get_bars()
+
+    assert cache.get(_get_key('QQQ')) is None
+    cache.put(_get_key('QQQ'), df)
+
+    assert cache.get(_get_key('QQQ')) is df
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.num_bytes == df.memory_usage(index=True).sum()
+
+
+def test_evict_least_recently_used():
+    df = _get_bars()
+    size = df.memory_usage(index=True).sum()
+    cache = data.BarCache(2 * size)
+    cache.put(_get_key('QQQ'), df)
+    cache.put(_get_key('SPY'), df)
+    cache.get(_get_key('QQQ'))
+
+    cache.put(_get_key('DIA'), df)
+
+    assert cache.get(_get_key('SPY')) is None
+    assert cache.get(_get_key('QQQ')) is not None
+    assert cache.evictions == 1
+    assert len(cache) == 2
+    assert cache.num_bytes == 2 * size
+
+
+def test_skip_oversized():
+    cache = data.BarCache(10)
+
+    cache.put(_get_key('QQQ'), _get_bars())
+
+    assert len(cache) == 0
+    assert cache.num_bytes == 0
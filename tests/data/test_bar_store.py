@@ -0,0 +1,113 @@
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+
+import alpharius.data as data
+from alpharius.data import bar_store
+
+from ..fakes import FakeDataClient
+
+
+def _get_bars(symbol: str, start: str, end: str) -> pd.DataFrame:
+    return FakeDataClient().get_data(symbol, pd.Timestamp(start), pd.Timestamp(end), data.TimeInterval.DAY)
+
+
+def test_read_write(tmp_path):
+    store = data.BarStore(str(tmp_path))
+    qqq = _get_bars('QQQ', '2024-01-01', '2024-02-01')
+    spy = _get_bars('SPY', '2024-01-01', '2024-02-01')
+    coverage = (datetime.date(2024, 1, 1), datetime.date(2024, 2, 1))
+
+    store.write({'QQQ': qqq, 'SPY': spy}, {'QQQ': coverage, 'SPY': coverage})
+
+    assert store.get_coverage('QQQ') == coverage
+    assert store.get_coverage('DIA') is None
+    assert store.read('DIA') is None
+    df = store.read('QQQ')
+    assert len(df) == len(qqq)
+    assert df.index.equals(qqq.index)
+    np.testing.assert_allclose(df['Close'].to_numpy(), qqq['Close'].to_numpy())
+    sliced = store.read('SPY', pd.Timestamp('2024-01-10'), pd.Timestamp('2024-01-12'))
+    assert list(sliced.index.strftime('%F')) == ['2024-01-10', '2024-01-11', '2024-01-12']
+
+
+def test_read_is_memory_mapped(tmp_path):
+    store = data.BarStore(str(tmp_path))
+    qqq = _get_bars('QQQ', '2024-01-01', '2024-02-01')
+    store.write({'QQQ': qqq}, {'QQQ': (datetime.date(2024, 1, 1), datetime.date(2024, 2, 1))})
+
+    df = store.read('QQQ')
+
+    chunk = store._index['QQQ'][0]
+    assert np.shares_memory(df['Close'].to_numpy(), store._arrays[chunk]['Close'])
+    assert isinstance(store._arrays[chunk]['Close'], np.memmap)
+
+
+def test_write_replaces_symbol(tmp_path):
+    store = data.BarStore(str(tmp_path))
+    old_coverage = (datetime.date(2024, 1, 1), datetime.date(2024, 2, 1))
+    new_coverage = (datetime.date(2024, 1, 1), datetime.date(2024, 3, 1))
+    store.write(
+        {'QQQ': _get_bars('QQQ', '2024-01-01', '2024-02-01'), 'SPY': _get_bars('SPY', '2024-01-01', '2024-02-01')},
+        {'QQQ': old_coverage, 'SPY': old_coverage},
+    )
+
+    store.write({'QQQ': _get_bars('QQQ', '2024-01-01', '2024-03-01')}, {'QQQ': new_coverage})
+
+    assert store.get_coverage('QQQ') == new_coverage
+    assert store.get_coverage('SPY') == old_coverage
+    assert len(store.read('SPY')) == len(_get_bars('SPY', '2024-01-01', '2024-02-01'))
+    assert len(data.BarStore(str(tmp_path)).read('QQQ')) == len(_get_bars('QQQ', '2024-01-01', '2024-03-01'))
+
+
+def test_write_appends_changed_symbols(tmp_path):
+    store = data.BarStore(str(tmp_path))
+    coverage = (datetime.date(2024, 1, 1), datetime.date(2024, 2, 1))
+    qqq = _get_bars('QQQ', '2024-01-01', '2024-02-01')
+    store.write({'QQQ': qqq, 'SPY': _get_bars('SPY', '2024-01-01', '2024-02-01')}, {'QQQ': coverage, 'SPY': coverage})
+    spy_chunk = store._index['SPY'][0]
+
+    store.write({'QQQ': qqq}, {'QQQ': coverage})
+
+    assert store._index['SPY'][0] == spy_chunk
+    qqq_chunk = store._index['QQQ'][0]
+    assert qqq_chunk != spy_chunk
+    assert len(store._arrays[qqq_chunk]['Close']) == len(qqq)
+
+
+def test_write_removes_replaced_versions_later(tmp_path, mocker):
+    store = data.BarStore(str(tmp_path))
+    coverage = (datetime.date(2024, 1, 1), datetime.date(2024, 2, 1))
+    qqq = _get_bars('QQQ', '2024-01-01', '2024-02-01')
+    store.write({'QQQ': qqq, 'SPY': _get_bars('SPY', '2024-01-01', '2024-02-01')}, {'QQQ': coverage, 'SPY': coverage})
+    first_version = store._version
+    store.write({'QQQ': qqq}, {'QQQ': coverage})
+    second_version = store._version
+
+    # Still there for readers that loaded it before it was replaced
+    assert os.path.isdir(tmp_path / second_version)
+
+    mocker.patch.object(bar_store, '_RETENTION_SECONDS', -1)
+    store.write({'QQQ': qqq}, {'QQQ': coverage})
+
+    assert not os.path.exists(tmp_path / second_version)
+    # Still holds bars of SPY
+    assert os.path.isdir(tmp_path / first_version)
+    assert len(data.BarStore(str(tmp_path)).read('SPY')) == len(_get_bars('SPY', '2024-01-01', '2024-02-01'))
+
+
+def test_write_merges_chunks(tmp_path, mocker):
+    mocker.patch.object(bar_store, '_MAX_CHUNKS', 2)
+    store = data.BarStore(str(tmp_path))
+    coverage = (datetime.date(2024, 1, 1), datetime.date(2024, 2, 1))
+    symbols = ['QQQ', 'SPY', 'DIA', 'IWM']
+
+    for symbol in symbols:
+        store.write({symbol: _get_bars(symbol, '2024-01-01', '2024-02-01')}, {symbol: coverage})
+
+    assert len({entry[0] for entry in store._index.values()}) <= 2
+    for symbol in symbols:
+        assert store.get_coverage(symbol) == coverage
+        assert len(store.read(symbol)) == len(_get_bars(symbol, '2024-01-01', '2024-02-01'))
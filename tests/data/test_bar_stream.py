@@ -0,0 +1,97 @@
+import asyncio
+from typing import List, Optional
+
+import pandas as pd
+from alpaca.data import Bar, Trade
+
+import alpharius.data as data
+from alpharius.utils import TIME_ZONE
+
+
+def _get_bar(t: str, open_price: float, close: float, volume: int) -> Bar:
+    return Bar(
+        'QQQ',
+        {
+            't': pd.Timestamp(t).tz_localize(TIME_ZONE).to_pydatetime(),
+            'o': open_price,
+            'h': max(open_price, close),
+            'l': min(open_price, close),
+            'c': close,
+            'v': volume,
+            'n': 1,
+            'vw': close,
+        },
+    )
+
+
+def _get_trade(t: str, price: float, conditions: Optional[List[str]] = None) -> Trade:
+    return Trade(
+        'QQQ',
+        {
+            't': pd.Timestamp(t).tz_localize(TIME_ZONE).to_pydatetime(),
+            'p': price,
+            's': 10,
+            'x': 'V',
+            'i': 1,
+            'c': conditions or [],
+            'z': 'C',
+        },
+    )
+
+
+def test_aggregate_minute_bars_and_trades():
+    stream = data.BarStream()
+
+    for update in [
+        stream.on_bar(_get_bar('2024-03-04 10:00', 10, 11, 100)),
+        stream.on_trade(_get_trade('2024-03-04 10:02:10', 12)),
+        stream.on_bar(_get_bar('2024-03-04 10:01', 11, 9, 200)),
+        stream.on_trade(_get_trade('2024-03-04 10:05:01', 13)),
+    ]:
+        asyncio.run(update)
+    bars = stream.get_bars(['QQQ', 'SPY'])
+
+    assert list(bars['QQQ'].index) == [
+        pd.Timestamp('2024-03-04 10:00').tz_localize(TIME_ZONE),
+        pd.Timestamp('2024-03-04 10:05').tz_localize(TIME_ZONE),
+    ]
+    assert bars['QQQ'].iloc[0].tolist() == [10, 12, 9, 12, 300]
+    assert bars['QQQ'].iloc[1].tolist() == [13, 13, 13, 13, 0]
+    assert len(bars['SPY']) == 0
+
+
+def test_skip_trades_not_eligible_for_bars():
+    stream = data.BarStream()
+
+    for update in [
+        stream.on_trade(_get_trade('2024-03-04 10:00:10', 10, ['@'])),
+        stream.on_trade(_get_trade('2024-03-04 10:00:20', 20, ['@', 'I'])),
+        stream.on_trade(_get_trade('2024-03-04 10:00:30', 5, ['Z'])),
+        stream.on_trade(_get_trade('2024-03-04 10:00:40', 11, ['@', 'F'])),
+    ]:
+        asyncio.run(update)
+    bars = stream.get_bars(['QQQ'])
+
+    assert bars['QQQ'].iloc[0].tolist() == [10, 11, 10, 11, 0]
+
+
+def test_get_lag():
+    stream = data.BarStream()
+
+    asyncio.run(stream.on_trade(_get_trade('2024-03-04 10:00:10', 10)))
+
+    assert stream.get_lag() > 0
+    assert stream.get_lag() == 0
+
+
+def test_seed():
+    stream = data.BarStream()
+    asyncio.run(stream.on_bar(_get_bar('2024-03-04 10:05', 10, 11, 100)))
+    index = pd.DatetimeIndex(['2024-03-04 10:00', '2024-03-04 10:05']).tz_localize(TIME_ZONE)
+    seeded = pd.DataFrame([[8, 9, 7, 9, 50], [9, 10, 9, 10, 60]], index=index, columns=data.DATA_COLUMNS)
+
+    stream.seed({'QQQ': seeded}, pd.Timestamp('2024-03-04 10:05:30').tz_localize(TIME_ZONE))
+    bars = stream.get_bars(['QQQ'])
+
+    assert bars['QQQ'].iloc[0].tolist() == [8, 9, 7, 9, 50]
+    assert bars['QQQ'].iloc[1].tolist() == [9, 11, 9, 11, 100]
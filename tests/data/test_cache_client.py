@@ -1,15 +1,22 @@
 import datetime
+import os
+from concurrent import futures
 
+import numpy as np
 import pandas as pd
 
 import alpharius.data as data
 import alpharius.data.cache_client as cache_client
+from alpharius.utils import TIME_ZONE
 
 from ..fakes import FakeDataClient
 
 
-def test_get_db_file():
+def test_get_db_file(mocker, tmp_path):
+    mocker.patch.object(cache_client, 'CACHE_DIR', str(tmp_path))
+
     assert 'FIVE_MIN' in cache_client.get_db_file(data.TimeInterval.FIVE_MIN)
+    assert os.path.isdir(tmp_path / 'FIVE_MIN')
 
 
 def test_time_range_merge():
@@ -29,16 +36,18 @@ def test_time_range_merge():
     ]
 
 
-def test_time_range_serialize():
-    t1 = cache_client.TimeRange([])
-    t1.merge(pd.Timestamp('2024-02-01'), pd.Timestamp('2024-03-01'))
-    t1.merge(pd.Timestamp('2024-04-01'), pd.Timestamp('2024-05-01'))
-    t1.merge(pd.Timestamp('2024-06-01'), pd.Timestamp('2024-07-01'))
-    s1 = t1.to_string()
-    t2 = cache_client.TimeRange.from_string(s1)
-    s2 = t2.to_string()
-    assert t1.intervals == t2.intervals
-    assert s1 == s2
+def test_time_range_gaps():
+    time_range = cache_client.TimeRange([])
+    time_range.merge(pd.Timestamp('2024-02-01'), pd.Timestamp('2024-03-01'))
+    time_range.merge(pd.Timestamp('2024-03-10'), pd.Timestamp('2024-03-20'))
+    assert time_range.gaps(pd.Timestamp('2024-02-05'), pd.Timestamp('2024-02-10')) == []
+    assert time_range.gaps(pd.Timestamp('2024-01-25'), pd.Timestamp('2024-03-25')) == [
+        (datetime.date(2024, 1, 25), datetime.date(2024, 1, 31)),
+        (datetime.date(2024, 3, 2), datetime.date(2024, 3, 9)),
+        (datetime.date(2024, 3, 21), datetime.date(2024, 3, 25)),
+    ]
+    time_range.merge(pd.Timestamp('2024-03-02'), pd.Timestamp('2024-03-09'))
+    assert time_range.intervals == [(datetime.date(2024, 2, 1), datetime.date(2024, 3, 20))]
 
 
 def test_time_range_include():
@@ -59,3 +68,52 @@ def test_cache_client(mocker):
     assert fake_data_client.get_data_call_count == 1
     assert client.cache_hit == 1
     assert df1.to_string() == df2.to_string()
+
+
+def test_cache_client_batch(mocker):
+    mocker.patch.object(cache_client, 'get_db_file', return_value=':memory:')
+    fake_data_client = FakeDataClient()
+    get_data_batch = mocker.spy(fake_data_client, 'get_data_batch')
+    client = cache_client.CacheClient(fake_data_client)
+    client.get_daily('QQQ', pd.Timestamp('2024-04-18'), data.TimeInterval.FIVE_MIN)
+
+    d = client.get_daily_batch(['SPY', 'QQQ', 'DIA'], pd.Timestamp('2024-04-18'), data.TimeInterval.FIVE_MIN)
+
+    assert list(d) == ['SPY', 'QQQ', 'DIA']
+    assert get_data_batch.call_args.args[0] == ['SPY', 'DIA']
+    assert client.cache_hit == 1
+
+
+def test_cache_client_reads_by_symbol(mocker, tmp_path):
+    mocker.patch.object(cache_client, 'get_db_file', return_value=str(tmp_path / 'bars.db'))
+    fake_data_client = FakeDataClient()
+    client = cache_client.CacheClient(fake_data_client)
+    day = pd.Timestamp('2024-04-18')
+    with futures.ThreadPoolExecutor(max_workers=2) as pool:
+        expected = dict(
+            zip(['QQQ', 'SPY'], pool.map(lambda s: client.get_daily(s, day, data.TimeInterval.HOUR), ['QQQ', 'SPY']))
+        )
+
+    for symbol, df in expected.items():
+        cached = client.get_daily(symbol, day, data.TimeInterval.HOUR)
+        assert cached.index.equals(df.index)
+        np.testing.assert_allclose(cached['Close'].to_numpy(), df['Close'].to_numpy())
+    assert fake_data_client.get_data_call_count == 2
+    assert client.cache_hit == 2
+
+
+def test_cache_client_fetches_gaps(mocker):
+    mocker.patch.object(cache_client, 'get_db_file', return_value=':memory:')
+    fake_data_client = FakeDataClient()
+    get_data = mocker.spy(fake_data_client, 'get_data')
+    client = cache_client.CacheClient(fake_data_client)
+    client.get_data('QQQ', pd.Timestamp('2024-04-10'), pd.Timestamp('2024-04-20'), data.TimeInterval.HOUR)
+
+    df = client.get_data('QQQ', pd.Timestamp('2024-04-01'), pd.Timestamp('2024-04-15'), data.TimeInterval.HOUR)
+
+    assert get_data.call_count == 2
+    assert get_data.call_args.args[1] == pd.Timestamp('2024-04-01').tz_localize(TIME_ZONE)
+    assert get_data.call_args.args[2].date() == datetime.date(2024, 4, 9)
+    assert df.index[0].date() == datetime.date(2024, 4, 1)
+    assert df.index[-1].date() == datetime.date(2024, 4, 15)
+    assert df.index.is_monotonic_increasing and df.index.is_unique
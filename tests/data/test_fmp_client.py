@@ -1,15 +1,22 @@
-import json
+import asyncio
+import gc
+import multiprocessing
 import os
-import time
+import threading
+from concurrent import futures
 
+import numpy as np
 import pandas as pd
 import pytest
-import requests
 
 import alpharius.data as data
+from alpharius.data import fmp_client
+from alpharius.data.fmp_client import AsyncTokenBucket
 
+_get_json = data.AsyncFmpClient._get_json
 
-def fake_get(url, params, *args, **kwargs):
+
+def get_content(url, params):
     if 'historical-chart' in url:
         content = [
             {
@@ -48,15 +55,15 @@ def fake_get(url, params, *args, **kwargs):
         content = [{'symbol': symbol, 'price': 145.85, 'volume': 42822124} for symbol in symbols]
     else:
         raise ValueError('url not recognized')
-    response = requests.Response()
-    response._content = json.dumps(content).encode()
-    response.status_code = 200
-    return response
+    return content
 
 
 @pytest.fixture(autouse=True)
-def mock_requests(mocker):
-    mocker.patch.object(requests, 'get', side_effect=fake_get)
+def mock_get_json(mocker):
+    async def fake_get_json(url, params):
+        return get_content(url, params)
+
+    mocker.patch.object(data.AsyncFmpClient, '_get_json', side_effect=fake_get_json)
 
 
 @pytest.mark.parametrize('time_interval', [data.TimeInterval.FIVE_MIN, data.TimeInterval.HOUR, data.TimeInterval.DAY])
@@ -80,12 +87,140 @@ def test_get_last_trades():
     assert len(prices) == 2
 
 
+def test_async_get_data():
+    async def get_data():
+        client = data.AsyncFmpClient()
+        return await asyncio.gather(
+            *[
+                client.get_data('AAPL', pd.Timestamp('2024-03-26'), pd.Timestamp('2024-03-26'), data.TimeInterval.DAY)
+                for _ in range(3)
+            ]
+        )
+
+    assert all(len(d) > 0 for d in asyncio.run(get_data()))
+
+
 def test_rate_limited(mocker):
+    clock = mocker.Mock(return_value=100)
+    mock_sleep = mocker.patch.object(asyncio, 'sleep', new_callable=mocker.AsyncMock)
+    rate_limiter = AsyncTokenBucket(rate=2, capacity=3, clock=clock)
+
+    async def acquire(n):
+        for _ in range(n):
+            await rate_limiter.acquire()
+
+    asyncio.run(acquire(3))
+    assert mock_sleep.call_count == 0
+
+    asyncio.run(acquire(2))
+    assert [c.args[0] for c in mock_sleep.call_args_list] == [0.5, 1]
+
+    clock.return_value = 102
+    asyncio.run(acquire(2))
+    assert mock_sleep.call_count == 2
+
+
+def test_get_json_retries_timeout(mocker):
+    mocker.patch.object(asyncio, 'sleep', new_callable=mocker.AsyncMock)
+    response = mocker.AsyncMock()
+    response.__aenter__.return_value.json.return_value = [1]
+    client = data.AsyncFmpClient()
+    client._session = mocker.Mock()
+    client._session.get.side_effect = [asyncio.TimeoutError(), response]
+
+    assert asyncio.run(_get_json(client, 'url', {})) == [1]
+    assert client._session.get.call_count == 2
+
+
+def test_get_data_filters_and_sorts(mocker):
+    content = [
+        {'date': f'2024-03-26 {t}', 'open': 1, 'low': 1, 'high': 1, 'close': c, 'volume': None}
+        for t, c in [('10:00:00', 3), ('09:30:00', 2), ('09:00:00', 1), ('16:05:00', 4)]
+    ]
+    mocker.patch.object(data.AsyncFmpClient, '_get_json', new_callable=mocker.AsyncMock, return_value=content)
     client = data.FmpClient()
-    mock_sleep = mocker.patch.object(time, 'sleep')
-    mocker.patch.object(time, 'time', side_effect=[100] * 3000 + [1000] * 2000)
 
-    for _ in range(800):
-        client.get_daily('AAPL', pd.Timestamp('2024-03-26'), data.TimeInterval.FIVE_MIN)
+    d = client.get_data(
+        'AAPL',
+        start_time=pd.Timestamp('2024-03-26 09:30'),
+        end_time=pd.Timestamp('2024-03-26 16:00'),
+        time_interval=data.TimeInterval.FIVE_MIN,
+    )
+
+    assert list(d['Close']) == [2, 3]
+    assert list(d.index.strftime('%H:%M')) == ['09:30', '10:00']
+    assert d['Close'].dtype == np.float32
+    assert list(d['Volume']) == [0, 0]
+
+
+def test_get_data_batch():
+    client = data.FmpClient()
+
+    d = client.get_data_batch(
+        ['AAPL', 'MSFT'], pd.Timestamp('2024-03-26'), pd.Timestamp('2024-03-27'), data.TimeInterval.DAY
+    )
+
+    assert list(d) == ['AAPL', 'MSFT']
+    assert all(len(df) > 0 for df in d.values())
+
+
+def _get_last_trades_in_child(symbols):
+    # Collects the event loop inherited from the parent, if it is not referenced anymore
+    gc.collect()
+    return data.FmpClient().get_last_trades(symbols)
+
+
+def test_event_loop_stopped_while_forking():
+    data.FmpClient().get_last_trades(['AAPL'])
+    client = data.FmpClient()
+
+    fmp_client._pause_event_loop()
+    loop_threads = [thread for thread in threading.enumerate() if thread.name == 'fmp-event-loop']
+    fmp_client._resume_event_loop()
+
+    assert not loop_threads
+    for _ in range(2):
+        with futures.ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('fork')) as pool:
+            assert len(pool.submit(_get_last_trades_in_child, ['AAPL', 'MSFT']).result()) == 2
+        assert len(client.get_last_trades(['AAPL'])) == 1
+
+
+_shared_rate_limiter = AsyncTokenBucket(rate=1, capacity=2, clock=lambda: 100)
+
+
+def _acquire_in_child(n):
+    async def acquire():
+        for _ in range(n):
+            await _shared_rate_limiter.acquire()
+
+    asyncio.run(acquire())
+
+
+def test_rate_limiter_shared_by_forked_processes(mocker):
+    with futures.ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('fork')) as pool:
+        pool.submit(_acquire_in_child, 2).result()
+    mock_sleep = mocker.patch.object(asyncio, 'sleep', new_callable=mocker.AsyncMock)
+
+    _acquire_in_child(1)
+
+    mock_sleep.assert_called_once_with(1)
+
+
+_forked_client = None
+
+
+def _get_inherited_clients_in_child():
+    _forked_client.get_last_trades(['AAPL'])
+    return [id(client) for client in fmp_client._inherited_clients]
+
+
+def test_inherited_async_client_kept_in_child():
+    global _forked_client
+    _forked_client = data.FmpClient()
+    _forked_client.get_last_trades(['AAPL'])
+    async_client = _forked_client.async_client
 
-    assert mock_sleep.call_count > 0
+    with futures.ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('fork')) as pool:
+        assert pool.submit(_get_inherited_clients_in_child).result() == [id(async_client)]
+    assert _forked_client.async_client is async_client
+    assert fmp_client._inherited_clients == []
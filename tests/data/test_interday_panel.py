@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+import alpharius.data as data
+from alpharius.utils import TIME_ZONE
+
+
+def _get_frame(days: list[str], closes: list[float]) -> pd.DataFrame:
+    index = pd.DatetimeIndex(days).tz_localize(TIME_ZONE)
+    return pd.DataFrame(
+        {'Open': closes, 'High': closes, 'Low': closes, 'Close': closes, 'Volume': [100] * len(closes)},
+        index=index,
+        columns=data.DATA_COLUMNS,
+    )
+
+
+def test_align_to_dates():
+    panel = data.InterdayPanel(
+        {
+            'QQQ': _get_frame(['2024-03-04', '2024-03-05', '2024-03-06'], [1, 2, 3]),
+            'SPY': _get_frame(['2024-03-04', '2024-03-06'], [4, 5]),
+            'DIA': pd.DataFrame(columns=data.DATA_COLUMNS),
+        }
+    )
+
+    assert panel.symbols == ['QQQ', 'SPY']
+    assert panel.shape == (3, 2)
+    np.testing.assert_array_equal(panel.field('Close'), [[1, 4], [2, np.nan], [3, 5]])
+    np.testing.assert_array_equal(panel.rows(), [[0, 0], [1, -1], [2, 1]])
+    np.testing.assert_array_equal(panel.previous('Close'), [[np.nan, np.nan], [1, np.nan], [2, 4]])
+    assert panel.get_date_index(pd.Timestamp('2024-03-05').tz_localize(TIME_ZONE)) == 1
+    assert panel.get_date_index(pd.Timestamp('2024-03-07').tz_localize(TIME_ZONE)) is None
+    assert panel.get_symbol_index('SPY') == 1
+    assert panel.get_symbol_index('DIA') is None
+
+
+def test_feature_computed_once():
+    panel = data.InterdayPanel({'QQQ': _get_frame(['2024-03-04', '2024-03-05'], [1, 2])})
+    calls = []
+
+    def compute(p: data.InterdayPanel) -> np.ndarray:
+        calls.append(p)
+        return p.field('Close') * 2
+
+    first = panel.feature('double', compute)
+    second = panel.feature('double', compute)
+
+    assert first is second
+    assert len(calls) == 1
+
+
+def test_rolling():
+    panel = data.InterdayPanel(
+        {
+            'QQQ': _get_frame(['2024-03-04', '2024-03-05', '2024-03-06'], [1, 2, 3]),
+            'SPY': _get_frame(['2024-03-04', '2024-03-06'], [10, 20]),
+        }
+    )
+    values = panel.values('Close')
+
+    np.testing.assert_array_equal(panel.rolling_mean(values, 2), [1, 1.5, 2.5, 10, 15])
+    np.testing.assert_array_equal(panel.rolling_mean(values, 2, first_row=1), [0, 2, 2.5, 0, 20])
+    np.testing.assert_array_equal(panel.rolling_max(values, 2), [1, 2, 3, 10, 20])
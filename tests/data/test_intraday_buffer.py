@@ -0,0 +1,55 @@
+import pandas as pd
+
+import alpharius.data as data
+from alpharius.utils import TIME_ZONE
+
+from ..fakes import FakeDataClient
+
+
+def _get_bars() -> pd.DataFrame:
+    return FakeDataClient().get_daily('QQQ', pd.Timestamp('2024-03-04'), data.TimeInterval.FIVE_MIN)
+
+
+def test_update():
+    buffer = data.IntradayBuffer()
+    bars = _get_bars().iloc[:100]
+
+    buffer.update(bars)
+
+    assert len(buffer) == 100
+    pd.testing.assert_frame_equal(buffer.frame(), bars, check_dtype=False, check_index_type=False)
+    assert buffer.last_time() == bars.index[-1]
+
+
+def test_update_keeps_latest_bars():
+    buffer = data.IntradayBuffer(capacity=10)
+    bars = _get_bars()
+
+    buffer.update(bars)
+
+    assert len(buffer) == 10
+    assert buffer.frame().index[0] == bars.index[-10]
+
+
+def test_append_and_set_close():
+    buffer = data.IntradayBuffer()
+    buffer.update(_get_bars().iloc[:3])
+    frame = buffer.frame()
+    t = pd.Timestamp('2024-03-04 00:15').tz_localize(TIME_ZONE)
+
+    buffer.set_close(50)
+    buffer.append(t, 1, 2, 0.5, 1.5, 10)
+
+    assert frame['Close'].iloc[-1] == 50
+    assert buffer.frame().index[-1] == t
+    assert buffer.frame().iloc[-1].tolist() == [1, 2, 0.5, 1.5, 10]
+
+
+def test_append_drops_oldest_bar_if_full():
+    buffer = data.IntradayBuffer(capacity=3)
+    bars = _get_bars()
+    buffer.update(bars.iloc[:3])
+
+    buffer.append(bars.index[3], 1, 2, 0.5, 1.5, 10)
+
+    assert list(buffer.frame().index) == list(bars.index[1:4])
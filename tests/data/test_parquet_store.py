@@ -0,0 +1,152 @@
+import datetime
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import alpharius.data as data
+import alpharius.data.utils as data_utils
+
+from ..fakes import FakeDataClient
+
+pytest.importorskip('pyarrow')
+
+
+def _get_bars(symbol: str, start: str, end: str, time_interval: data.TimeInterval) -> pd.DataFrame:
+    return FakeDataClient().get_data(symbol, pd.Timestamp(start), pd.Timestamp(end), time_interval)
+
+
+def test_read_write(tmp_path):
+    store = data.ParquetStore(str(tmp_path))
+    qqq = _get_bars('QQQ', '2024-03-04', '2024-03-06', data.TimeInterval.FIVE_MIN)
+    spy = _get_bars('SPY', '2024-03-04', '2024-03-06', data.TimeInterval.FIVE_MIN)
+
+    store.write({'QQQ': qqq, 'SPY': spy}, data.TimeInterval.FIVE_MIN)
+    res = store.read(
+        ['QQQ', 'DIA'], pd.Timestamp('2024-03-05'), pd.Timestamp('2024-03-05 23:59'), data.TimeInterval.FIVE_MIN
+    )
+
+    assert list(res) == ['QQQ']
+    expected = qqq[qqq.index.date == datetime.date(2024, 3, 5)]
+    assert res['QQQ'].index.equals(expected.index)
+    np.testing.assert_allclose(res['QQQ']['Close'].to_numpy(), expected['Close'].to_numpy())
+    assert os.path.isdir(tmp_path / 'interval=FIVE_MIN' / 'date=2024-03-05')
+
+
+def test_write_keeps_other_symbols(tmp_path):
+    store = data.ParquetStore(str(tmp_path))
+    qqq = _get_bars('QQQ', '2024-03-04', '2024-03-06', data.TimeInterval.FIVE_MIN)
+    spy = _get_bars('SPY', '2024-03-04', '2024-03-06', data.TimeInterval.FIVE_MIN)
+    store.write({'QQQ': qqq, 'SPY': spy}, data.TimeInterval.FIVE_MIN)
+
+    store.write({'QQQ': qqq.iloc[:10]}, data.TimeInterval.FIVE_MIN)
+    res = store.read(
+        ['QQQ', 'SPY'], pd.Timestamp('2024-03-04'), pd.Timestamp('2024-03-04 23:59'), data.TimeInterval.FIVE_MIN
+    )
+
+    assert res['SPY'].index.equals(spy[spy.index.date == datetime.date(2024, 3, 4)].index)
+    assert res['QQQ'].index.equals(qqq.index[:10])
+
+
+def test_write_coverage(tmp_path):
+    store = data.ParquetStore(str(tmp_path))
+    coverage = (datetime.date(2024, 1, 1), datetime.date(2024, 2, 29))
+
+    store.write({}, data.TimeInterval.DAY, {'QQQ': coverage})
+
+    assert data.ParquetStore(str(tmp_path)).get_coverage(data.TimeInterval.DAY) == {'QQQ': coverage}
+    assert os.listdir(tmp_path) == ['_coverage.json']
+
+
+def test_export_import(tmp_path):
+    bar_store = data.BarStore(str(tmp_path / 'bars'))
+    coverage = (datetime.date(2024, 1, 1), datetime.date(2024, 2, 29))
+    qqq = _get_bars('QQQ', '2024-01-01', '2024-03-01', data.TimeInterval.DAY)
+    bar_store.write({'QQQ': qqq}, {'QQQ': coverage})
+    parquet_store = data.ParquetStore(str(tmp_path / 'parquet'))
+
+    data.export_to_parquet(parquet_store, bar_store)
+    new_bar_store = data.BarStore(str(tmp_path / 'new_bars'))
+    data.import_from_parquet(data.ParquetStore(str(tmp_path / 'parquet')), new_bar_store)
+
+    assert new_bar_store.get_coverage('QQQ') == coverage
+    assert new_bar_store.read('QQQ').index.equals(qqq.index)
+
+
+def test_export_writes_month_of_bars_together(mocker, tmp_path):
+    mocker.patch.object(data.parquet_store, 'CACHE_DIR', str(tmp_path / 'cache'))
+    qqq = _get_bars('QQQ', '2024-03-04', '2024-03-05 23:59', data.TimeInterval.FIVE_MIN)
+    for day, df in qqq.groupby(qqq.index.date):
+        day_dir = tmp_path / 'cache' / 'FIVE_MIN' / day.strftime('%F')
+        day_dir.mkdir(parents=True)
+        df.to_pickle(day_dir / 'history_QQQ.pickle')
+    parquet_store = data.ParquetStore(str(tmp_path / 'parquet'))
+    write = mocker.spy(parquet_store, 'write')
+
+    data.export_to_parquet(parquet_store, data.BarStore(str(tmp_path / 'bars')))
+
+    assert [c.args[1] for c in write.call_args_list] == [data.TimeInterval.DAY, data.TimeInterval.FIVE_MIN]
+    res = parquet_store.read(
+        ['QQQ'], pd.Timestamp('2024-03-04'), pd.Timestamp('2024-03-05 23:59'), data.TimeInterval.FIVE_MIN
+    )
+    assert res['QQQ'].index.equals(qqq.index)
+
+
+def test_import_within_window(tmp_path):
+    parquet_store = data.ParquetStore(str(tmp_path / 'parquet'))
+    qqq = _get_bars('QQQ', '2024-01-01', '2024-03-01', data.TimeInterval.DAY)
+    spy = _get_bars('SPY', '2024-02-01', '2024-03-01', data.TimeInterval.DAY)
+    parquet_store.write(
+        {'QQQ': qqq, 'SPY': spy},
+        data.TimeInterval.DAY,
+        {
+            'QQQ': (datetime.date(2024, 1, 1), datetime.date(2024, 2, 29)),
+            'SPY': (datetime.date(2024, 2, 1), datetime.date(2024, 2, 9)),
+        },
+    )
+    bar_store = data.BarStore(str(tmp_path / 'bars'))
+
+    data.import_from_parquet(parquet_store, bar_store, start_date=datetime.date(2024, 2, 5))
+
+    assert bar_store.get_coverage('QQQ') == (datetime.date(2024, 2, 5), datetime.date(2024, 2, 29))
+    assert bar_store.get_coverage('SPY') == (datetime.date(2024, 2, 5), datetime.date(2024, 2, 9))
+    assert bar_store.read('QQQ').index[0].date() == datetime.date(2024, 2, 5)
+    assert bar_store.read('SPY').index[-1].date() == datetime.date(2024, 2, 9)
+
+
+def test_load_intraday_dataset_reads_parquet(mocker, tmp_path):
+    mocker.patch.dict(os.environ, {data.parquet_store.PARQUET_DATASET_DIR_ENV: str(tmp_path / 'parquet')})
+    mocker.patch.object(data_utils, 'CACHE_DIR', str(tmp_path / 'cache'))
+    mocker.patch.object(data_utils, 'get_bar_cache', return_value=data.BarCache(1 << 30))
+    qqq = _get_bars('QQQ', '2024-03-04', '2024-03-05', data.TimeInterval.FIVE_MIN)
+    data.get_parquet_store().write({'QQQ': qqq}, data.TimeInterval.FIVE_MIN)
+    data_client = FakeDataClient()
+
+    dataset = data.load_intraday_dataset(['QQQ'], pd.Timestamp('2024-03-04'), data_client)
+
+    assert data_client.get_data_call_count == 0
+    assert dataset['QQQ'].index.equals(qqq.index)
+
+
+def test_load_interday_dataset_reads_parquet(mocker, tmp_path):
+    mocker.patch.dict(os.environ, {data.parquet_store.PARQUET_DATASET_DIR_ENV: str(tmp_path / 'parquet')})
+    bar_store = data.BarStore(str(tmp_path / 'bars'))
+    mocker.patch.object(data_utils, 'get_bar_store', return_value=bar_store)
+    mocker.patch.object(data_utils, 'get_bar_cache', return_value=data.BarCache(1 << 30))
+    coverage = (datetime.date(2024, 1, 1), datetime.date(2024, 2, 29))
+    qqq = _get_bars('QQQ', '2024-01-01', '2024-03-01', data.TimeInterval.DAY)
+    parquet_store = data.get_parquet_store()
+    parquet_store.write({'QQQ': qqq}, data.TimeInterval.DAY, {'QQQ': coverage})
+    read = mocker.spy(parquet_store, 'read')
+    data_client = FakeDataClient()
+
+    dataset = data.load_interday_dataset(['QQQ'], pd.Timestamp('2024-02-01'), pd.Timestamp('2024-02-15'), data_client)
+
+    assert data_client.get_data_call_count == 0
+    assert dataset['QQQ'].index[0].date() == datetime.date(2024, 2, 1)
+    assert dataset['QQQ'].index[-1].date() == datetime.date(2024, 2, 15)
+    # Later loads are served by the bar store
+    assert bar_store.get_coverage('QQQ') == coverage
+    data.load_interday_dataset(['QQQ'], pd.Timestamp('2024-01-02'), pd.Timestamp('2024-02-28'), data_client)
+    assert read.call_count == 1
@@ -0,0 +1,35 @@
+import pandas as pd
+
+import alpharius.data as data
+from alpharius.utils import TIME_ZONE
+
+from ..fakes import FakeDataClient
+
+
+def test_simulated_clock_skips_sleep():
+    start = pd.Timestamp('2021-03-17 09:00').tz_localize(TIME_ZONE)
+    clock = data.SimulatedClock(start)
+
+    clock.sleep(3600)
+
+    assert clock.now() - start >= pd.Timedelta(hours=1)
+    assert clock.now() - start < pd.Timedelta(hours=1, minutes=1)
+
+
+def test_serve_bars_up_to_clock():
+    day = pd.Timestamp('2021-03-17').tz_localize(TIME_ZONE)
+    clock = data.SimulatedClock(pd.Timestamp('2021-03-17 10:02').tz_localize(TIME_ZONE))
+    source = FakeDataClient()
+    client = data.ReplayDataClient(source, day, clock)
+    client.load(['QQQ', 'SPY'])
+    call_count = source.get_data_call_count
+
+    bars = client.get_daily_batch(['QQQ', 'SPY'], day, data.TimeInterval.FIVE_MIN)
+    last_trades = client.get_last_trades(['QQQ'])
+    history = client.get_data('QQQ', day - pd.Timedelta(days=5), day + pd.Timedelta(days=1), data.TimeInterval.DAY)
+
+    assert bars['QQQ'].index[-1] == pd.Timestamp('2021-03-17 10:00').tz_localize(TIME_ZONE)
+    assert last_trades['QQQ'] == bars['QQQ']['Close'].iloc[-1]
+    assert source.get_data_call_count == call_count + 1
+    assert len(history)
+    assert history.index[-1] < day
@@ -1,13 +1,31 @@
 import datetime
+import os
 
 import alpaca.trading as trading
 import pandas as pd
+import pytest
 
-from alpharius.data import get_transactions
+import alpharius.data.utils as data_utils
+from alpharius.data import (
+    BarCache,
+    BarStore,
+    ReplayDataClient,
+    SimulatedClock,
+    get_transactions,
+    load_interday_dataset,
+    load_intraday_dataset,
+)
+from alpharius.utils import TIME_ZONE
 
 from ..fakes import FakeDataClient, get_order
 
 
+@pytest.fixture(autouse=True)
+def mock_bar_store(mocker, tmp_path):
+    mocker.patch.object(data_utils, 'get_bar_store', return_value=BarStore(str(tmp_path)))
+    mocker.patch.object(data_utils, 'get_bar_cache', return_value=BarCache(1 << 30))
+
+
 def test_get_transactions(mocker, mock_trading_client):
     orders = []
     for i in range(400):
@@ -35,3 +53,108 @@ def test_get_transactions(mocker, mock_trading_client):
 
     assert get_orders.call_count == 2
     assert len(transactions) == 400
+
+
+def test_load_interday_dataset():
+    data_client = FakeDataClient()
+
+    dataset1 = load_interday_dataset(
+        ['QQQ', 'SPY'], pd.Timestamp('2024-01-01'), pd.Timestamp('2024-03-01'), data_client
+    )
+    assert data_client.get_data_call_count == 2
+    dataset2 = load_interday_dataset(
+        ['SPY', 'QQQ'], pd.Timestamp('2024-02-01'), pd.Timestamp('2024-03-01'), data_client
+    )
+
+    assert data_client.get_data_call_count == 2
+    assert list(dataset1) == ['QQQ', 'SPY']
+    assert list(dataset2) == ['SPY', 'QQQ']
+    assert dataset2['QQQ'].index[0] == pd.Timestamp('2024-02-01').tz_localize(TIME_ZONE)
+    assert dataset2['QQQ'].index[-1] == dataset1['QQQ'].index[-1]
+
+
+def test_load_interday_dataset_shows_progress(mocker):
+    mocker.patch.object(data_utils.sys.stdout, 'isatty', return_value=True)
+    mocker.patch.object(data_utils, '_PROGRESS_BATCH_SIZE', 1)
+    progress = mocker.patch.object(data_utils, 'tqdm')
+    data_client = FakeDataClient()
+
+    dataset = load_interday_dataset(['QQQ', 'SPY'], pd.Timestamp('2024-01-01'), pd.Timestamp('2024-03-01'), data_client)
+
+    assert list(dataset) == ['QQQ', 'SPY']
+    progress.assert_called_once_with(total=2, ncols=80)
+    assert progress.return_value.update.call_count == 2
+    progress.return_value.close.assert_called_once()
+
+
+def test_load_interday_dataset_fetches_tail(mocker):
+    data_client = FakeDataClient(data=[42])
+    get_data = mocker.spy(data_client, 'get_data')
+    load_interday_dataset(['QQQ'], pd.Timestamp('2024-01-01'), pd.Timestamp('2024-03-01'), data_client)
+
+    dataset = load_interday_dataset(['QQQ'], pd.Timestamp('2024-01-01'), pd.Timestamp('2024-03-15'), data_client)
+
+    assert get_data.call_count == 2
+    assert get_data.call_args.args[1] == pd.Timestamp('2024-02-23').tz_localize(TIME_ZONE)
+    assert dataset['QQQ'].index[0].date() == datetime.date(2024, 1, 1)
+    assert dataset['QQQ'].index[-1].date() == datetime.date(2024, 3, 14)
+    assert dataset['QQQ'].index.is_unique
+
+
+def test_load_interday_dataset_refetches_on_split():
+    load_interday_dataset(['QQQ'], pd.Timestamp('2024-01-01'), pd.Timestamp('2024-03-01'), FakeDataClient(data=[42]))
+    data_client = FakeDataClient(data=[21])
+
+    dataset = load_interday_dataset(['QQQ'], pd.Timestamp('2024-01-01'), pd.Timestamp('2024-03-15'), data_client)
+
+    assert data_client.get_data_call_count == 2
+    assert (dataset['QQQ']['Close'] == 21).all()
+
+
+def test_load_interday_dataset_stores_history_before_replay_day():
+    day = pd.Timestamp('2024-03-01').tz_localize(TIME_ZONE)
+    data_client = ReplayDataClient(FakeDataClient(), day, SimulatedClock(day + datetime.timedelta(hours=10)))
+
+    dataset = load_interday_dataset(['QQQ'], pd.Timestamp('2024-01-01'), day, data_client)
+
+    assert dataset['QQQ'].index[-1].date() == datetime.date(2024, 2, 29)
+    assert data_utils.get_bar_store().get_coverage('QQQ') == (datetime.date(2024, 1, 1), datetime.date(2024, 2, 29))
+
+
+def test_load_interday_dataset_missing_symbol(mocker):
+    data_client = FakeDataClient()
+    mocker.patch.object(data_client, 'get_data_batch', return_value={})
+
+    dataset = load_interday_dataset(['DELISTED'], pd.Timestamp('2024-01-01'), pd.Timestamp('2024-03-01'), data_client)
+
+    assert len(dataset['DELISTED']) == 0
+
+
+def test_load_intraday_dataset_missing_symbol(mocker, tmp_path):
+    mocker.patch.object(data_utils, 'CACHE_DIR', str(tmp_path))
+    data_client = FakeDataClient()
+    mocker.patch.object(data_client, 'get_data_batch', return_value={})
+
+    dataset = load_intraday_dataset(['DELISTED'], pd.Timestamp('2024-03-04'), data_client)
+
+    assert len(dataset['DELISTED']) == 0
+
+
+def test_load_intraday_dataset_fetches_window(mocker, tmp_path):
+    mocker.patch.object(data_utils, 'CACHE_DIR', str(tmp_path))
+    data_client = FakeDataClient(data=[42])
+    get_data = mocker.spy(data_client, 'get_data')
+
+    dataset = load_intraday_dataset(
+        ['QQQ', 'SPY'], pd.Timestamp('2024-03-04'), data_client, window_end=pd.Timestamp('2024-03-08')
+    )
+    mocker.patch.object(data_utils, 'get_bar_cache', return_value=BarCache(1 << 30))
+    next_dataset = load_intraday_dataset(
+        ['QQQ'], pd.Timestamp('2024-03-06'), data_client, window_end=pd.Timestamp('2024-03-08')
+    )
+
+    assert get_data.call_count == 2
+    assert {d.date() for d in dataset['QQQ'].index} == {datetime.date(2024, 3, 4)}
+    assert {d.date() for d in next_dataset['QQQ'].index} == {datetime.date(2024, 3, 6)}
+    assert len(next_dataset['QQQ']) == 288
+    assert os.path.isfile(tmp_path / 'FIVE_MIN' / '2024-03-08' / 'history_SPY.pickle')
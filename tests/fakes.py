@@ -454,6 +454,9 @@ class FakeProcessor(trade.Processor):
         self.get_stock_universe_call_count += 1
         return ['QQQ', 'SPY', 'DIA']
 
+    def get_prefetch_symbols(self, view_time):
+        return ['QQQ', 'SPY', 'DIA']
+
     def process_data(self, context):
         self.process_data_call_count += 1
         if context.current_time.time() == datetime.time(9, 35) and context.symbol == 'QQQ':
@@ -472,6 +475,10 @@ class FakeProcessor(trade.Processor):
             return trade.ProcessorAction('SPY', trade.ActionType.BUY_TO_OPEN, 1)
 
 
+# Grid of FakeProcessor trading within the day and overnight
+FAKE_PROCESSOR_GRID = {'trading_frequency': [trade.TradingFrequency.FIVE_MIN, trade.TradingFrequency.CLOSE_TO_OPEN]}
+
+
 class FakeDbEngine:
     def __init__(self):
         self.conn = mock.MagicMock()
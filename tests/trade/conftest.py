@@ -1,3 +1,4 @@
+import fcntl
 import os
 
 import matplotlib.font_manager as fm
@@ -5,12 +6,19 @@ import matplotlib.pyplot as plt
 import pandas as pd
 import pytest
 
+from alpharius.data import BarStore
+
 
 @pytest.fixture(autouse=True)
 def mock_pandas(mocker):
     mocker.patch.object(pd.DataFrame, 'to_pickle')
 
 
+@pytest.fixture(autouse=True)
+def mock_bar_store(mocker):
+    mocker.patch.object(BarStore, 'write')
+
+
 @pytest.fixture(autouse=True)
 def mock_matplotlib(mocker):
     mocker.patch.object(plt, 'savefig')
@@ -24,3 +32,6 @@ def mock_os(mocker):
     mocker.patch('builtins.open', mocker.mock_open(read_data='data'))
     mocker.patch.object(os.path, 'isfile', return_value=False)
     mocker.patch.object(os, 'makedirs')
+    mocker.patch.object(os, 'replace')
+    # Files are mocked, so there is nothing to lock
+    mocker.patch.object(fcntl, 'flock')
@@ -5,7 +5,7 @@ import pandas as pd
 import pytest
 
 from alpharius import trade
-from alpharius.trade import PROCESSORS
+from alpharius.trade import PROCESSORS, backtest
 
 from ..fakes import FakeDataClient, FakeProcessor
 
@@ -41,6 +41,90 @@ def test_run_success(trading_frequency):
     assert fake_processor.process_data_call_count > 0
 
 
+def test_run_sharded():
+    backtesting = trade.Backtest(
+        start_date=pd.to_datetime('2021-03-15'),
+        end_date=pd.to_datetime('2021-03-24'),
+        processors=[FakeProcessor(trade.TradingFrequency.FIVE_MIN)],
+        data_client=FakeDataClient(),
+        num_shards=3,
+    )
+
+    transactions = backtesting.run()
+
+    assert transactions
+    assert len(backtesting._daily_equity) == len(backtesting._market_dates) + 1
+    assert backtesting._num_win + backtesting._num_lose == len(transactions)
+    assert [t.exit_time for t in transactions] == sorted(t.exit_time for t in transactions)
+
+
+def test_run_sharded_overnight_sequential():
+    fake_processor = FakeProcessor(trade.TradingFrequency.CLOSE_TO_OPEN)
+    backtesting = trade.Backtest(
+        start_date=pd.to_datetime('2021-03-17'),
+        end_date=pd.to_datetime('2021-03-24'),
+        processors=[fake_processor],
+        data_client=FakeDataClient(),
+        num_shards=3,
+    )
+
+    backtesting.run()
+
+    assert fake_processor.process_data_call_count > 0
+
+
+def test_run_attribution(mocker):
+    log_attribution = mocker.spy(backtest.Backtest, '_log_attribution')
+    fake_processor = FakeProcessor(trade.TradingFrequency.FIVE_MIN)
+    backtesting = trade.Backtest(
+        start_date=pd.to_datetime('2021-03-17'),
+        end_date=pd.to_datetime('2021-03-24'),
+        processors=[fake_processor],
+        data_client=FakeDataClient(),
+        attribution=True,
+    )
+
+    backtesting.run()
+
+    results = log_attribution.call_args.args[1]
+    assert len(results) == 1
+    assert results[0].num_win + results[0].num_lose > 0
+    assert len(results[0].daily_equity) == len(backtesting._market_dates) + 1
+    assert fake_processor.process_data_call_count > 0
+
+
+def test_run_sharded_attribution(mocker):
+    log_attribution = mocker.spy(backtest.Backtest, '_log_attribution')
+    backtesting = trade.Backtest(
+        start_date=pd.to_datetime('2021-03-15'),
+        end_date=pd.to_datetime('2021-03-24'),
+        processors=[FakeProcessor(trade.TradingFrequency.FIVE_MIN)],
+        data_client=FakeDataClient(),
+        num_shards=3,
+        attribution=True,
+    )
+
+    transactions = backtesting.run()
+
+    results = log_attribution.call_args.args[1]
+    assert results[0].num_win + results[0].num_lose == len(transactions)
+    assert len(results[0].daily_equity) == len(backtesting._market_dates) + 1
+
+
+def test_run_attribution_stops_on_failure(mocker):
+    mocker.patch.object(backtest.Backtest, '_run_days', side_effect=ValueError('fake error'))
+    backtesting = trade.Backtest(
+        start_date=pd.to_datetime('2021-03-17'),
+        end_date=pd.to_datetime('2021-03-24'),
+        processors=[FakeProcessor(trade.TradingFrequency.FIVE_MIN)],
+        data_client=FakeDataClient(),
+        attribution=True,
+    )
+
+    with pytest.raises(ValueError):
+        backtesting.run()
+
+
 def test_run_with_processors():
     backtesting = trade.Backtest(
         start_date=pd.to_datetime('2021-03-17'),
@@ -50,3 +134,22 @@ def test_run_with_processors():
     )
 
     backtesting.run()
+
+
+def test_run_prefetches_intraday_data(mocker):
+    load_intraday_dataset = mocker.spy(backtest, 'load_intraday_dataset')
+    processor = FakeProcessor(trade.TradingFrequency.FIVE_MIN)
+    backtesting = trade.Backtest(
+        start_date=pd.to_datetime('2021-03-17'),
+        end_date=pd.to_datetime('2021-03-24'),
+        processors=[processor],
+        data_client=FakeDataClient(),
+        prefetch_days=2,
+    )
+
+    backtesting.run()
+
+    loaded_days = sorted(c.args[1].date() for c in load_intraday_dataset.call_args_list)
+    assert loaded_days == backtesting._market_dates
+    # Prefetching leaves the processor state alone
+    assert processor.get_stock_universe_call_count == len(backtesting._market_dates)
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from alpharius.data import TimeInterval
+from alpharius.trade import Context
+from alpharius.trade.enums import Mode
+from alpharius.trade.structs import ContextBuilder
+
+from ..fakes import FakeDataClient
+
+
+def test_context_builder():
+    data_client = FakeDataClient()
+    interday_lookback = data_client.get_data(
+        'FAKE', pd.Timestamp('2025-01-01'), pd.Timestamp('2025-01-15'), TimeInterval.DAY
+    )
+    intraday_data = data_client.get_data(
+        'FAKE', pd.Timestamp('2025-01-15 09:00:00-05'), pd.Timestamp('2025-01-15 16:00:00-05'), TimeInterval.FIVE_MIN
+    )
+    # A gap in the bars
+    intraday_data = intraday_data.drop(pd.Timestamp('2025-01-15 10:00:00-05'))
+    builder = ContextBuilder({'FAKE': intraday_data}, Mode.BACKTEST)
+
+    for interval_start in pd.date_range('2025-01-15 09:00:00-05', '2025-01-15 15:55:00-05', freq='5min'):
+        context = builder.build('FAKE', interval_start, interval_start + pd.Timedelta(minutes=5), interday_lookback)
+        if interval_start not in intraday_data.index:
+            assert context is None
+            continue
+        intraday_lookback = intraday_data.loc[:interval_start]
+        expected = Context(
+            'FAKE',
+            interval_start + pd.Timedelta(minutes=5),
+            intraday_lookback['Close'].iloc[-1],
+            interday_lookback,
+            intraday_lookback,
+        )
+        assert context.current_price == expected.current_price
+        assert context.market_open_index == expected.market_open_index
+        assert context.today_open == expected.today_open
+        np.testing.assert_array_equal(context.intraday_closes, expected.intraday_closes)
+        np.testing.assert_array_equal(context.intraday_volumes, expected.intraday_volumes)
+        pd.testing.assert_frame_equal(context.intraday_lookback, intraday_lookback)
@@ -146,7 +146,11 @@ def test_update_db(mocker, mock_engine):
 
 def test_complete_intraday_data(mocker):
     patch_market_close(mocker, next_close=1615988100)
-    mocker.patch.object(FakeDataClient, 'get_daily', return_value=pd.DataFrame())
+    mocker.patch.object(
+        FakeDataClient,
+        'get_daily_batch',
+        side_effect=lambda symbols, *args: {symbol: pd.DataFrame(columns=data.DATA_COLUMNS) for symbol in symbols},
+    )
     live = trade.Live(
         processors=[FakeProcessor(trade.TradingFrequency.CLOSE_TO_OPEN)],
         data_client=FakeDataClient(),
@@ -159,14 +163,15 @@ def test_complete_intraday_data(mocker):
 def test_adjust_price(mocker):
     patch_market_close(mocker, next_close=1615988100)
     columns = data.DATA_COLUMNS
+    bars = pd.DataFrame(
+        index=[pd.to_datetime(1615987800, utc=True, unit='s').tz_convert(TIME_ZONE)],
+        data=[[1] * len(columns)],
+        columns=columns,
+    )
     mocker.patch.object(
         FakeDataClient,
-        'get_daily',
-        return_value=pd.DataFrame(
-            index=[pd.to_datetime(1615987800, utc=True, unit='s').tz_convert(TIME_ZONE)],
-            data=[[1] * len(columns)],
-            columns=columns,
-        ),
+        'get_daily_batch',
+        side_effect=lambda symbols, *args: {symbol: bars.copy() for symbol in symbols},
     )
     live = trade.Live(
         processors=[FakeProcessor(trade.TradingFrequency.CLOSE_TO_OPEN)],
@@ -175,3 +180,46 @@ def test_adjust_price(mocker):
     live.run()
     for df in live._intraday_data.values():
         assert df['Close'].iloc[-1] != 1
+
+
+def test_streaming_skips_polling(mocker):
+    patch_market_close(mocker, next_close=1615989600)
+    mocker.patch.object(data.BarStream, 'start')
+    mocker.patch.object(data.BarStream, 'stop')
+    mocker.patch.object(
+        data.BarStream,
+        'get_bars',
+        side_effect=lambda symbols: {
+            symbol: pd.DataFrame(
+                [[1, 1, 1, 1, 10]],
+                index=[pd.Timestamp(time.time() // 300 * 300, unit='s', tz=TIME_ZONE)],
+                columns=data.DATA_COLUMNS,
+            )
+            for symbol in symbols
+        },
+    )
+    data_client = FakeDataClient()
+    fake_processor = FakeProcessor(trade.TradingFrequency.FIVE_MIN)
+    live = trade.Live(processors=[fake_processor], data_client=data_client, streaming=True)
+
+    live.run()
+
+    assert fake_processor.process_data_call_count > 0
+    assert data_client.get_last_trades_call_count == 0
+    data.BarStream.stop.assert_called_once()
+
+
+def test_streaming_polls_stale_symbols(mocker):
+    patch_market_close(mocker, next_close=1615989600)
+    mocker.patch.object(data.BarStream, 'start')
+    mocker.patch.object(data.BarStream, 'stop')
+    data_client = FakeDataClient()
+    live = trade.Live(
+        processors=[FakeProcessor(trade.TradingFrequency.FIVE_MIN)], data_client=data_client, streaming=True
+    )
+
+    live.run()
+
+    assert data_client.get_last_trades_call_count > 0
+    for df in live._intraday_data.values():
+        assert len(df)
@@ -0,0 +1,39 @@
+import os
+
+import pandas as pd
+import pytest
+import sqlalchemy
+
+from alpharius import trade
+from alpharius.trade import common
+
+from ..fakes import FakeDataClient, FakeDbEngine, FakeProcessor
+
+
+@pytest.fixture(autouse=True)
+def mock_engine(mocker):
+    return mocker.patch.object(sqlalchemy, 'create_engine', return_value=FakeDbEngine())
+
+
+def test_run_replay():
+    fake_processor = FakeProcessor(trade.TradingFrequency.FIVE_MIN)
+
+    latencies = trade.run_replay(
+        [fake_processor], pd.Timestamp('2021-03-17'), FakeDataClient(), symbols=['QQQ', 'SPY', 'DIA']
+    )
+
+    assert len(latencies) == 78
+    assert fake_processor.process_data_call_count > 0
+    assert all(latency >= 0 for latency in latencies.values())
+
+
+def test_run_replay_records_nothing(mock_engine):
+    trade.run_replay(
+        [FakeProcessor(trade.TradingFrequency.FIVE_MIN)],
+        pd.Timestamp('2021-03-17'),
+        FakeDataClient(),
+        symbols=['QQQ', 'SPY', 'DIA'],
+    )
+
+    mock_engine.assert_not_called()
+    os.makedirs.assert_any_call(os.path.join(common.OUTPUT_DIR, 'replay', '2021-03-17'), exist_ok=True)
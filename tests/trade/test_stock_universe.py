@@ -1,5 +1,10 @@
+import fcntl
+
+import numpy as np
 import pandas as pd
+import pytest
 
+from alpharius.trade import stock_universe
 from alpharius.trade.stock_universe import CachedStockUniverse
 
 
@@ -32,3 +37,82 @@ def test_cached_stock_universe():
     assert test_universe1.get_cache_dir() != test_universe3.get_cache_dir()
     assert test_universe1.get_cache_dir() != test_universe4.get_cache_dir()
     assert test_universe1.get_cache_dir() != test_universe5.get_cache_dir()
+
+
+def test_stock_universe_shared(mock_trading_client):
+    stock_universe.get_market_dates.cache_clear()
+    test_universe1 = FakeStockUniverse(1, 2.0, ['test'], pd.Timestamp('2020-01-01'), pd.Timestamp('2020-12-31'))
+    test_universe2 = FakeStockUniverse(
+        a=1,
+        b=2.0,
+        c=['test'],
+        lookback_start_date=pd.Timestamp('2020-01-01'),
+        lookback_end_date=pd.Timestamp('2020-12-31'),
+    )
+    test_universe3 = FakeStockUniverse(1, 3.0, ['test'], pd.Timestamp('2020-01-01'), pd.Timestamp('2020-12-31'))
+
+    assert test_universe1 is test_universe2
+    assert test_universe1 is not test_universe3
+    assert mock_trading_client.get_calendar_call_count == 1
+
+
+class CountingStockUniverse(CachedStockUniverse):
+    def __init__(self, name: str, lookback_start_date: pd.Timestamp, lookback_end_date: pd.Timestamp):
+        super().__init__(lookback_start_date, lookback_end_date)
+        self.name = name
+        self.impl_call_count = 0
+
+    def get_stock_universe_impl(self, view_time: pd.Timestamp) -> list[str]:
+        self.impl_call_count += 1
+        return [self.name]
+
+
+def test_cached_stock_universe_computed_once(mocker):
+    mock_open = mocker.patch('builtins.open', mocker.mock_open())
+    test_universe = CountingStockUniverse('computed', pd.Timestamp('2020-01-01'), pd.Timestamp('2020-12-31'))
+
+    assert test_universe.get_stock_universe(pd.Timestamp('2020-03-02')) == ['computed']
+    assert test_universe.get_stock_universe(pd.Timestamp('2020-03-02')) == ['computed']
+    assert test_universe.get_stock_universe(pd.Timestamp('2020-03-03')) == ['computed']
+
+    assert test_universe.impl_call_count == 2
+    mock_open().write.assert_has_calls(
+        [mocker.call('{"2020-03-02": ["computed"]}\n'), mocker.call('{"2020-03-03": ["computed"]}\n')]
+    )
+    fcntl.flock.assert_called_with(mock_open(), fcntl.LOCK_EX)
+
+
+def test_cached_stock_universe_loaded(mocker):
+    mocker.patch('os.path.isfile', return_value=True)
+    mocker.patch('builtins.open', mocker.mock_open(read_data='{"2020-03-02": ["A"], "2020-03-03": ["B"]}\n{"2020-03'))
+    test_universe = CountingStockUniverse('loaded', pd.Timestamp('2020-01-01'), pd.Timestamp('2020-12-31'))
+
+    assert test_universe.get_stock_universe(pd.Timestamp('2020-03-02')) == ['A']
+    assert test_universe.get_stock_universe(pd.Timestamp('2020-03-03')) == ['B']
+    assert test_universe.impl_call_count == 0
+
+
+@pytest.mark.parametrize('num_workers', [1, 2])
+def test_precompute(mocker, num_workers):
+    mocker.patch.object(stock_universe, '_MIN_DAYS_PER_WORKER', 1)
+    mock_open = mocker.patch('builtins.open', mocker.mock_open())
+    test_universe = CountingStockUniverse(
+        f'precomputed_{num_workers}', pd.Timestamp('2020-01-01'), pd.Timestamp('2020-12-31')
+    )
+    view_times = [pd.Timestamp('2020-03-02'), pd.Timestamp('2020-03-03'), pd.Timestamp('2020-03-04')]
+
+    test_universe.precompute(view_times, num_workers=num_workers)
+    test_universe.precompute(view_times, num_workers=num_workers)
+
+    mock_open().write.assert_called_once()
+    for view_time in view_times:
+        assert test_universe.get_stock_universe(view_time) == [f'precomputed_{num_workers}']
+    mock_open().write.assert_called_once()
+
+
+def test_get_top_breaks_ties_by_candidate():
+    candidates = np.arange(6)
+    scores = np.array([1, 3, 2, 3, 2, 2], dtype=float)
+
+    assert list(stock_universe._get_top(candidates[::-1], scores[::-1], 3)) == [1, 3, 2]
+    assert list(stock_universe._get_top(candidates, scores, 4)) == [1, 3, 2, 4]
@@ -0,0 +1,66 @@
+import builtins
+import glob
+import os
+
+import pandas as pd
+import pytest
+
+import alpharius.data.utils as data_utils
+from alpharius import trade
+from alpharius.trade import backtest
+
+from ..fakes import FAKE_PROCESSOR_GRID, FakeDataClient, FakeProcessor
+
+# Real file functions, before they are mocked
+_open = builtins.open
+_makedirs = os.makedirs
+
+
+@pytest.mark.parametrize('num_workers', [1, 2])
+def test_run_sweep(num_workers, mock_trading_client):
+    results = trade.run_sweep(
+        FakeProcessor,
+        FAKE_PROCESSOR_GRID,
+        start_date=pd.to_datetime('2021-03-17'),
+        end_date=pd.to_datetime('2021-03-24'),
+        data_client=FakeDataClient(),
+        num_workers=num_workers,
+    )
+
+    assert results['trading_frequency'].tolist() == [
+        trade.TradingFrequency.FIVE_MIN,
+        trade.TradingFrequency.CLOSE_TO_OPEN,
+    ]
+    assert list(results.columns[1:]) == [
+        'gain_loss',
+        'sharpe_ratio',
+        'drawdown',
+        'win_rate',
+        'num_trades',
+        'num_win',
+        'num_lose',
+    ]
+    assert results['num_trades'][0] > 0
+    assert mock_trading_client.get_calendar_call_count == 1
+
+
+def test_run_sweep_logs_to_own_files(mocker, tmp_path):
+    mocker.patch.object(builtins, 'open', _open)
+    mocker.patch.object(os, 'makedirs', _makedirs)
+    mocker.patch.object(backtest, 'OUTPUT_DIR', str(tmp_path))
+    mocker.patch.object(data_utils, 'CACHE_DIR', str(tmp_path / 'cache'))
+
+    trade.run_sweep(
+        FakeProcessor,
+        FAKE_PROCESSOR_GRID,
+        start_date=pd.to_datetime('2021-03-17'),
+        end_date=pd.to_datetime('2021-03-24'),
+        data_client=FakeDataClient(),
+        num_workers=1,
+    )
+
+    summary_files = glob.glob(os.path.join(tmp_path, '**', 'summary.txt'), recursive=True)
+    assert len(summary_files) == 2
+    for summary_file in summary_files:
+        with open(summary_file) as f:
+            assert f.read().count('[ Statistics ]') == 1
@@ -13,6 +13,11 @@ class FakeArgs:
     end_date: str
     ack_all: bool = False
     processors: list[str] | None = None
+    replay_date: str | None = None
+    speed: float | None = None
+    streaming: bool = False
+    num_shards: int = 1
+    attribution: bool = False
 
 
 @pytest.mark.parametrize('mode', ['backtest', 'live'])
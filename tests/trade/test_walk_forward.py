@@ -0,0 +1,86 @@
+import builtins
+import glob
+import os
+
+import pandas as pd
+import pytest
+
+import alpharius.data.utils as data_utils
+from alpharius import trade
+from alpharius.trade import backtest, walk_forward
+
+from ..fakes import FAKE_PROCESSOR_GRID, FakeDataClient, FakeProcessor
+
+# Real file functions, before they are mocked
+_open = builtins.open
+_makedirs = os.makedirs
+
+
+def test_get_windows():
+    windows = walk_forward.get_windows(
+        pd.to_datetime('2021-01-01'), pd.to_datetime('2021-08-15'), pd.DateOffset(months=3), pd.DateOffset(months=2)
+    )
+
+    assert [[t.strftime('%F') for t in window] for window in windows] == [
+        ['2021-01-01', '2021-04-01', '2021-04-01', '2021-06-01'],
+        ['2021-03-01', '2021-06-01', '2021-06-01', '2021-08-01'],
+        ['2021-05-01', '2021-08-01', '2021-08-01', '2021-08-15'],
+    ]
+
+
+def test_get_windows_too_short():
+    with pytest.raises(ValueError):
+        walk_forward.get_windows(
+            pd.to_datetime('2021-01-01'), pd.to_datetime('2021-02-01'), pd.DateOffset(months=1), pd.DateOffset(days=7)
+        )
+
+
+@pytest.mark.parametrize('num_workers', [1, 2])
+def test_run_walk_forward(num_workers, mock_trading_client):
+    result = trade.run_walk_forward(
+        FakeProcessor,
+        FAKE_PROCESSOR_GRID,
+        start_date='2021-04-05',
+        end_date='2021-04-21',
+        data_client=FakeDataClient(),
+        train_period=pd.DateOffset(days=7),
+        test_period=pd.DateOffset(days=5),
+        metric='gain_loss',
+        num_workers=num_workers,
+    )
+
+    assert len(result.windows) == 2
+    assert result.windows[0].test_start == result.windows[0].train_end
+    assert result.windows[1].test_start == result.windows[0].test_end
+    for window in result.windows:
+        assert 'trading_frequency' in window.params
+    assert result.equity.index.is_monotonic_increasing
+    assert len(result.equity) > 0
+    assert result.performance.num_trades == sum(window.test_performance.num_trades for window in result.windows)
+    assert result.performance.num_win == sum(window.test_performance.num_win for window in result.windows)
+    assert mock_trading_client.get_calendar_call_count == 1
+
+
+def test_run_walk_forward_logs_to_own_files(mocker, tmp_path):
+    mocker.patch.object(builtins, 'open', _open)
+    mocker.patch.object(os, 'makedirs', _makedirs)
+    mocker.patch.object(backtest, 'OUTPUT_DIR', str(tmp_path))
+    mocker.patch.object(data_utils, 'CACHE_DIR', str(tmp_path / 'cache'))
+
+    trade.run_walk_forward(
+        FakeProcessor,
+        {'trading_frequency': [trade.TradingFrequency.FIVE_MIN]},
+        start_date='2021-04-05',
+        end_date='2021-04-21',
+        data_client=FakeDataClient(),
+        train_period=pd.DateOffset(days=7),
+        test_period=pd.DateOffset(days=5),
+        num_workers=1,
+    )
+
+    # A train and a test backtest for each of the two windows
+    summary_files = glob.glob(os.path.join(tmp_path, '**', 'summary.txt'), recursive=True)
+    assert len(summary_files) == 4
+    for summary_file in summary_files:
+        with open(summary_file) as f:
+            assert f.read().count('[ Statistics ]') == 1